@@ -1,27 +1,63 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
 
-# Sample data for demonstration purposes
-# Replace this with your actual dataset
-@st.cache
-def load_data():
-    # For example, using the Iris dataset
-    data = sns.load_dataset("iris")
-    return data
-
-# Load dataset
-df = load_data()
+from core import data, preprocessing, stats, widgets
 
 st.title("Data Preprocessing")
 
-# Descriptive Statistics
+dataset = st.radio("Dataset", ["Overview", "Trip data"], horizontal=True, key="prep_dataset")
+
+# The chosen settings are kept for the session so EDA and modeling read the same output
+settings = st.session_state.setdefault("preprocessing", dict(preprocessing.DEFAULT_SETTINGS))
+# Keyed widgets start from the session's settings, so history can record and replay them
+for name in ("impute", "clip", "scale"):
+    st.session_state.setdefault(f"prep_{name}", settings[name])
+
 st.header("Data Cleaning")
-st.write("Missing Value Imputation: Strategies for filling in missing data.Outlier Removal Techniques: Approaches to deal with outliers.Data Formatting: Standardizing data formats (e.g., date formats).")
+st.write("Missing values are imputed per column and outliers are clipped to the chosen tail quantiles.")
+col1, col2 = st.columns(2)
+with col1:
+    settings["impute"] = st.selectbox("Missing value imputation", preprocessing.IMPUTERS, key="prep_impute")
+with col2:
+    settings["clip"] = st.select_slider(
+        "Outlier clipping (tail quantile)", options=[0.0, 0.001, 0.005, 0.01, 0.025, 0.05], key="prep_clip"
+    )
 
 st.header("Data Standardization")
-st.write("Normalization: Min-max scaling methods.Z-score Standardization: Standardizing to have mean 0 and std dev 1.")
+st.write("Min-max scaling maps the clipped range to [0, 1]; z-score standardization gives mean 0 and std dev 1.")
+settings["scale"] = st.selectbox("Scaling", preprocessing.SCALERS, key="prep_scale")
+
+if dataset == "Overview":
+    pipeline = preprocessing.overview_pipeline(settings)
+    raw = data.load_overview()
+    processed = preprocessing.preprocessed_overview(settings)
+    raw_summary = stats.frame_summary(raw, key=("overview", data.source_key(data.OVERVIEW_PATH)))
+    processed_summary = stats.frame_summary(processed, key=("preprocessed", pipeline.key))
+else:
+    trips = widgets.trip_window(key="prep_trips")
+    pipeline = preprocessing.trip_pipeline(settings)
+    processed = preprocessing.load_trips(trips, settings)
+    raw_summary = stats.trips_summary(trips)
+    processed_summary = stats.frame_summary(processed, key=("preprocessed", pipeline.key, tuple(trips)))
+
+st.subheader("Fitted parameters")
+st.caption("Fitted once per data version and shared with the EDA and Predictive Modeling pages.")
+st.dataframe(pipeline.parameters(), use_container_width=True)
 
+st.subheader("Before and after")
+# Missing counts come from the sketches: rows minus non-null values seen
+missing = pd.DataFrame({
+    "Missing": [raw_summary.rows - raw_summary.columns[c].moments.count for c in pipeline.columns],
+    "Missing after": [processed_summary.rows - processed_summary.columns[c].moments.count for c in pipeline.columns],
+}, index=pipeline.columns)
+col1, col2 = st.columns(2)
+with col1:
+    st.write("Raw")
+    st.dataframe(raw_summary.describe(pipeline.columns).round(3).join(missing["Missing"]), use_container_width=True)
+with col2:
+    st.write("Preprocessed")
+    after = processed_summary.describe(pipeline.columns).round(3)
+    st.dataframe(after.join(missing["Missing after"]), use_container_width=True)
 
+st.subheader("Preview")
+st.dataframe(processed.head(200), use_container_width=True)
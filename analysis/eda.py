@@ -1,37 +1,41 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
 
-# Set Streamlit page layout and title
-st.set_page_config(layout="wide")
+from core import anomaly, data, density, grid, instrument, preprocessing, relations, stats, widgets
+
 st.title("Battery Data Analytics")
 st.subheader("Exploratory Data Analysis (EDA): Overview data")
 
-# Load and display overview Excel data
-@st.cache_data
-def load_overview():
-    df_overview = pd.read_excel('Inputdata/MeasurementData/Overview.xlsx')
-    df_overview = df_overview.drop(['Unnamed: 13', 'Note'], axis=1)
-    df_overview = df_overview.dropna()
-    df_overview.rename(columns={'Unnamed: 8': 'SoC difference'}, inplace=True)
-    return df_overview
+# Correlation heatmap and pairwise density grid from the merged sketches,
+# cached per (summary, column set); no raw rows are touched
+@st.cache_data(max_entries=64)
+def pair_views(_summary, summary_key, columns):
+    columns = list(columns)
+    corr_fig = relations.corr_figure(_summary.corr(columns))
+    mosaic = relations.mosaic_png(_summary.sample(columns), _summary.ranges(columns), columns)
+    return corr_fig, mosaic
+
+# Histogram + KDE figure from precomputed fine-grid counts, cached per column
+@st.cache_data(max_entries=256)
+def density_figure(_hist, _summary, summary_key, column, bins=30):
+    return density.histogram_figure(_hist, _summary, column, bins)
+
+# Load the overview data (shared, Arrow-cached copy)
+df_overview = data.load_overview()
 
-# Load the overview data
-df_overview = load_overview()
+# One-pass sketches of every column, computed once per source version
+overview_summary = stats.frame_summary(df_overview, key=("overview", data.source_key(data.OVERVIEW_PATH)))
 
 # Generate descriptions based on data types and unique values
 column_descriptions = {}
 for column in df_overview.columns:
     col_type = df_overview[column].dtype
-    unique_values = df_overview[column].nunique()
+    unique_values = overview_summary.nunique(column)
     description = f"Type: {col_type}, Unique values: {unique_values}"
     column_descriptions[column] = description
 
-# Select columns to display (set default to the first two columns)
-default_columns = df_overview.columns.tolist()[:5]  # Change this to select your desired default columns
-selected_columns = st.multiselect("Select columns to display", options=df_overview.columns.tolist(), default=df_overview.columns.tolist())
+# Select columns to display (all overview columns by default)
+selected_columns = st.multiselect("Select columns to display", options=df_overview.columns.tolist(), default=df_overview.columns.tolist(), key="eda_overview_columns")
 
 # Set a minimum height for both containers
 min_height = "10px"  # Minimum height for responsive design
@@ -52,20 +56,8 @@ if selected_columns:
         # Responsive container for the descriptions
         st.markdown(f"<div style='min-height: {min_height}; height: auto; overflow: auto;'>", unsafe_allow_html=True)
         
-        # Summary Statistics
-        # Convert selected columns to numeric, coercing errors
-        numeric_columns = df_overview[selected_columns].apply(pd.to_numeric, errors='coerce')
-
-        summary_stats = df_overview[selected_columns].describe().T  # Transpose to make it easier to read
-        summary_stats['mean'] = summary_stats['mean'].round(2)
-        summary_stats['50%'] = summary_stats['50%'].round(2)  # 50% is the median
-        summary_stats['min'] = summary_stats['min'].round(2)
-        summary_stats['max'] = summary_stats['max'].round(2)
-        summary_stats['std'] = summary_stats['std'].round(2)
-
-        # Select the relevant columns for display
-        summary_stats_display = summary_stats[['mean', '50%', 'min', 'max', 'std']]
-        summary_stats_display.columns = ['Mean', 'Median', 'Min', 'Max', 'Std Dev']  # Rename for clarity
+        # Summary Statistics from the cached sketches (Mean, Median, Min, Max, Std Dev)
+        summary_stats_display = overview_summary.describe(selected_columns).round(2)
 
         # Display summary statistics
         st.dataframe(summary_stats_display)
@@ -80,18 +72,13 @@ if selected_columns:
         num_columns = len(numerical_columns)
         plot_columns = st.columns(num_columns)  # Create as many columns as there are numerical columns
 
+        overview_key = ("overview", data.source_key(data.OVERVIEW_PATH))
+        overview_hist = density.frame_histograms(df_overview, overview_summary, overview_key)
         for i, column in enumerate(numerical_columns):
             with plot_columns[i]:
-                fig, ax = plt.subplots(figsize=(5, 4))  # Adjust the size as needed
-                
-                # Create histogram and KDE
-                sns.histplot(df_overview[column], bins=30, kde=True, stat='density', ax=ax)
-                ax.set_title(f"Histogram and KDE for {column}")
-                ax.set_xlabel(column)
-                ax.set_ylabel('Density')
-
-                # Display the plot
-                st.pyplot(fig)
+                # Histogram and FFT-binned KDE from the cached counts
+                fig = density_figure(overview_hist, overview_summary, overview_key, column)
+                instrument.plotly_chart(fig, "eda.overview_histogram", use_container_width=True)
 
         # Correlation Matrix and Pairwise Scatter Plots
         if len(numerical_columns) > 0:
@@ -100,21 +87,17 @@ if selected_columns:
             # Create two columns for the correlation matrix and pairwise scatter plots
             col_corr, col_scatter = st.columns(2)  # Two columns
 
+            corr_fig, pair_png = pair_views(
+                overview_summary, ("overview", data.source_key(data.OVERVIEW_PATH)), tuple(numerical_columns)
+            )
+
             # Correlation Matrix
             with col_corr:
-                correlation_matrix = df_overview[numerical_columns].corr()
-                plt.figure(figsize=(10, 6))
-                sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt=".2f", linewidths=.5)
-                plt.title("Correlation Matrix")
-                st.pyplot(plt)
+                instrument.plotly_chart(corr_fig, "eda.overview_corr", use_container_width=True)
 
-            # Pairwise Scatter Plots
+            # Pairwise density panels (2D histograms of a fixed-size row sample)
             with col_scatter:
-                if len(numerical_columns) <= 10:  # Limit pair plots to a reasonable number of columns
-                    pair_plot_fig = sns.pairplot(df_overview[numerical_columns])
-                    st.pyplot(pair_plot_fig)
-                else:
-                    st.write("### Pairwise scatter plots are only displayed for up to 10 selected columns.")
+                instrument.image(pair_png, "eda.overview_pairs", use_column_width=True)
     else:
         st.write("### No numerical columns selected for visualization.")
 
@@ -131,7 +114,17 @@ st.header("Correlations and Relationships")
 st.write("Correlation Matrix: Visual heatmap of correlations. Scatter Plots: Pairwise scatter plots to show relationships.")
 
 st.header("Anomaly Detection")
-st.write("Outlier Visualization: Highlight outliers in data plots. Statistical Methods: Techniques for detecting anomalies.")
+st.write("Threshold breaches, rolling z-score and MAD outliers and rate-of-change spikes per trip channel. "
+         "Individual events are listed on the System alerts page.")
+# Counts from the stored alert table; no trip data is rescanned here
+if data.MASTER_PATH.exists():
+    alert_counts = anomaly.alert_table().pivot_table(
+        index="Channel", columns="Kind", values="Samples", aggfunc="count", observed=True, fill_value=0
+    )
+    alert_counts.index, alert_counts.columns = alert_counts.index.astype(str), alert_counts.columns.astype(str)
+    st.dataframe(alert_counts, use_container_width=True)
+else:
+    st.warning(f"Trip data not found: {data.MASTER_PATH}")
 
 st.header("Data Quality Checks")
 st.write("Missing Values Analysis: Display counts and methods for handling. Duplicates Identification: Check for and handle duplicate entries. Consistency Checks: Ensure data formats and types are correct.")
@@ -139,26 +132,27 @@ st.write("Missing Values Analysis: Display counts and methods for handling. Dupl
 st.header("Battery Data Analytics")
 st.subheader("Exploratory Data Analysis (EDA): Trip data")
 
-# Load and display overview Excel data
-@st.cache_data
-def load_overview():
-    df_CombinedTripData = pd.read_csv('Inputdata/MeasurementData/CombinedTripData_utf8.csv', encoding='utf-8') 
-    return df_CombinedTripData
+# Load only the selected trip(s) from the per-trip partitions
+trips = widgets.trip_window(key="eda_trips")
+if not trips:
+    st.info("The trip data has no rows yet.")
+    st.stop()
+df_CombinedTripData = data.load_trips(trips)
 
-# Load the overview data
-df_CombinedTripData = load_overview()
+# Merge the cached per-trip sketches; only trips never summarized are scanned
+trip_summary = stats.trips_summary(trips)
 
 # Generate descriptions based on data types and unique values
 column_descriptions = {}
 for column in df_CombinedTripData.columns:
     col_type = df_CombinedTripData[column].dtype
-    unique_values = df_CombinedTripData[column].nunique()
+    unique_values = trip_summary.nunique(column)
     description = f"Type: {col_type}, Unique values: {unique_values}"
     column_descriptions[column] = description
 
 # Select columns to display (defaulting to the first five columns)
 default_columns = df_CombinedTripData.columns.tolist()[:5]
-selected_columns = st.multiselect("Select columns to display", options=df_CombinedTripData.columns.tolist(), default=default_columns)
+selected_columns = st.multiselect("Select columns to display", options=df_CombinedTripData.columns.tolist(), default=default_columns, key="eda_trip_columns")
 
 # Set a minimum height for both containers
 min_height = "10px"
@@ -169,16 +163,19 @@ if selected_columns:
 
     with col1:
         st.write("### Selected Data")
+        # Preprocessed values come from the pipeline files the Data Preprocessing page wrote
+        if st.toggle("Show preprocessed values", key="eda_preprocessed"):
+            settings = st.session_state.get("preprocessing", preprocessing.DEFAULT_SETTINGS)
+        else:
+            settings = None
         st.markdown(f"<div style='min-height: {min_height}; height: auto; overflow: auto;'>", unsafe_allow_html=True)
-        st.dataframe(df_CombinedTripData[selected_columns], use_container_width=True)
+        # Only the visible page of the filtered/sorted trip rows is sent
+        grid.data_grid(grid.trips_source(trips, settings), key="eda_grid", columns=selected_columns)
         st.markdown("</div>", unsafe_allow_html=True)
 
     with col2:
         st.write("### Summary Statistics")
-        numeric_columns = df_CombinedTripData[selected_columns].apply(pd.to_numeric, errors='coerce')
-        summary_stats = numeric_columns.describe().T
-        summary_stats = summary_stats[['mean', '50%', 'min', 'max', 'std']].round(2)
-        summary_stats.columns = ['Mean', 'Median', 'Min', 'Max', 'Std Dev']
+        summary_stats = trip_summary.describe(selected_columns).round(2)
         st.dataframe(summary_stats)
 
     # Filter only numerical columns for visualization
@@ -190,34 +187,28 @@ if selected_columns:
         num_columns = len(numerical_columns)
         plot_columns = st.columns(num_columns)
 
+        trip_key = (data.source_key(data.MASTER_PATH), tuple(trips))
+        trip_hist = density.trips_histograms(trips)
         for i, column in enumerate(numerical_columns):
             with plot_columns[i]:
-                fig, ax = plt.subplots(figsize=(5, 4))
-                sns.histplot(df_CombinedTripData[column], bins=30, kde=True, stat='density', ax=ax)
-                ax.set_title(f"Histogram and KDE for {column}")
-                ax.set_xlabel(column)
-                ax.set_ylabel('Density')
-                st.pyplot(fig)
+                fig = density_figure(trip_hist, trip_summary, trip_key, column)
+                instrument.plotly_chart(fig, "eda.trip_histogram", use_container_width=True)
 
         # Correlation Matrix and Pairwise Scatter Plots
         st.write("### Correlation Matrix and Pairwise Scatter Plots")
         col_corr, col_scatter = st.columns(2)
 
+        corr_fig, pair_png = pair_views(
+            trip_summary, (data.source_key(data.MASTER_PATH), tuple(trips)), tuple(numerical_columns)
+        )
+
         # Correlation Matrix
         with col_corr:
-            correlation_matrix = df_CombinedTripData[numerical_columns].corr()
-            plt.figure(figsize=(10, 6))
-            sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt=".2f", linewidths=.5)
-            plt.title("Correlation Matrix")
-            st.pyplot(plt)
+            instrument.plotly_chart(corr_fig, "eda.trip_corr", use_container_width=True)
 
-        # Pairwise Scatter Plots
+        # Pairwise density panels (2D histograms of a fixed-size row sample)
         with col_scatter:
-            if len(numerical_columns) <= 10:  # Limit for reasonable performance
-                pair_plot_fig = sns.pairplot(df_CombinedTripData[numerical_columns])
-                st.pyplot(pair_plot_fig)
-            else:
-                st.write("### Pairwise scatter plots are only displayed for up to 10 selected columns.")
+            instrument.image(pair_png, "eda.trip_pairs", use_column_width=True)
     else:
         st.write("### No numerical columns selected for visualization.")
 else:
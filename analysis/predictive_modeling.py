@@ -0,0 +1,118 @@
+import time
+
+import streamlit as st
+
+from core import data, instrument, modeling, plotting, preprocessing, timeseries, widgets
+
+st.title("Predictive Modeling")
+
+task = st.radio("Model", ["Sales forecasting", "SoC prediction"], horizontal=True, key="pm_task")
+
+if task == "Sales forecasting":
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        level = st.selectbox("Granularity", list(timeseries.ORDER_LEVELS), index=1, key="pm_level")
+    with col2:
+        by = st.selectbox("Series per", ["None"] + timeseries.ORDER_DIMS, index=3, key="pm_by")
+    test_periods = 12
+    # Training needs at least one lag window plus a target before the held-out periods
+    max_lags = max(min(52, len(modeling.sales_frame(level, None if by == "None" else by)) - test_periods - 1), 1)
+    if st.session_state.get("pm_lags", 0) > max_lags:
+        st.session_state.pm_lags = max_lags
+    with col3:
+        lags = st.number_input("Lags", min_value=1, max_value=max_lags, value=min(8, max_lags), key="pm_lags")
+    with col4:
+        alpha = st.number_input("Ridge alpha", min_value=0.0, value=1.0, key="pm_sales_alpha")
+    params = {
+        "level": level, "by": None if by == "None" else by, "lags": int(lags),
+        "alpha": float(alpha), "test_periods": test_periods,
+    }
+    task_id = "sales"
+else:
+    trips = widgets.trip_window(key="pm_trips")
+    channels = [c for c in data.partition_master()["columns"] if c != data.TRIP_COLUMN]
+    soc = [c for c in channels if "soc" in c.lower()]
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        target = st.selectbox("Target", channels, index=channels.index(soc[0]) if soc else 0, key="pm_target")
+        alpha = st.number_input("Ridge alpha", min_value=0.0, value=1.0, key="pm_soc_alpha")
+        # Same pipeline settings (and cached output) as the Data Preprocessing page
+        preprocess = st.checkbox("Preprocess features", key="pm_preprocess")
+    with col2:
+        candidates = [c for c in channels if c != target]
+        # SoC channels can still be added by hand, but are not inputs by default
+        features = st.multiselect(
+            "Features", candidates, default=modeling.default_soc_features(channels, target), key="pm_features"
+        )
+    if not features:
+        st.write("### No features selected.")
+        st.stop()
+    params = {"target": target, "features": features, "alpha": float(alpha), "trips": list(trips)}
+    if preprocess:
+        params["preprocess"] = dict(st.session_state.get("preprocessing", preprocessing.DEFAULT_SETTINGS))
+    task_id = "soc"
+
+key = modeling.model_key(task_id, params)
+trained = modeling.cached_model(key)
+
+if trained is None:
+    job = modeling.job(key)
+    if job is None:
+        st.info("No model has been trained with these settings on the current data yet.")
+        if st.button("Train model", type="primary"):
+            modeling.submit(task_id, params)
+            st.rerun()
+    elif not job.done():
+        # Poll the background job without blocking the rest of the page
+        @st.fragment(run_every=1)
+        def training_status():
+            if modeling.job(key).done():
+                st.rerun()
+            st.info("Training in the background...")
+
+        training_status()
+    else:
+        st.error(f"Training failed: {job.exception()}")
+        if st.button("Retry"):
+            modeling.submit(task_id, params)
+            st.rerun()
+    st.stop()
+
+trained_at = time.strftime("%d/%m/%Y %H:%M", time.localtime(trained.trained_at))
+st.caption(f"Trained on {trained.rows:,} rows in {trained.seconds:.1f} s ({trained_at})")
+metric_columns = st.columns(3)
+for col, name in zip(metric_columns, ["MAE", "RMSE", "R2"]):
+    col.metric(name, f"{trained.metrics.get(name, float('nan')):,.3f}")
+
+with st.expander("Coefficients"):
+    st.dataframe(trained.coefficients(), use_container_width=True)
+
+# Plotly is only needed once there is a trained model to draw
+import plotly.graph_objects as go
+
+if task_id == "sales":
+    frame = modeling.sales_frame(level, params["by"])
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        series_name = st.selectbox("Series", list(frame.columns), key="pm_series")
+    with col2:
+        horizon = st.number_input("Forecast periods", min_value=1, max_value=104, value=12, key="pm_horizon")
+    history = frame[series_name]
+    forecast = modeling.forecast_sales(trained, history, int(horizon))
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=history.index, y=history, mode="lines", name="Sales"))
+    fig.add_trace(go.Scatter(x=forecast.index, y=forecast, mode="lines", name="Forecast"))
+    fig.update_layout(height=450, margin={"t": 20})
+    instrument.plotly_chart(fig, "predictive_modeling.forecast", use_container_width=True)
+else:
+    _, held_out = modeling.split_trips(params["trips"])
+    trip = st.selectbox("Trip", params["trips"], index=params["trips"].index(held_out[0]) if held_out else 0,
+                        key="pm_trip")
+    st.caption("Held out from training" if trip in held_out else "Used for training")
+    result = modeling.predict_trip(trained, trip)
+    fig = go.Figure()
+    for column in result.columns:
+        idx, values = plotting.decimate(result[column].to_numpy(), 1200)
+        fig.add_trace(go.Scatter(x=result.index[idx], y=values, mode="lines", name=column))
+    fig.update_layout(height=450, margin={"t": 20}, xaxis_title=data.TIME_COLUMN, yaxis_title=params["target"])
+    instrument.plotly_chart(fig, "predictive_modeling.trip", use_container_width=True)
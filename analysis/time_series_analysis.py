@@ -0,0 +1,81 @@
+import streamlit as st
+import pandas as pd
+
+from core import data, instrument, timeseries, widgets
+
+st.title("Time-Series Analysis")
+
+dataset = st.radio("Dataset", ["Orders (train.csv)", "Trip data"], horizontal=True, key="ts_dataset")
+
+if dataset == "Orders (train.csv)":
+    # All queries below read the precomputed day/week/month rollups
+    first, last = timeseries.order_range()
+    start, end = st.slider(
+        "Date range", min_value=first.date(), max_value=last.date(),
+        value=(first.date(), last.date()), format="DD/MM/YYYY", key="ts_dates",
+    )
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        granularity = st.selectbox(
+            "Granularity", ["Auto"] + list(timeseries.PERIOD_DAYS), key="ts_order_granularity"
+        )
+    with col2:
+        measure = st.selectbox("Measure", list(timeseries.ORDER_MEASURES), key="ts_measure")
+    with col3:
+        by = st.selectbox("Split by", ["None"] + timeseries.ORDER_DIMS, key="ts_by")
+
+    filter_columns = st.columns(len(timeseries.ORDER_DIMS))
+    filters = {}
+    day_rollup = timeseries.order_rollup("Day")
+    for col, dim in zip(filter_columns, timeseries.ORDER_DIMS):
+        with col:
+            filters[dim] = st.multiselect(dim, sorted(day_rollup[dim].unique()), key=f"ts_filter_{dim}")
+
+    level = timeseries.auto_level(pd.Timestamp(start), pd.Timestamp(end)) if granularity == "Auto" else granularity
+    series = timeseries.order_series(
+        level, start, end, measure=measure, by=None if by == "None" else by, filters=filters
+    )
+    st.caption(f"{level} level, {len(series):,} periods")
+    import plotly.express as px
+
+    fig = px.line(series, labels={"value": measure, "variable": by if by != "None" else ""})
+    fig.update_layout(height=450, margin={"t": 20})
+    instrument.plotly_chart(fig, "time_series.orders", use_container_width=True)
+
+else:
+    trips = widgets.trip_window(key="ts_trips")
+    channels = [c for c in data.partition_master()["columns"] if c not in (data.TIME_COLUMN, data.TRIP_COLUMN)]
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        selected = st.multiselect("Channels", channels, default=channels[:1], key="ts_channels")
+    with col2:
+        granularity = st.selectbox("Granularity", ["Auto"] + list(timeseries.TRIP_LEVELS), key="ts_trip_granularity")
+
+    if selected:
+        if granularity == "Auto":
+            level = timeseries.auto_trip_level(timeseries.trip_duration(trips))
+        else:
+            level = granularity
+        series = timeseries.trip_series(trips, level, selected)
+        st.caption(f"{level} bins, {len(series):,} points")
+
+        import plotly.graph_objects as go
+
+        fig = go.Figure()
+        for channel in selected:
+            if len(selected) == 1:
+                # Min/max band around the mean for a single channel
+                fig.add_trace(go.Scatter(
+                    x=series.index, y=series[f"{channel} (max)"], line={"width": 0}, showlegend=False,
+                ))
+                fig.add_trace(go.Scatter(
+                    x=series.index, y=series[f"{channel} (min)"], line={"width": 0}, fill="tonexty",
+                    name="min/max",
+                ))
+            fig.add_trace(go.Scatter(x=series.index, y=series[channel], mode="lines", name=channel))
+        fig.update_layout(height=450, margin={"t": 20}, xaxis_title="Elapsed [s]")
+        instrument.plotly_chart(fig, "time_series.trips", use_container_width=True)
+    else:
+        st.write("### No channels selected.")
@@ -0,0 +1,66 @@
+import streamlit as st
+import pandas as pd
+
+from core import data, decomposition, instrument, timeseries, widgets
+
+st.title("Trend & Cycle Analysis")
+
+
+def components_figure(series, components):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(rows=4, cols=1, shared_xaxes=True, vertical_spacing=0.04,
+                        subplot_titles=["Observed", "Trend", "Cycle", "Residual"])
+    for row, values in enumerate([series, components["trend"], components["seasonal"], components["resid"]], 1):
+        fig.add_trace(go.Scatter(x=components.index, y=values, mode="lines", showlegend=False), row=row, col=1)
+    fig.update_layout(height=700, margin={"t": 40})
+    return fig
+
+
+def summary_table(results, unit):
+    return pd.DataFrame(
+        [(name, period, strength) for name, (_, period, strength) in results.items()],
+        columns=["Series", f"Cycle length [{unit}]", "Cycle strength"],
+    ).sort_values("Cycle strength", ascending=False)
+
+
+dataset = st.radio("Dataset", ["Orders (train.csv)", "Trip data"], horizontal=True, key="tc_dataset")
+
+if dataset == "Orders (train.csv)":
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        by = st.selectbox("Series per", timeseries.ORDER_DIMS[::-1], key="tc_by")
+    with col2:
+        level = st.selectbox("Granularity", ["Week", "Month"], key="tc_level")
+    with col3:
+        measure = st.selectbox("Measure", list(timeseries.ORDER_MEASURES), key="tc_measure")
+
+    first, last = timeseries.order_range()
+    frame = timeseries.order_series(level, first, last, measure=measure, by=by)
+    # Every series is decomposed in one vectorized batch
+    results = decomposition.decompose_frame(frame)
+    unit = level.lower() + "s"
+else:
+    trips = widgets.trip_window(key="tc_trips")
+    channels = [c for c in data.partition_master()["columns"] if c not in (data.TIME_COLUMN, data.TRIP_COLUMN)]
+    soc = [c for c in channels if "soc" in c.lower()]
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        channel = st.selectbox("Channel", channels, index=channels.index(soc[0]) if soc else 0, key="tc_channel")
+    with col2:
+        level = st.selectbox("Granularity", list(timeseries.TRIP_LEVELS), index=1, key="tc_trip_level")
+
+    frame = timeseries.trip_matrix(trips, level, channel)
+    results = decomposition.decompose_frame(frame)
+    unit = f"× {level}"
+
+st.write(f"### {len(results):,} series")
+st.dataframe(summary_table(results, unit), hide_index=True, use_container_width=True)
+
+name = st.selectbox("Series", list(results), key="tc_series")
+if name is not None:
+    components, period, strength = results[name]
+    st.caption(f"Cycle length {period} {unit}, {strength:.0%} of detrended variance")
+    instrument.plotly_chart(components_figure(frame[name], components), "trend_cycle.components", use_container_width=True)
@@ -0,0 +1,5 @@
+"""Synthetic data generator and page benchmarks.
+
+    python -m benchmarks.generate --rows 1000000 --out /tmp/bench-data
+    python -m benchmarks.run --data /tmp/bench-data --out benchmarks/results/1m.json
+"""
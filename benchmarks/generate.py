@@ -0,0 +1,198 @@
+"""Synthetic datasets shaped like the measurement data, at any scale.
+
+Writes ``CombinedTripData_utf8.csv`` (``Time [s]`` restarting at 0 for
+every trip, followed by up to 48 channels named after the real logger
+channels) and ``Overview.xlsx`` (one row per trip, with the unnamed and
+note columns the loader drops). The CSV is written in chunks of
+``chunk_rows``, so 100M rows never need more memory than one chunk.
+
+Signals are smooth per-trip sinusoids plus noise, with SoC falling over
+each trip; every value is a function of the row position and the seed, so
+the same arguments always produce the same files.
+
+    python -m benchmarks.generate --rows 10000000 --trips 50 --out /tmp/bench-data
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+
+MASTER_NAME = "CombinedTripData_utf8.csv"
+OVERVIEW_NAME = "Overview.xlsx"
+TIME_COLUMN = "Time [s]"
+SAMPLE_SECONDS = 0.1
+
+CHANNELS = [
+    "Velocity [km/h]", "Elevation [m]", "Throttle [%]", "Motor Torque [Nm]",
+    "Longitudinal Acceleration [m/s^2]", "Regenerative Braking Signal", "Battery Voltage [V]",
+    "Battery Current [A]", "Battery Temperature [°C]", "max. Battery Temperature [°C]", "SoC [%]",
+    "displayed SoC [%]", "min. SoC [%]", "max. SoC [%]", "Heating Power CAN [kW]",
+    "Heating Power LIN [W]", "Requested Heating Power [W]", "AirCon Power [kW]", "Heater Signal",
+    "Heater Voltage [V]", "Heater Current [A]", "Ambient Temperature [°C]",
+    "Ambient Temperature Sensor [°C]", "Coolant Temperature Heatercore [°C]",
+    "Requested Coolant Temperature [°C]", "Coolant Temperature Inlet [°C]",
+    "Heat Exchanger Temperature [°C]", "Cabin Temperature Sensor [°C]",
+    "Coolant Volume Flow +500 [l/h]", "Temperature Coolant Outlet [°C]",
+    "Temperature Vent right [°C]", "Temperature Vent central right [°C]",
+    "Temperature Vent central left [°C]", "Temperature Vent left [°C]",
+    "Temperature Footweel Driver [°C]", "Temperature Footweel Co-Driver [°C]",
+    "Temperature Feetvent Co-Driver [°C]", "Temperature Feetvent Driver [°C]",
+    "Temperature Head Co-Driver [°C]", "Temperature Head Driver [°C]",
+    "Temperature Defrost lateral left [°C]", "Temperature Defrost lateral right [°C]",
+    "Temperature Defrost central [°C]", "Temperature Defrost central left [°C]",
+    "Temperature Defrost central right [°C]", "AirCon Pressure [bar]", "Compressor Speed [rpm]",
+    "Blower Voltage [V]",
+]
+# (base, amplitude, noise) per channel; the rest use GENERIC
+SIGNALS = {
+    "Velocity [km/h]": (45.0, 40.0, 2.0),
+    "Elevation [m]": (520.0, 30.0, 0.5),
+    "Throttle [%]": (30.0, 30.0, 5.0),
+    "Motor Torque [Nm]": (60.0, 90.0, 10.0),
+    "Battery Voltage [V]": (375.0, 12.0, 0.8),
+    "Battery Current [A]": (-20.0, 60.0, 8.0),
+    "Battery Temperature [°C]": (24.0, 4.0, 0.1),
+    "max. Battery Temperature [°C]": (26.0, 4.0, 0.1),
+    "Compressor Speed [rpm]": (2500.0, 2000.0, 50.0),
+    "Coolant Volume Flow +500 [l/h]": (600.0, 150.0, 10.0),
+}
+GENERIC = (20.0, 5.0, 0.2)
+BINARY = ("Regenerative Braking Signal", "Heater Signal")
+ROUTES = ["Munich East", "Munich North", "FTMRoute", "Highway", "Munich City"]
+WEATHER = ["sunny", "cloudy", "rainy", "slightly cloudy", "dark"]
+
+
+def channel_names(channels):
+    """The first ``channels`` real channel names, then ``Channel NN``."""
+    extra = [f"Channel {i + 1:02d}" for i in range(len(CHANNELS), channels)]
+    return (CHANNELS + extra)[:channels]
+
+
+def trip_rows(rows, trips):
+    """Rows per trip; the remainder goes to the first trips."""
+    per_trip = np.full(trips, rows // trips, dtype=np.int64)
+    per_trip[:rows % trips] += 1
+    return per_trip
+
+
+class TripSignals:
+    """Deterministic channel values for any slice of the combined rows."""
+
+    def __init__(self, rows, trips, names, seed=0, missing=0.0):
+        rng = np.random.default_rng(seed)
+        self.names = names
+        self.missing = missing
+        self.seed = seed
+        self.rows = trip_rows(rows, trips)
+        self.starts = np.concatenate([[0], np.cumsum(self.rows)[:-1]])
+        specs = np.array([SIGNALS.get(n, GENERIC) for n in names], dtype=np.float64).reshape(-1, 3)
+        self.base, self.amplitude, self.noise = specs.T
+        self.period = rng.uniform(60.0, 3600.0, len(names))
+        self.phase = rng.uniform(0.0, 2 * np.pi, (trips, len(names)))
+        self.offset = rng.normal(0.0, 1.0, (trips, len(names))) * self.amplitude * 0.2
+        self.soc_start = rng.uniform(70.0, 95.0, trips)
+        self.soc_drop = rng.uniform(5.0, 40.0, trips)
+        self.soc = np.array(["soc" in n.lower() for n in names])
+        self.binary = np.isin(names, BINARY)
+
+    def chunk(self, lo, hi):
+        """``(time, values)`` for rows ``lo:hi``; values are float32, one column per channel."""
+        g = np.arange(lo, hi, dtype=np.int64)
+        trip = np.searchsorted(self.starts, g, side="right") - 1
+        local = g - self.starts[trip]
+        t = local * SAMPLE_SECONDS
+        angle = 2 * np.pi * t[:, None] / self.period + self.phase[trip]
+        rng = np.random.default_rng((self.seed, lo))
+        X = np.sin(angle).astype(np.float32)
+        X *= self.amplitude.astype(np.float32)
+        X += (self.base + self.offset[trip]).astype(np.float32)
+        X += rng.standard_normal(X.shape, dtype=np.float32) * self.noise.astype(np.float32)
+        if self.soc.any():
+            fraction = local / np.maximum(self.rows[trip] - 1, 1)
+            soc = self.soc_start[trip] - self.soc_drop[trip] * fraction
+            X[:, self.soc] = (soc[:, None] + X[:, self.soc] * 0.01).astype(np.float32)
+        X[:, self.binary] = X[:, self.binary] > self.base[self.binary]
+        if self.missing:
+            X[rng.random(X.shape) < self.missing] = np.nan
+        return t, X
+
+
+def write_master(path, signals, chunk_rows=1_000_000):
+    """Stream the combined trip CSV to ``path`` one chunk at a time."""
+    total = int(signals.rows.sum())
+    schema = pa.schema([(TIME_COLUMN, pa.float64())] + [(n, pa.float32()) for n in signals.names])
+    with pv.CSVWriter(str(path), schema) as writer:
+        for lo in range(0, total, chunk_rows):
+            t, X = signals.chunk(lo, min(lo + chunk_rows, total))
+            arrays = [pa.array(t)] + [pa.array(X[:, i], from_pandas=True) for i in range(X.shape[1])]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+def overview_frame(rows, seed=0):
+    """Overview-sheet rows; the loader drops ``Unnamed: 13`` and ``Note`` and then any row with gaps."""
+    rng = np.random.default_rng((seed, rows))
+    battery_start = rng.uniform(5.0, 30.0, rows).round(0)
+    soc_start = rng.uniform(0.5, 0.95, rows).round(3)
+    soc_end = (soc_start - rng.uniform(0.02, 0.3, rows)).round(3)
+    dates = pd.Timestamp("2019-06-25 08:00") + pd.to_timedelta(np.arange(rows) * 7.3, unit="h")
+    return pd.DataFrame({
+        "Trip": [f"TripA{i + 1:02d}" for i in range(rows)],
+        "Date": dates.strftime("%Y-%m-%d_%H-%M-%S"),
+        "Route/Area": rng.choice(ROUTES, rows),
+        "Weather": rng.choice(WEATHER, rows),
+        "Battery Temperature (Start) [°C]": battery_start,
+        "Battery Temperature (End)": battery_start + rng.integers(0, 6, rows),
+        "Battery State of Charge (Start)": soc_start,
+        "Battery State of Charge (End)": soc_end,
+        "Unnamed: 8": (soc_start - soc_end).round(3),
+        "Ambient Temperature (Start) [°C]": rng.uniform(-5.0, 35.0, rows).round(1),
+        "Target Cabin Temperature": rng.choice([20.0, 21.0, 22.0, 23.0, 27.0], rows),
+        "Distance [km]": rng.uniform(2.0, 60.0, rows),
+        "Duration [min]": rng.uniform(5.0, 70.0, rows).round(2),
+        "Unnamed: 13": np.nan,
+        "Fan": rng.choice(["Automatic, Level 1", "Automatic, Level 2", "Manual, Level 3"], rows),
+        "Note": np.where(rng.random(rows) < 0.2, "Target Cabin Temperature changed ", None),
+    })
+
+
+def generate(out, rows, trips=None, channels=len(CHANNELS), overview_rows=None, seed=0,
+             missing=0.0, chunk_rows=1_000_000):
+    """Write both files to ``out``; returns their paths."""
+    trips = trips or max(1, min(rows // 20_000, 1000))
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    signals = TripSignals(rows, trips, channel_names(channels), seed, missing)
+    master = out / MASTER_NAME
+    write_master(master, signals, chunk_rows)
+    overview = out / OVERVIEW_NAME
+    overview_frame(overview_rows or trips, seed).to_excel(overview, index=False)
+    return master, overview
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=float, default=1e6, help="trip samples in total (e.g. 1e5, 1e8)")
+    parser.add_argument("--trips", type=int, default=None, help="default: one per 20,000 rows, at most 1000")
+    parser.add_argument("--channels", type=int, default=len(CHANNELS))
+    parser.add_argument("--overview-rows", type=int, default=None, help="default: one per trip")
+    parser.add_argument("--missing", type=float, default=0.0, help="fraction of channel values left empty")
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    master, overview = generate(
+        args.out, int(args.rows), args.trips, args.channels, args.overview_rows, args.seed,
+        args.missing, args.chunk_rows,
+    )
+    print(f"{master} ({master.stat().st_size / 2**20:,.1f} MB), {overview} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
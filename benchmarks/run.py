@@ -0,0 +1,284 @@
+"""Time the pages' hot paths on a dataset and record a JSON baseline.
+
+Two kinds of measurements are taken in one process:
+
+* steps: the shared calls the pages are built from (partitioning, loading,
+  describe, correlation, histograms, the signal plot grid, the alert
+  scan), called
+  directly, first with empty caches and then again warm;
+* pages: each page script run headlessly through Streamlit's ``AppTest``,
+  once after clearing the in-process caches (the on-disk Arrow, stats and
+  alert caches the steps built are kept) and then rerun.
+
+Every measurement records wall time, how far RSS rose above its starting
+point during the call (sampled in a background thread, Linux only) and
+the registry hits and misses during the call. With ``--baseline`` the result
+is compared against an earlier run and the exit status is 1 if anything
+got slower (or bigger) by more than ``--tolerance``.
+
+    python -m benchmarks.run --rows 1e6 --out benchmarks/results/1m.json
+    python -m benchmarks.run --data /tmp/bench-data --baseline benchmarks/results/1m.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks import generate
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = ["analysis/eda.py", "reports/alerts.py", "analysis/data_preprocessing.py", "reports/dashboard.py"]
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+# Plot width used for the decimated signal grid
+GRID_WIDTH_PX = 400
+STATM = Path("/proc/self/statm")
+# Seconds between RSS samples while a measurement runs
+RSS_INTERVAL = 0.005
+QUIET_LOGGERS = [
+    "streamlit.runtime.caching.cache_data_api",
+    "streamlit.runtime.scriptrunner_utils.script_run_context",
+]
+
+
+def rss_mb():
+    """Current resident set size, or None where ``/proc`` is not available."""
+    try:
+        pages = int(STATM.read_text().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class RssPeak:
+    """Highest RSS above the starting RSS while the ``with`` block runs.
+
+    ``ru_maxrss`` only ever grows over the life of the process, so it cannot
+    attribute memory to one step; a thread samples the current RSS instead.
+    """
+
+    def __init__(self, interval=RSS_INTERVAL):
+        self.interval = interval
+        self.start = self.peak = rss_mb()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def __enter__(self):
+        if self.start is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            self._done.set()
+            self._thread.join()
+            self.peak = max(self.peak, rss_mb())
+
+    @property
+    def mb(self):
+        return None if self.start is None else round(self.peak - self.start, 1)
+
+
+def measure(fn, registry):
+    """Run ``fn`` once; wall time, RSS growth and registry lookups during the call."""
+    before = registry.REGISTRY.stats()
+    with RssPeak() as rss:
+        started = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - started
+    after = registry.REGISTRY.stats()
+    hits, misses = after["hits"] - before["hits"], after["misses"] - before["misses"]
+    return result, {
+        "seconds": round(seconds, 4),
+        "peak_rss_mb": rss.mb,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+    }
+
+
+def warm(fn, registry, repeat):
+    """Median of ``repeat`` warm calls; lookups are summed and RSS growth is the largest."""
+    runs = [measure(fn, registry)[1] for _ in range(repeat)]
+    hits, misses = sum(r["hits"] for r in runs), sum(r["misses"] for r in runs)
+    peaks = [r["peak_rss_mb"] for r in runs if r["peak_rss_mb"] is not None]
+    return {
+        "seconds": round(statistics.median(r["seconds"] for r in runs), 4),
+        "peak_rss_mb": max(peaks) if peaks else None,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+    }
+
+
+def steps():
+    """``(name, fn)`` hot-path steps in dependency order; imported after the data paths are set."""
+    from core import anomaly, data, density, plotting, relations, stats
+
+    def all_trips():
+        return [t["trip"] for t in data.list_trips()]
+
+    def load():
+        data.load_overview()
+        return data.load_trips(all_trips()[:1])
+
+    def describe():
+        summary = stats.trips_summary(all_trips())
+        return summary.describe(summary.numeric_columns())
+
+    def corr():
+        summary = stats.trips_summary(all_trips())
+        return relations.corr_figure(summary.corr(summary.numeric_columns()))
+
+    def histograms():
+        summary = stats.trips_summary(all_trips())
+        hist = density.trips_histograms(all_trips())
+        return [density.histogram_figure(hist, summary, c, bins=30) for c in summary.numeric_columns()]
+
+    def plot_grid():
+        df = data.load_trips(all_trips()[:1])
+        points = {c: plotting.decimate(df[c].to_numpy(), GRID_WIDTH_PX) for c in df.columns}
+        return plotting.signal_grid(points).to_json()
+
+    return [
+        ("partition", data.partition_master),
+        ("load", load),
+        ("describe", describe),
+        ("corr", corr),
+        ("histograms", histograms),
+        ("plot grid", plot_grid),
+        ("alerts", anomaly.alert_table),
+    ]
+
+
+def run_page(page):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / page), default_timeout=3600)
+
+    def run():
+        at.run()
+        return [e.value for e in at.exception]
+    return run
+
+
+def benchmark(pages=PAGES, repeat=3):
+    """Measure every step and page against the data under ``MEASUREMENT_DATA_DIR``."""
+    import pandas as pd
+    import streamlit as st
+    from core import data, registry
+
+    # As in myapp.py, so registry frames are shared rather than copied
+    pd.set_option("mode.copy_on_write", True)
+    results = {"steps": {}, "pages": {}}
+    for name, fn in steps():
+        _, cold = measure(fn, registry)
+        results["steps"][name] = {"cold": cold, "warm": warm(fn, registry, repeat)}
+        print(f"  {name:<12} cold {cold['seconds']:>9.3f}s  warm {results['steps'][name]['warm']['seconds']:>9.3f}s")
+
+    for page in pages:
+        registry.REGISTRY.clear()
+        # Clearing outside a server logs bare-mode warnings; AppTest resets the levels on every run
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(logging.ERROR)
+        st.cache_data.clear()
+        run = run_page(page)
+        exceptions, cold = measure(run, registry)
+        results["pages"][page] = {"cold": cold, "warm": warm(run, registry, repeat), "exceptions": exceptions}
+        print(f"  {page:<32} cold {cold['seconds']:>9.3f}s  warm {results['pages'][page]['warm']['seconds']:>9.3f}s"
+              + (f"  exceptions: {exceptions}" if exceptions else ""))
+
+    manifest = data.partition_master()
+    results["meta"] = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "rows": sum(t["rows"] for t in manifest["trips"]),
+        "trips": len(manifest["trips"]),
+        "channels": len(manifest["columns"]) - 1,
+        "csv_mb": round(data.MASTER_PATH.stat().st_size / 2**20, 1),
+        "registry": registry.REGISTRY.stats(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+    return results
+
+
+def compare(current, baseline, tolerance=0.25, floor_seconds=0.05, floor_mb=16):
+    """Measurements that regressed against ``baseline``, as readable lines."""
+    regressions = []
+    for section in ("steps", "pages"):
+        for name, now in current[section].items():
+            before = baseline.get(section, {}).get(name)
+            if before is None:
+                continue
+            for phase in ("cold", "warm"):
+                new, old = now[phase], before[phase]
+                if new["seconds"] > old["seconds"] * (1 + tolerance) and new["seconds"] - old["seconds"] > floor_seconds:
+                    regressions.append(f"{name} ({phase}): {old['seconds']:.3f}s -> {new['seconds']:.3f}s")
+                if old["hit_rate"] is not None and new["hit_rate"] is not None and new["hit_rate"] < old["hit_rate"] - tolerance:
+                    regressions.append(f"{name} ({phase}): hit rate {old['hit_rate']} -> {new['hit_rate']}")
+            new_rss, old_rss = now["cold"]["peak_rss_mb"], before["cold"]["peak_rss_mb"]
+            if new_rss is not None and old_rss is not None and new_rss > old_rss * (1 + tolerance) + floor_mb:
+                regressions.append(f"{name}: RSS growth {old_rss:,.0f} MB -> {new_rss:,.0f} MB")
+    if current["meta"]["rows"] != baseline.get("meta", {}).get("rows"):
+        regressions.insert(0, f"note: baseline has {baseline.get('meta', {}).get('rows')} rows, "
+                              f"this run {current['meta']['rows']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", type=Path, help="directory with Overview.xlsx and the trip CSV")
+    parser.add_argument("--rows", type=float, default=1e6, help="generate this many rows when --data is not given")
+    parser.add_argument("--trips", type=int, default=None)
+    parser.add_argument("--channels", type=int, default=len(generate.CHANNELS))
+    parser.add_argument("--cache", type=Path, help="cache directory; default: a fresh temporary one (cold start)")
+    parser.add_argument("--pages", nargs="*", default=PAGES)
+    parser.add_argument("--repeat", type=int, default=3, help="warm runs per measurement (median)")
+    parser.add_argument("--out", type=Path, help="JSON result; default: benchmarks/results/<rows>.json")
+    parser.add_argument("--baseline", type=Path, help="earlier JSON result to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    scratch = Path(tempfile.mkdtemp(prefix="bench-"))
+    try:
+        data_dir = args.data
+        if data_dir is None:
+            data_dir = scratch / "data"
+            print(f"Generating {int(args.rows):,} rows x {args.channels} channels in {data_dir}")
+            generate.generate(data_dir, int(args.rows), args.trips, args.channels)
+        # core.data reads these at import time
+        os.environ["MEASUREMENT_DATA_DIR"] = str(data_dir.resolve())
+        os.environ["APP_CACHE_DIR"] = str((args.cache or scratch / "cache").resolve())
+        sys.path.insert(0, str(ROOT))
+        results = benchmark(args.pages, args.repeat)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    out = args.out or RESULTS_DIR / f"{results['meta']['rows']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=1))
+    print(f"Wrote {out} (RSS {rss_mb() or 0:,.0f} MB, registry hit rate {results['meta']['registry']['hit_rate']})")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}" if not line.startswith("note:") else line)
+        if any(not line.startswith("note:") for line in regressions):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared data, caching and computation helpers used by the Streamlit pages."""
@@ -0,0 +1,258 @@
+"""Alert detection over the trip partitions.
+
+Every numeric channel of a trip is checked at once, as columns of one 2D
+array, by three vectorized kernels:
+
+* threshold breaches against fixed ``LIMITS``;
+* rolling z-scores against the trailing ``window`` samples (cumulative
+  sums, so O(n) whatever the window) and robust MAD scores against the
+  median of each ``window``-sized block;
+* rate-of-change spikes, as sample-to-sample changes scaled by the trip's
+  typical (median absolute) change.
+
+Channels with fewer than ``RULES["levels"]`` distinct values (on/off
+signals such as "Heater Signal") are state channels, not measurements, and
+are not checked: every switch would look like an outlier.
+
+Consecutive flagged samples of one channel and kind become one event.
+Events are stored per trip partition under ``.cache/alerts``, keyed by the
+partition fingerprint and the rules, so only new or changed trips are
+scanned; the alert table over all trips is a concatenation of those files.
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core import data, instrument, registry
+
+ALERT_DIR = data.CACHE_DIR / "alerts"
+# Bump when a kernel changes so stored events are rescanned
+ALERT_VERSION = 2
+# Fixed (low, high) limits, matched case-insensitively against channel names
+LIMITS = {"battery temperature": (None, 45.0), "soc": (10.0, None)}
+RULES = {"window": 600, "zscore": 6.0, "mad": 8.0, "rate": 25.0, "critical": 2.0, "levels": 3}
+RATE_SAMPLE = 100_000
+KINDS = ["Threshold", "Z-score", "MAD", "Rate of change"]
+EVENT_COLUMNS = ["Trip", "Channel", "Kind", "Severity", "Start [s]", "End [s]", "Samples", "Peak", "Score"]
+EVENT_TYPES = {"Start [s]": "float64", "End [s]": "float64", "Samples": "int64", "Peak": "float64", "Score": "float64"}
+
+
+def _std(X):
+    return np.nanstd(X, axis=0) if np.isnan(X).any() else X.std(axis=0)
+
+
+def _median(a, axis):
+    # nanmedian is several times slower; only pay for it when NaNs are present
+    return np.nanmedian(a, axis=axis, keepdims=True) if np.isnan(a).any() else np.median(a, axis=axis, keepdims=True)
+
+
+def _trailing(cumulative, window):
+    """Sums over the previous ``window`` rows from a cumulative array with a leading zero row."""
+    n = len(cumulative) - 1
+    out = np.empty((n, cumulative.shape[1]))
+    head = min(window, n)
+    np.subtract(cumulative[:head], cumulative[0], out=out[:head])
+    np.subtract(cumulative[head:n], cumulative[:n - head], out=out[head:])
+    return out
+
+
+def distinct_at_least(values, n):
+    """Whether ``values`` holds at least ``n`` distinct non-NaN values (stops counting at ``n``)."""
+    values = values[~np.isnan(values)]
+    for _ in range(n):
+        if not len(values):
+            return False
+        values = values[values != values[0]]
+    return True
+
+
+def rolling_zscore(X, window, scale=None):
+    """|z| of each sample against the mean and std of the previous ``window`` samples.
+
+    ``scale`` is the per-column std of the whole trip, if already known.
+    """
+    n, d = X.shape
+    scale = _std(X) if scale is None else scale
+    missing = np.isnan(X)
+    has_nan = missing.any()
+    filled = X - (np.nanmean(X, axis=0) if has_nan else X.mean(axis=0))
+    cumulative = np.zeros((n + 1, d))
+    if has_nan:
+        filled[missing] = 0.0
+        np.cumsum(~missing, axis=0, out=cumulative[1:])
+        count = _trailing(cumulative, window)
+    else:
+        count = np.minimum(np.arange(n, dtype=np.float64), window)[:, None]
+    np.cumsum(filled, axis=0, out=cumulative[1:])
+    mean = _trailing(cumulative, window)
+    np.cumsum(filled * filled, axis=0, out=cumulative[1:])
+    var = _trailing(cumulative, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean /= count
+        var /= count
+        var -= mean * mean
+        np.maximum(var, 0, out=var)
+        std = np.sqrt(var, out=var)
+        # Flat windows (e.g. a quantized SoC) get a floor instead of a zero std
+        np.maximum(std, np.maximum(0.05 * scale, 1e-12), out=std)
+        z = np.abs(filled - mean, out=mean)
+        z /= std
+    z[np.broadcast_to(count < max(window // 10, 2), z.shape) | missing] = 0.0
+    return z
+
+
+def _block_mad(blocks, scale):
+    deviation = np.abs(blocks - _median(blocks, axis=1))
+    mad = 1.4826 * _median(deviation, axis=1)
+    np.maximum(mad, 0.05 * scale, out=mad)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        deviation /= mad
+    return deviation.reshape(-1, blocks.shape[2])
+
+
+def block_mad_score(X, window, scale=None):
+    """Robust score ``|x - median| / (1.4826 * MAD)`` with statistics per ``window`` block.
+
+    Computed in float32, which halves the cost of the block medians. A
+    shorter last block gets the statistics of its own samples.
+    """
+    n, d = X.shape
+    scale = _std(X) if scale is None else scale
+    full = n // window * window
+    score = np.empty((n, d), dtype=np.float32)
+    if full:
+        score[:full] = _block_mad(X[:full].astype(np.float32).reshape(-1, window, d), scale)
+    if full < n:
+        score[full:] = _block_mad(X[full:].astype(np.float32).reshape(1, n - full, d), scale)
+    return np.nan_to_num(score, copy=False)
+
+
+def rate_score(X, scale=None):
+    """Sample-to-sample change over the trip's median absolute change.
+
+    The median is taken over at most ``RATE_SAMPLE`` evenly strided changes.
+    """
+    scale = _std(X) if scale is None else scale
+    change = np.abs(np.diff(X, axis=0, prepend=X[:1]))
+    stride = max(len(change) // RATE_SAMPLE, 1)
+    typical = np.maximum(_median(change[::stride], axis=0), 0.01 * scale)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        change /= typical
+    return np.nan_to_num(change, copy=False)
+
+
+def limit_score(X, columns):
+    """How far each sample is past its channel's limit, relative to the limit (0 inside)."""
+    score = np.zeros_like(X)
+    for j, column in enumerate(columns):
+        for name, (low, high) in LIMITS.items():
+            if name not in column.lower():
+                continue
+            with np.errstate(invalid="ignore"):
+                if low is not None:
+                    score[:, j] = np.maximum(score[:, j], np.where(X[:, j] < low, 1 + (low - X[:, j]) / abs(low or 1), 0))
+                if high is not None:
+                    score[:, j] = np.maximum(score[:, j], np.where(X[:, j] > high, 1 + (X[:, j] - high) / abs(high or 1), 0))
+    return score
+
+
+def _events(score, threshold, X, times, columns, kind, critical):
+    """One row per run of consecutive samples with ``score >= threshold``."""
+    mask = score >= threshold
+    if not mask.any():
+        return pd.DataFrame(columns=EVENT_COLUMNS[1:])
+    # Run boundaries of every column at once, from the padded mask's edges
+    edges = np.diff(np.pad(mask, ((1, 1), (0, 0))).astype(np.int8), axis=0).T
+    cols, pos = np.nonzero(edges)
+    rising = edges[cols, pos] == 1
+    cols, starts, ends = cols[rising], pos[rising], pos[~rising]
+    lengths = ends - starts
+    # Row of every flagged sample, run after run, and the row of each run's peak
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    rows = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+    run = np.repeat(np.arange(len(starts)), lengths)
+    flagged_score = score[rows, cols[run]]
+    order = np.lexsort((-flagged_score, run))
+    peak = rows[order[offsets]]
+    peak_score = score[peak, cols]
+    return pd.DataFrame({
+        "Channel": np.asarray(columns, dtype=object)[cols],
+        "Kind": kind,
+        "Severity": np.where(peak_score >= critical * threshold, "Critical", "Warning"),
+        "Start [s]": times[starts],
+        "End [s]": times[ends - 1],
+        "Samples": lengths,
+        "Peak": X[peak, cols],
+        "Score": peak_score,
+    })
+
+
+def rules_key(rules=RULES, limits=LIMITS):
+    text = json.dumps([rules, limits, ALERT_VERSION], sort_keys=True)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+@instrument.timed(kind="stats")
+def scan(df, rules=RULES):
+    """Alert events of one trip frame (without the ``Trip`` column)."""
+    columns = [c for c in df.select_dtypes("number").columns if c != data.TIME_COLUMN]
+    X = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    # State channels (on/off signals) are skipped
+    keep = [j for j in range(len(columns)) if distinct_at_least(X[:, j], rules["levels"])]
+    columns, X = [columns[j] for j in keep], X[:, keep]
+    times = df[data.TIME_COLUMN].to_numpy(dtype=np.float64)
+    window, critical = rules["window"], rules["critical"]
+    scale = _std(X)
+    checks = [
+        ("Threshold", limit_score(X, columns), 1.0),
+        ("Z-score", rolling_zscore(X, window, scale), rules["zscore"]),
+        ("MAD", block_mad_score(X, window, scale), rules["mad"]),
+        ("Rate of change", rate_score(X, scale), rules["rate"]),
+    ]
+    frames = [_events(score, threshold, X, times, columns, kind, critical) for kind, score, threshold in checks]
+    return pd.concat([f for f in frames if len(f)] or frames[:1], ignore_index=True)
+
+
+def _load_trip_alerts(entry, path):
+    file = ALERT_DIR / f"{entry['fingerprint']}-{rules_key()}.arrow"
+    if not file.exists():
+        df = data.to_pandas(data.read_trip(entry["trip"], path))
+        events = scan(df).assign(Trip=entry["trip"])[EVENT_COLUMNS].astype(EVENT_TYPES)
+        data.write_table(pa.Table.from_pandas(events, preserve_index=False), file)
+    return data.to_pandas(data.read_table(file))
+
+
+def trip_alerts(entry, path=data.MASTER_PATH):
+    """Events of one trip partition, scanned once per fingerprint and rule set."""
+    key = ("alerts", entry["fingerprint"], rules_key())
+    return registry.get(key, lambda: _load_trip_alerts(entry, path))
+
+
+@instrument.timed(kind="stats")
+def alert_table(path=data.MASTER_PATH):
+    """Events of every trip, indexed by trip and start time; only new trips are scanned."""
+    entries = data.list_trips(path)
+
+    def build():
+        frames = [trip_alerts(e, path) for e in entries]
+        table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=EVENT_COLUMNS)
+        order = {e["trip"]: i for i, e in enumerate(entries)}
+        table = table.sort_values(["Trip", "Start [s]"], key=lambda s: s.map(order) if s.name == "Trip" else s)
+        for column in ("Trip", "Channel", "Kind", "Severity"):
+            table[column] = pd.Categorical(table[column])
+        return table.set_index(["Trip", "Start [s]"], drop=False).rename_axis(["trip", "start"])
+
+    key = ("alerts", "table", tuple(e["fingerprint"] for e in entries), rules_key())
+    return registry.get(key, build)
+
+
+def filter_alerts(table, trips=None, kinds=None, severities=None, channels=None):
+    """Rows of ``table`` matching every non-empty selection."""
+    keep = np.ones(len(table), dtype=bool)
+    for column, chosen in (("Trip", trips), ("Kind", kinds), ("Severity", severities), ("Channel", channels)):
+        if chosen:
+            keep &= table[column].isin(chosen).to_numpy()
+    return table[keep]
@@ -0,0 +1,346 @@
+"""Shared data access for the report and analysis pages.
+
+Every source file is converted once into a typed Arrow IPC file under
+``.cache/arrow`` and read back memory-mapped, so the pages share the same
+columns instead of each re-parsing the XLSX/CSV.
+
+The combined trip CSV can also be streamed in bounded chunks into one Arrow
+file per trip under ``.cache/trips``; pages then load a single trip or a
+window of trips without ever materializing the whole master file.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.ipc as ipc
+
+from core import instrument, registry
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = Path(os.environ.get("MEASUREMENT_DATA_DIR", ROOT / "Inputdata" / "MeasurementData"))
+CACHE_DIR = Path(os.environ.get("APP_CACHE_DIR", ROOT / ".cache"))
+
+OVERVIEW_PATH = DATA_DIR / "Overview.xlsx"
+MASTER_PATH = DATA_DIR / "CombinedTripData_utf8.csv"
+TRAIN_PATH = Path(os.environ.get("TRAIN_DATA", ROOT / "train" / "train.csv"))
+
+# Trip id column, if the CSV has one. Otherwise a new trip starts wherever the
+# time channel jumps backwards.
+TRIP_COLUMN = "Trip"
+TIME_COLUMN = "Time [s]"
+CHUNK_BYTES = 64 << 20
+# Trip files kept open while partitioning; a trip seen again after its file
+# was closed continues in an extra part that is merged in at the end
+MAX_OPEN_WRITERS = 64
+
+# Order/ship dates in train.csv are day-first (dd/mm/yyyy)
+ORDER_DATE_COLUMNS = ["Order Date", "Ship Date"]
+ORDER_DATE_FORMAT = "%d/%m/%Y"
+
+# Bump when a conversion changes so existing Arrow files are rebuilt
+FORMAT_VERSION = 3
+
+def source_key(path):
+    """Short fingerprint of a source file built from its path, mtime and size."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    raw = f"{path}|{stat.st_mtime_ns}|{stat.st_size}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_path(path, kind):
+    """Location of the Arrow file holding ``kind`` for the current version of ``path``."""
+    return CACHE_DIR / "arrow" / f"{Path(path).stem}-{kind}-v{FORMAT_VERSION}-{source_key(path)}.arrow"
+
+
+def write_table(table, dest):
+    """Write an uncompressed Arrow IPC file atomically so it can be memory-mapped."""
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, dest)
+
+
+def read_table(path):
+    """Memory-map an Arrow IPC file; the buffers keep the mapping alive."""
+    return ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def to_pandas(table):
+    # split_blocks lets single-chunk numeric columns without nulls point straight
+    # into the memory map instead of being consolidated into new blocks.
+    return table.to_pandas(split_blocks=True)
+
+
+def _convert_overview(path):
+    df = pd.read_excel(path)
+    df = df.drop(["Unnamed: 13", "Note"], axis=1)
+    df = df.dropna()
+    df = df.rename(columns={"Unnamed: 8": "SoC difference"})
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _convert_master(path):
+    table = pv.read_csv(path, read_options=pv.ReadOptions(encoding="utf-8"))
+    return table.combine_chunks()
+
+
+def _convert_orders(path):
+    # Dates are parsed once here, so every page gets real datetime columns
+    convert = pv.ConvertOptions(
+        column_types={c: pa.timestamp("s") for c in ORDER_DATE_COLUMNS},
+        timestamp_parsers=[ORDER_DATE_FORMAT],
+    )
+    table = pv.read_csv(path, read_options=pv.ReadOptions(encoding="utf-8"), convert_options=convert)
+    return table.combine_chunks()
+
+
+@instrument.timed(kind="load")
+def load_table(path, kind, convert):
+    """Return the cached Arrow table for ``path``, converting the source on first use."""
+    dest = cache_path(path, kind)
+    if not dest.exists():
+        write_table(convert(path), dest)
+    return read_table(dest)
+
+
+def load_frame(path, kind, convert):
+    """Return a view of the one shared DataFrame per source version and process."""
+    key = (kind, source_key(path))
+    # Drop frames of older source versions
+    registry.REGISTRY.discard(lambda k: k[0] == kind and k[1] != key[1])
+    return registry.get(key, lambda: to_pandas(load_table(path, kind, convert)))
+
+
+def load_overview():
+    """Cleaned battery overview sheet (one row per trip)."""
+    return load_frame(OVERVIEW_PATH, "overview", _convert_overview)
+
+
+def load_master():
+    """Combined per-sample trip data."""
+    return load_frame(MASTER_PATH, "master", _convert_master)
+
+
+def load_orders():
+    """Order history from train/train.csv."""
+    return load_frame(TRAIN_PATH, "orders", _convert_orders)
+
+
+def overview_table():
+    """Memory-mapped Arrow table behind ``load_overview``."""
+    return load_table(OVERVIEW_PATH, "overview", _convert_overview)
+
+
+def orders_table():
+    """Memory-mapped Arrow table behind ``load_orders``."""
+    return load_table(TRAIN_PATH, "orders", _convert_orders)
+
+
+def _downcast_schema(schema):
+    """float64 -> float32 and int64 -> int32 (the time channel keeps float64)."""
+    fields = []
+    for field in schema:
+        if field.name in (TIME_COLUMN, TRIP_COLUMN):
+            fields.append(field)
+        elif pa.types.is_float64(field.type):
+            fields.append(field.with_type(pa.float32()))
+        elif pa.types.is_int64(field.type):
+            fields.append(field.with_type(pa.int32()))
+        else:
+            fields.append(field)
+    return pa.schema(fields)
+
+
+def _column_types(path, chunk_bytes):
+    """Explicit CSV column types for streaming ``path``.
+
+    Types are inferred from the first block only, so numeric channels are
+    read as float64 throughout: a channel that is integral (or empty) in the
+    first block may carry decimals further down. The trip column stays text.
+    """
+    reader = pv.open_csv(path, read_options=pv.ReadOptions(encoding="utf-8", block_size=chunk_bytes))
+    inferred = reader.schema
+    reader.close()
+    types = {}
+    for field in inferred:
+        if field.name == TRIP_COLUMN:
+            types[field.name] = pa.string()
+        elif pa.types.is_integer(field.type) or pa.types.is_floating(field.type) or pa.types.is_null(field.type):
+            types[field.name] = pa.float64()
+        else:
+            types[field.name] = field.type
+    return types
+
+
+def _trip_labels(batch, state):
+    """Trip label per row of ``batch``; ``state`` carries the last trip across chunks."""
+    if TRIP_COLUMN in batch.schema.names:
+        return batch.column(TRIP_COLUMN).to_numpy(zero_copy_only=False).astype(str)
+    time = batch.column(TIME_COLUMN).to_numpy(zero_copy_only=False)
+    prev = np.concatenate([[state["last_time"]], time[:-1]])
+    trip = state["trip"] + np.cumsum(time < prev)
+    state["last_time"], state["trip"] = time[-1], int(trip[-1])
+    return np.char.add("Trip ", (trip + 1).astype(str))
+
+
+def fingerprint(table):
+    """Content hash of a table that does not depend on how it is chunked."""
+    h = hashlib.blake2b(digest_size=12)
+    for name, column in zip(table.column_names, table.columns):
+        h.update(name.encode("utf-8"))
+        h.update(pd.util.hash_array(column.to_numpy()).tobytes())
+    return h.hexdigest()
+
+
+# Serializes partitioning between sessions and the startup prewarm thread
+_PARTITION_LOCK = threading.Lock()
+# manifest.json path -> (mtime_ns, manifest, {trip: entry}); shared, never mutated
+_MANIFESTS = {}
+
+
+def partition_dir(path=MASTER_PATH):
+    return CACHE_DIR / "trips" / f"{Path(path).stem}-v{FORMAT_VERSION}-{source_key(path)}"
+
+
+def partition_master(path=MASTER_PATH, chunk_bytes=CHUNK_BYTES):
+    """Stream the combined trip CSV into one downcast Arrow file per trip.
+
+    Only one chunk of ``chunk_bytes`` is held in memory at a time, and at
+    most ``MAX_OPEN_WRITERS`` trip files are open at once. Returns the
+    manifest describing the partitions; an existing, complete partitioning
+    of the same source version is reused. Each trip also gets a content
+    fingerprint, so results derived from an unchanged trip stay valid when
+    new trips are appended to the CSV.
+    """
+    return _manifest(path, chunk_bytes)[0]
+
+
+def _manifest(path=MASTER_PATH, chunk_bytes=CHUNK_BYTES):
+    """The manifest and its entries by trip, parsed again only when the file changes."""
+    manifest_path = partition_dir(path) / "manifest.json"
+    if not manifest_path.exists():
+        with _PARTITION_LOCK:
+            if not manifest_path.exists():
+                _partition(path, manifest_path.parent, chunk_bytes)
+    mtime = manifest_path.stat().st_mtime_ns
+    cached = _MANIFESTS.get(manifest_path)
+    if cached is None or cached[0] != mtime:
+        manifest = json.loads(manifest_path.read_text())
+        cached = _MANIFESTS[manifest_path] = (mtime, manifest, {e["trip"]: e for e in manifest["trips"]})
+    return cached[1:]
+
+
+@instrument.timed("data.partition_master", kind="load")
+def _partition(path, dest, chunk_bytes):
+    tmp = dest.with_name(dest.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    reader = pv.open_csv(
+        path,
+        read_options=pv.ReadOptions(encoding="utf-8", block_size=chunk_bytes),
+        convert_options=pv.ConvertOptions(column_types=_column_types(path, chunk_bytes)),
+    )
+    schema = _downcast_schema(reader.schema)
+    # Open writers, least recently used first; trip -> part files
+    writers, parts, rows, order = OrderedDict(), {}, {}, []
+    state = {"last_time": -np.inf, "trip": 0}
+    try:
+        for batch in reader:
+            if batch.num_rows == 0:
+                continue
+            labels = _trip_labels(batch, state)
+            batch = batch.cast(schema)
+            # Rows of one trip are usually contiguous; split the chunk at label changes
+            cuts = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+            for lo, hi in zip(np.r_[0, cuts], np.r_[cuts, len(labels)]):
+                trip = str(labels[lo])
+                if trip not in rows:
+                    rows[trip], parts[trip] = 0, []
+                    order.append(trip)
+                if trip not in writers:
+                    if len(writers) >= MAX_OPEN_WRITERS:
+                        writers.popitem(last=False)[1].close()
+                    if parts[trip]:
+                        part = parts[trip][0].with_suffix(f".{len(parts[trip])}.arrow")
+                    else:
+                        part = tmp / f"{len(order) - 1:05d}.arrow"
+                    parts[trip].append(part)
+                    writers[trip] = ipc.new_file(str(part), schema)
+                writers.move_to_end(trip)
+                writers[trip].write_batch(batch.slice(lo, hi - lo))
+                rows[trip] += int(hi - lo)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    for trip, files in parts.items():
+        if len(files) > 1:
+            write_table(pa.concat_tables(read_table(f) for f in files), files[0])
+            for f in files[1:]:
+                f.unlink()
+
+    manifest = {
+        "source": str(Path(path).resolve()),
+        "key": source_key(path),
+        "columns": schema.names,
+        "trips": [
+            {
+                "trip": trip,
+                "file": f"{i:05d}.arrow",
+                "rows": rows[trip],
+                "fingerprint": fingerprint(read_table(tmp / f"{i:05d}.arrow")),
+            }
+            for i, trip in enumerate(order)
+        ],
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest, indent=1))
+    shutil.rmtree(dest, ignore_errors=True)
+    os.replace(tmp, dest)
+    return manifest
+
+
+def list_trips(path=MASTER_PATH):
+    """Trip partitions (``trip``, ``file``, ``rows``) in source order."""
+    return partition_master(path)["trips"]
+
+
+def read_trip(trip, path=MASTER_PATH, columns=None):
+    """Memory-mapped Arrow table for one trip."""
+    entry = _manifest(path)[1].get(trip)
+    if entry is None:
+        raise KeyError(f"Unknown trip: {trip}")
+    table = read_table(partition_dir(path) / entry["file"])
+    return table.select(columns) if columns is not None else table
+
+
+def iter_trips(trips=None, path=MASTER_PATH, columns=None):
+    """Lazily yield ``(trip, DataFrame)`` one partition at a time."""
+    wanted = None if trips is None else set(trips)
+    for entry in list_trips(path):
+        if wanted is None or entry["trip"] in wanted:
+            yield entry["trip"], to_pandas(read_trip(entry["trip"], path, columns))
+
+
+@instrument.timed(kind="load")
+def load_trips(trips, path=MASTER_PATH):
+    """One shared DataFrame holding just the given trips, in the order given."""
+    trips = tuple(trips)
+    if not trips:
+        return pd.DataFrame(columns=partition_master(path)["columns"])
+
+    def convert(source):
+        return pa.concat_tables(read_trip(t, source) for t in trips).combine_chunks()
+
+    key = ("trips", source_key(path), trips)
+    return registry.get(key, lambda: to_pandas(convert(path)))
@@ -0,0 +1,134 @@
+"""Batch trend / cycle / residual decomposition of many series at once.
+
+Series are rows of a 2D array (NaN-padded when lengths differ) and every
+step is vectorized across rows: centered moving-average trends from
+cumulative sums, the dominant cycle length from an FFT periodogram, and
+the seasonal profile as per-phase means via ``bincount``. Decomposing every
+State, Category or trip is a single pass, and results are cached per
+series in the shared registry.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from core import instrument, registry
+
+
+def moving_average(X, windows):
+    """Centered, NaN-aware moving average of each row with its own window length.
+
+    Windows shrink at the edges instead of producing NaN.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    m, T = X.shape
+    valid = ~np.isnan(X)
+    sums = np.zeros((m, T + 1))
+    counts = np.zeros((m, T + 1))
+    np.cumsum(np.where(valid, X, 0.0), axis=1, out=sums[:, 1:])
+    np.cumsum(valid, axis=1, out=counts[:, 1:])
+    half = (np.broadcast_to(np.asarray(windows), (m,)) // 2)[:, None]
+    t = np.arange(T)[None, :]
+    lo = np.clip(t - half, 0, T)
+    hi = np.clip(t + half + 1, 0, T)
+    total = np.take_along_axis(sums, hi, 1) - np.take_along_axis(sums, lo, 1)
+    n = np.take_along_axis(counts, hi, 1) - np.take_along_axis(counts, lo, 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, total / n, np.nan)
+
+
+def detect_period(X, min_period=2, max_period=None):
+    """Dominant cycle length per row from the periodogram, and its share of power."""
+    X = np.asarray(X, dtype=np.float64)
+    m, T = X.shape
+    max_period = max_period or T // 2
+    centered = X - np.nanmean(X, axis=1, keepdims=True)
+    power = np.abs(np.fft.rfft(np.nan_to_num(centered), axis=1)) ** 2
+    k = np.arange(power.shape[1])
+    with np.errstate(divide="ignore"):
+        periods = np.where(k > 0, T / np.maximum(k, 1), np.inf)
+    allowed = (periods >= min_period) & (periods <= max_period)
+    masked = np.where(allowed[None, :], power, -1.0)
+    best = masked.argmax(axis=1)
+    strength = masked[np.arange(m), best] / np.maximum(power[:, 1:].sum(axis=1), 1e-300)
+    period = np.where(allowed.any(), np.rint(periods[best]), 0).astype(np.int64)
+    return np.maximum(period, min_period), strength
+
+
+def seasonal_profile(D, periods):
+    """Per-row mean of ``D`` at each phase of its period, centered to zero mean."""
+    m, T = D.shape
+    width = int(periods.max())
+    phase = np.arange(T)[None, :] % periods[:, None]
+    flat = (np.arange(m)[:, None] * width + phase)
+    valid = ~np.isnan(D)
+    sums = np.bincount(flat[valid], weights=D[valid], minlength=m * width).reshape(m, width)
+    counts = np.bincount(flat[valid], minlength=m * width).reshape(m, width)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    in_period = np.arange(width)[None, :] < periods[:, None]
+    centre = np.nanmean(np.where(in_period, means, np.nan), axis=1, keepdims=True)
+    means = np.nan_to_num(means - centre)
+    return np.take_along_axis(means, phase, 1)
+
+
+def decompose(X, period=None, max_period=None):
+    """Decompose every row of ``X`` into trend, seasonal and residual arrays.
+
+    ``period`` fixes the cycle length for all rows; otherwise it is detected
+    per row after removing a broad trend.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    m, T = X.shape
+    if period is None:
+        broad = moving_average(X, max(T // 3, 3) | 1)
+        periods, strength = detect_period(X - broad, max_period=max_period)
+    else:
+        periods = np.full(m, int(period))
+        strength = np.full(m, np.nan)
+    trend = moving_average(X, periods | 1)
+    seasonal = seasonal_profile(X - trend, periods)
+    seasonal[np.isnan(X)] = np.nan
+    return {
+        "trend": trend,
+        "seasonal": seasonal,
+        "resid": X - trend - seasonal,
+        "period": periods,
+        "strength": strength,
+    }
+
+
+def _series_key(values, period, max_period):
+    h = hashlib.blake2b(np.ascontiguousarray(values, dtype=np.float64).tobytes(), digest_size=12)
+    h.update(repr((period, max_period)).encode("utf-8"))
+    return h.hexdigest()
+
+
+@instrument.timed(kind="stats")
+def decompose_frame(frame, period=None, max_period=None):
+    """Decompose every column of a wide frame; ``{column: (components, period, strength)}``.
+
+    Only columns whose values were never decomposed with these settings are
+    computed, in one batch; the rest come from the registry.
+    """
+    keys = {
+        c: ("decomposition", _series_key(frame[c].to_numpy(dtype=np.float64, na_value=np.nan), period, max_period))
+        for c in frame.columns
+    }
+    results = {}
+    missing = []
+    for column, key in keys.items():
+        cached = registry.REGISTRY.peek(key)
+        if cached is None:
+            missing.append(column)
+        else:
+            results[column] = cached
+    if missing:
+        out = decompose(frame[missing].to_numpy(dtype=np.float64, na_value=np.nan).T, period, max_period)
+        for i, column in enumerate(missing):
+            components = pd.DataFrame(
+                {name: out[name][i] for name in ("trend", "seasonal", "resid")}, index=frame.index
+            )
+            results[column] = (components, int(out["period"][i]), float(out["strength"][i]))
+            registry.REGISTRY.put(keys[column], results[column])
+    return {c: results[c] for c in frame.columns}
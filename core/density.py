@@ -0,0 +1,179 @@
+"""Precomputed histograms and FFT-binned kernel density estimates.
+
+Every partition is binned once onto a fine grid per numeric column, over
+the value range of the whole dataset, so partition histograms just add up.
+A trip selection's merged grid is then re-binned over the selection's own
+value range. Display histograms sum groups of grid cells, and the KDE is the grid
+convolved with a Gaussian kernel via FFT: O(grid log grid) per column
+instead of O(rows x grid).
+"""
+import hashlib
+
+import numpy as np
+
+from core import data, instrument, registry, stats
+
+DENSITY_DIR = data.CACHE_DIR / "density"
+# Fine grid cells per display bin
+OVERSAMPLE = 16
+
+
+class Histograms:
+    """Fine-grid counts of several columns over fixed ranges; merge by adding."""
+
+    def __init__(self, columns, ranges, grid):
+        self.columns = list(columns)
+        # Columns without any values get a dummy range
+        ranges = np.asarray(ranges, dtype=np.float64).reshape(-1, 2)
+        self.ranges = np.where(np.isfinite(ranges).all(axis=1, keepdims=True), ranges, [0.0, 1.0])
+        self.grid = grid
+        self.counts = np.zeros((len(self.columns), grid))
+
+    @classmethod
+    @instrument.timed(kind="stats")
+    def of(cls, df, columns, ranges, grid):
+        hist = cls(columns, ranges, grid)
+        for i, column in enumerate(hist.columns):
+            values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            lo, hi = hist.ranges[i]
+            width = hi - lo if hi > lo else 1.0
+            idx = np.clip(((values - lo) / width * grid).astype(np.int64), 0, grid - 1)
+            hist.counts[i] = np.bincount(idx, minlength=grid)
+        return hist
+
+    def merge(self, other):
+        self.counts = self.counts + other.counts
+        return self
+
+    def window(self, ranges):
+        """The same counts re-binned onto the full grid over narrower ``ranges``.
+
+        Each range is widened to the fine-cell edges around it; where a new
+        cell edge splits an old cell, its count is spread evenly over it.
+        """
+        ranges = np.asarray(ranges, dtype=np.float64).reshape(-1, 2)
+        out = Histograms(self.columns, self.ranges, self.grid)
+        out.counts = self.counts.copy()
+        for i, (lo, hi) in enumerate(self.ranges):
+            low, high = ranges[i]
+            if not (hi > lo and np.isfinite(low) and np.isfinite(high)):
+                continue
+            edges = np.linspace(lo, hi, self.grid + 1)
+            first = int(np.clip(np.searchsorted(edges, low, "right") - 1, 0, self.grid - 1))
+            last = int(np.clip(np.searchsorted(edges, high, "left"), first + 1, self.grid))
+            cumulative = np.concatenate([[0.0], np.cumsum(self.counts[i])])
+            new_edges = np.linspace(edges[first], edges[last], self.grid + 1)
+            out.counts[i] = np.diff(np.interp(new_edges, edges, cumulative))
+            out.ranges[i] = edges[first], edges[last]
+        return out
+
+    def column(self, column):
+        i = self.columns.index(column)
+        return self.counts[i], self.ranges[i]
+
+
+def kde(counts, lo, hi, bandwidth):
+    """Gaussian KDE evaluated at the grid centers by FFT convolution of the counts."""
+    grid = len(counts)
+    n = counts.sum()
+    dx = (hi - lo) / grid if hi > lo else 1.0
+    centers = lo + (np.arange(grid) + 0.5) * dx
+    if n == 0 or not bandwidth > 0:
+        return centers, np.zeros(grid)
+    half = int(min(np.ceil(4 * bandwidth / dx), grid))
+    offsets = np.arange(-half, half + 1) * dx
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    kernel /= kernel.sum()
+    size = 1 << int(np.ceil(np.log2(grid + 2 * half + 1)))
+    conv = np.fft.irfft(np.fft.rfft(counts, size) * np.fft.rfft(kernel, size), size)
+    return centers, np.maximum(conv[half:half + grid], 0) / (n * dx)
+
+
+def scott_bandwidth(moments):
+    """Scott's rule, as used by seaborn's default KDE."""
+    return moments.std * moments.count ** -0.2 if moments.count > 1 else np.nan
+
+
+@instrument.timed(kind="render")
+def histogram_figure(hist, summary, column, bins=30):
+    """Plotly histogram (density) with its KDE drawn from the precomputed counts."""
+    import plotly.graph_objects as go
+
+    counts, (lo, hi) = hist.column(column)
+    n = counts.sum()
+    coarse = counts.reshape(bins, -1).sum(axis=1)
+    edges = np.linspace(lo, hi, bins + 1)
+    width = edges[1] - edges[0] if hi > lo else 1.0
+    x, y = kde(counts, lo, hi, scott_bandwidth(summary.columns[column].moments))
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=coarse / max(n * width, 1e-12),
+        width=width, name="Histogram", marker_line_width=0, opacity=0.6,
+    ))
+    fig.add_trace(go.Scatter(x=x, y=y, mode="lines", name="KDE"))
+    fig.update_layout(
+        title=f"Histogram and KDE for {column}", xaxis_title=column, yaxis_title="Density",
+        showlegend=False, height=320, margin={"t": 40, "b": 30, "l": 30, "r": 10}, bargap=0,
+    )
+    return fig
+
+
+def _ranges_key(columns, ranges, grid):
+    raw = repr((list(columns), np.asarray(ranges).round(12).tolist(), grid))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+@instrument.timed(kind="stats")
+def frame_histograms(df, summary, key, bins=30):
+    """Histograms of a whole frame, kept in the shared registry under ``key`` and ``bins``."""
+    columns = summary.numeric_columns()
+    return registry.get(
+        ("histograms", key, bins),
+        lambda: Histograms.of(df, columns, summary.ranges(columns), bins * OVERSAMPLE),
+    )
+
+
+def _load_partition_histograms(entry, name, columns, ranges, grid, path):
+    cached = DENSITY_DIR / f"{name}.npy"
+    if cached.exists():
+        hist = Histograms(columns, ranges, grid)
+        hist.counts = np.load(cached)
+        return hist
+    df = data.to_pandas(data.read_trip(entry["trip"], path, columns))
+    hist = Histograms.of(df, columns, ranges, grid)
+    DENSITY_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = cached.with_suffix(".tmp.npy")
+    np.save(tmp, hist.counts)
+    tmp.replace(cached)
+    return hist
+
+
+def partition_histograms(entry, columns, ranges, grid, path=data.MASTER_PATH):
+    """Histograms of one trip partition, cached on disk by fingerprint and ranges."""
+    name = f"{entry['fingerprint']}-{_ranges_key(columns, ranges, grid)}"
+    return registry.get(
+        ("histograms", name),
+        lambda: _load_partition_histograms(entry, name, columns, ranges, grid, path),
+    )
+
+
+@instrument.timed(kind="stats")
+def trips_histograms(trips, bins=30, path=data.MASTER_PATH):
+    """Merged histograms of the given trips, re-binned over their own value range.
+
+    Partitions are binned over the range of all trips, which keeps their
+    histograms reusable across trip selections (it only changes when new
+    trips widen a column's range); the merged counts are then re-binned so
+    a narrow selection still gets ``bins`` display bins over its own data.
+    """
+    entries = data.list_trips(path)
+    everything = stats.trips_summary([e["trip"] for e in entries], path)
+    columns = everything.numeric_columns()
+    ranges = everything.ranges(columns)
+    wanted = set(trips)
+    merged = Histograms(columns, ranges, bins * OVERSAMPLE)
+    for entry in entries:
+        if entry["trip"] in wanted:
+            merged.merge(partition_histograms(entry, columns, ranges, bins * OVERSAMPLE, path))
+    return merged.window(stats.trips_summary(trips, path).ranges(columns))
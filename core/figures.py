@@ -0,0 +1,66 @@
+"""Cached, off-thread rendering of matplotlib charts to PNG.
+
+Charts are drawn on standalone ``matplotlib.figure.Figure`` objects (never
+pyplot, so no global figure state builds up) inside a bounded thread pool.
+The PNG bytes are memoized in the shared registry under a caller-supplied
+key such as ``(chart, data hash, theme, chart type)``; identical charts on
+a page are rendered once, and toggling back to a previous setting is a
+cache hit.
+
+The pool size is ``FIGURE_WORKERS`` (default 4). matplotlib is imported
+by the first render rather than with this module (see ``core.startup``).
+"""
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from core import instrument, registry
+
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("FIGURE_WORKERS", 4)), thread_name_prefix="figures"
+)
+
+
+def data_hash(df):
+    """Stable content hash of a DataFrame for use in figure keys."""
+    hashed = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    h = hashlib.blake2b(hashed.tobytes(), digest_size=12)
+    h.update(repr(list(df.columns)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _render(draw, args, figsize, facecolor, dpi):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize, facecolor=facecolor)
+    try:
+        draw(fig, *args)
+        buf = io.BytesIO()
+        # Same output settings st.pyplot uses
+        fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+        return buf.getvalue()
+    finally:
+        fig.clear()
+
+
+@instrument.timed(kind="render")
+def render_all(jobs, figsize=(6.4, 4.8), dpi=200):
+    """Render ``(key, draw, args, facecolor)`` jobs concurrently; PNG bytes in job order.
+
+    ``draw(fig, *args)`` fills the empty figure. Jobs sharing a key are
+    rendered once.
+    """
+    futures = {}
+    for key, draw, args, facecolor in jobs:
+        if key not in futures:
+            futures[key] = _EXECUTOR.submit(
+                registry.get, ("figure", key), lambda d=draw, a=args, f=facecolor: _render(d, a, figsize, f, dpi)
+            )
+    return [futures[key].result() for key, _, _, _ in jobs]
+
+
+def render(key, draw, args=(), facecolor="white", **kwargs):
+    return render_all([(key, draw, args, facecolor)], **kwargs)[0]
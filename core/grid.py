@@ -0,0 +1,154 @@
+"""Server-side filtered, sorted and paged table views.
+
+Large views are never handed to ``st.dataframe`` whole. A grid source is
+a ``(key, table)`` pair: an Arrow table over the memory-mapped partitions
+(a zero-copy concatenation, nothing is read until used) and a content key
+built from the partition fingerprints. Filters and the sort order are
+evaluated with ``pyarrow.compute`` into an array of row positions, which
+is cached in the registry per ``(source, filters, sort)`` query; paging
+through a result only takes the visible rows. Browser memory and the
+websocket payload are bounded by the page size, whatever the number of
+samples behind the view.
+"""
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+
+from core import data, instrument, preprocessing, registry
+
+PAGE_SIZES = [50, 100, 500, 1000]
+SOURCE_ORDER = "Source order"
+
+
+def trips_source(trips, settings=None, path=data.MASTER_PATH):
+    """Grid source over the given trips, or over their preprocessed copies under ``settings``."""
+    by_trip = {e["trip"]: e for e in data.list_trips(path)}
+    entries = [by_trip[t] for t in trips]
+    if settings is None:
+        tables = [data.read_table(data.partition_dir(path) / e["file"]) for e in entries]
+        key = ("trips",)
+    else:
+        pipeline = preprocessing.trip_pipeline(settings, path)
+        tables = [preprocessing.preprocessed_trip(e, pipeline, path) for e in entries]
+        key = ("preprocessed", pipeline.key)
+    return key + tuple(e["fingerprint"] for e in entries), pa.concat_tables(tables)
+
+
+def _mask(column, op, value):
+    if op == "between":
+        lo, hi = value
+        parts = []
+        if lo is not None:
+            parts.append(pc.greater_equal(column, lo))
+        if hi is not None:
+            parts.append(pc.less_equal(column, hi))
+        return reduce(pc.and_kleene, parts)
+    if op == "contains":
+        return pc.match_substring(pc.cast(column, pa.string()), value, ignore_case=True)
+    raise ValueError(f"Unknown filter: {op}")
+
+
+def _rows(table, filters, sort):
+    rows = None
+    if filters:
+        mask = reduce(pc.and_kleene, [_mask(table[c], op, v) for c, op, v in filters])
+        rows = np.flatnonzero(pc.fill_null(mask, False).to_numpy(zero_copy_only=False))
+    if sort:
+        # Only the sort columns of the filtered rows are gathered
+        keys = table.select([c for c, _ in sort])
+        if rows is not None:
+            keys = keys.take(pa.array(rows))
+        order = pc.sort_indices(keys, sort_keys=list(sort), null_placement="at_end").to_numpy()
+        rows = order if rows is None else rows[order]
+    return rows
+
+
+@instrument.timed(kind="stats")
+def query_rows(source, filters=(), sort=()):
+    """Row positions matching ``filters`` in ``sort`` order; None means every row in source order.
+
+    ``filters`` holds ``(column, "between", (lo, hi))`` and
+    ``(column, "contains", text)`` entries, ``sort`` ``(column, "ascending"
+    | "descending")`` pairs.
+    """
+    key, table = source
+    filters, sort = tuple(filters), tuple(sort)
+    if not filters and not sort:
+        return None
+    return registry.get(("grid", key, filters, sort), lambda: _rows(table, filters, sort))
+
+
+@instrument.timed(kind="load")
+def page(source, rows, start, size, columns=None):
+    """DataFrame of rows ``start:start + size`` of a query result, indexed by source row."""
+    _, table = source
+    if columns is not None:
+        table = table.select(columns)
+    if rows is None:
+        stop = min(start + size, table.num_rows)
+        window, index = table.slice(start, stop - start), np.arange(start, stop)
+    else:
+        index = rows[start:start + size]
+        window = table.take(pa.array(index))
+    df = data.to_pandas(window)
+    df.index = pd.Index(index, name="Row")
+    return df
+
+
+def data_grid(source, key, columns=None):
+    """Filter, sort and paging controls plus the visible page of ``source``."""
+    _, table = source
+    columns = [c for c in (columns or table.column_names) if c in table.column_names]
+    numeric = {
+        f.name for f in table.schema if pa.types.is_integer(f.type) or pa.types.is_floating(f.type)
+    }
+
+    filter_col, sort_col, order_col = st.columns([3, 2, 1])
+    with filter_col:
+        filter_columns = st.multiselect("Filter", columns, key=f"{key}_filter")
+    with sort_col:
+        sort_column = st.selectbox("Sort by", [SOURCE_ORDER] + columns, key=f"{key}_sort")
+    with order_col:
+        descending = st.toggle("Descending", key=f"{key}_descending", disabled=sort_column == SOURCE_ORDER)
+
+    filters = []
+    for column in filter_columns:
+        if column in numeric:
+            lo_col, hi_col = st.columns(2)
+            lo = lo_col.number_input(f"{column} from", value=None, key=f"{key}_min_{column}")
+            hi = hi_col.number_input(f"{column} to", value=None, key=f"{key}_max_{column}")
+            if lo is not None or hi is not None:
+                filters.append((column, "between", (lo, hi)))
+        else:
+            text = st.text_input(f"{column} contains", key=f"{key}_text_{column}")
+            if text:
+                filters.append((column, "contains", text))
+    sort = [] if sort_column == SOURCE_ORDER else [(sort_column, "descending" if descending else "ascending")]
+
+    rows = query_rows(source, filters, sort)
+    total = table.num_rows if rows is None else len(rows)
+
+    size_col, page_col, position_col = st.columns([1, 1, 3])
+    with size_col:
+        size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_size")
+    # A new query or page size starts at the first page
+    query = (source[0], tuple(filters), tuple(sort), size)
+    if st.session_state.get(f"{key}_query") != query:
+        st.session_state[f"{key}_query"] = query
+        st.session_state[f"{key}_page"] = 1
+    pages = max((total - 1) // size + 1, 1)
+    with page_col:
+        number = st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    start = (number - 1) * size
+
+    window = page(source, rows, start, size, columns)
+    with instrument.stage(f"{key}.page", "render") as handle:
+        handle.add_bytes(window.memory_usage(index=True).sum())
+        st.dataframe(window, use_container_width=True)
+    with position_col:
+        filtered = f" (filtered from {table.num_rows:,})" if rows is not None and filters else ""
+        st.caption(f"Rows {start + 1 if total else 0:,}-{start + len(window):,} of {total:,}{filtered}")
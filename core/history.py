@@ -0,0 +1,232 @@
+"""Persistent, append-only history of what users looked at.
+
+Every script run records the page, the session's widget selections and the
+registry keys the run read (its result fingerprints) into a SQLite
+database in WAL mode at ``.cache/history.sqlite``. Writes never happen on
+the script thread: ``record`` only puts the row on a queue, and a daemon
+writer thread commits queued rows in batches. Rows still waiting for their
+batch are kept in memory too, and readers list them next to the committed
+ones, so showing the history never waits for the writer.
+
+Reading is keyset-paginated on the primary key (and on ``(page, id)`` /
+``(session, id)`` indexes when filtering), so a page of history costs the
+same with a hundred or a million rows. Only the widgets the page itself
+created are recorded, so replaying an entry restores that page's
+selections and nothing of the app shell; since every cached output is keyed by content, the
+replayed run finds the same registry and disk cache entries it used before.
+"""
+import atexit
+import datetime
+import itertools
+import json
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from core import data, registry
+
+HISTORY_PATH = data.CACHE_DIR / "history.sqlite"
+BATCH_SIZE = 500
+FLUSH_SECONDS = 0.5
+# Session-state keys that are not page selections (instrument_ is the shell's timing toggle)
+IGNORED_PREFIXES = ("$$", "FormSubmitter", "history_", "logged_in", "instrument_")
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?")
+
+# page title -> st.Page, filled in by the app so entries can be replayed
+PAGES = {}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    session TEXT NOT NULL,
+    page TEXT NOT NULL,
+    state TEXT NOT NULL,
+    results TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_page ON history (page, id);
+CREATE INDEX IF NOT EXISTS history_session ON history (session, id);
+"""
+
+_QUEUE = queue.Queue()
+_WRITER = None
+_WRITER_LOCK = threading.Lock()
+# sequence number -> row, from ``record`` until the row is committed
+_PENDING = {}
+_PENDING_LOCK = threading.Lock()
+_SEQUENCE = itertools.count()
+
+
+def connect(path=HISTORY_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _write_loop():
+    conn = connect()
+    while True:
+        rows = [_QUEUE.get()]
+        deadline = time.monotonic() + FLUSH_SECONDS
+        while len(rows) < BATCH_SIZE:
+            try:
+                rows.append(_QUEUE.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        batch = [r for r in rows if r is not None]
+        if batch:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO history (ts, session, page, state, results) VALUES (?, ?, ?, ?, ?)",
+                    [row for _, row in batch],
+                )
+            with _PENDING_LOCK:
+                for seq, _ in batch:
+                    _PENDING.pop(seq, None)
+        for _ in rows:
+            _QUEUE.task_done()
+
+
+def _ensure_writer():
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is None:
+            _WRITER = threading.Thread(target=_write_loop, name="history-writer", daemon=True)
+            _WRITER.start()
+
+
+def flush():
+    """Block until every queued row is committed."""
+    if _WRITER is not None:
+        _QUEUE.join()
+
+
+atexit.register(flush)
+
+
+def widget_keys():
+    """User keys of the widgets created so far in the current script run."""
+    ctx = get_script_run_ctx()
+    return set(ctx.widget_user_keys_this_run) if ctx is not None else set()
+
+
+def _to_json(value):
+    """Dates and datetimes (e.g. date slider values) as ISO strings; other values unchanged."""
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    return value
+
+
+def _from_json(value):
+    """Inverse of ``_to_json`` for replaying: ISO date and datetime strings become objects again."""
+    if isinstance(value, list):
+        return [_from_json(v) for v in value]
+    if isinstance(value, str) and ISO_DATE.fullmatch(value):
+        parse = datetime.datetime.fromisoformat if "T" in value else datetime.date.fromisoformat
+        return parse(value)
+    return value
+
+
+def selections(session_state, keys=None):
+    """JSON-serializable user selections from ``session_state``, limited to ``keys`` if given."""
+    state = {}
+    for key, value in session_state.items():
+        if not isinstance(key, str) or key.startswith(IGNORED_PREFIXES):
+            continue
+        if keys is not None and key not in keys:
+            continue
+        value = _to_json(value)
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        state[key] = value
+    return state
+
+
+def replay_state(entry):
+    """``(key, value)`` pairs to put back into session state to replay ``entry``."""
+    return [(key, _from_json(value)) for key, value in entry["state"].items()]
+
+
+def record(session, page, state, results=()):
+    """Queue one history row; returns immediately."""
+    _ensure_writer()
+    keys = list(dict.fromkeys(json.dumps(k, default=str) for k in results))
+    row = (time.time(), session, page, json.dumps(state, sort_keys=True), json.dumps(keys))
+    seq = next(_SEQUENCE)
+    with _PENDING_LOCK:
+        _PENDING[seq] = row
+    _QUEUE.put((seq, row))
+
+
+def pending():
+    """Recorded rows not committed yet, oldest first."""
+    with _PENDING_LOCK:
+        return [row for _, row in sorted(_PENDING.items())]
+
+
+def entries(before=None, limit=50, page=None, session=None):
+    """Up to ``limit`` entries older than id ``before``, newest first, as dicts.
+
+    The first page (``before`` is None) also starts with the rows still
+    waiting to be committed; they have no id yet.
+    """
+    clauses, args = [], []
+    if before is not None:
+        clauses.append("id < ?")
+        args.append(before)
+    if page:
+        clauses.append("page = ?")
+        args.append(page)
+    if session:
+        clauses.append("session = ?")
+        args.append(session)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = connect()
+    try:
+        rows = conn.execute(
+            f"SELECT id, ts, session, page, state, results FROM history {where} ORDER BY id DESC LIMIT ?",
+            args + [limit],
+        ).fetchall()
+    finally:
+        conn.close()
+    # Read after the committed rows: a row committed in between is then no longer
+    # pending, so it can be missed for one run but never listed twice
+    if before is None:
+        queued = [(None,) + r for r in pending() if (not page or r[2] == page) and (not session or r[1] == session)]
+        rows = queued[::-1] + rows
+    return [
+        {"id": i, "ts": ts, "session": s, "page": p, "state": json.loads(state), "results": json.loads(results)}
+        for i, ts, s, p, state, results in rows
+    ]
+
+
+def pages():
+    """Distinct pages in the history, via the page index."""
+    conn = connect()
+    try:
+        committed = [p for (p,) in conn.execute("SELECT DISTINCT page FROM history ORDER BY page")]
+    finally:
+        conn.close()
+    return sorted(set(committed).union(r[2] for r in pending()))
+
+
+def _as_key(text):
+    def tuples(value):
+        return tuple(tuples(v) for v in value) if isinstance(value, list) else value
+    return tuples(json.loads(text))
+
+
+def cached_results(entry):
+    """How many of the entry's result keys are still held in the registry."""
+    return sum(_as_key(k) in registry.REGISTRY for k in entry["results"])
@@ -0,0 +1,218 @@
+"""Hot-path instrumentation: per-rerun stage timings and Prometheus metrics.
+
+Data loads, statistics and chart building are wrapped in ``stage`` (a
+context manager) or ``timed`` (its decorator form); registry lookups
+report through ``cache_lookup`` and pages draw through ``plotly_chart``
+and ``image``, which also count the bytes handed to the browser. While a
+page runs inside ``rerun``, everything on the script thread is added to
+that rerun's record, which the optional timing panel shows. Work on other
+threads (the prewarm thread, the figure pool) only feeds the metrics.
+
+If prometheus_client is installed, ``serve`` exposes ``app_stage_seconds``,
+``app_rendered_bytes_total``, ``app_cache_lookups_total`` and
+``app_rerun_seconds`` on 127.0.0.1:``METRICS_PORT`` (default 9464, 0
+turns the endpoint off). Without it the panel still works.
+"""
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import streamlit as st
+
+try:
+    import prometheus_client as prom
+except ImportError:
+    prom = None
+
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9464))
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+if prom is not None:
+    # A registry of our own, so a reloaded module does not clash with the default one
+    METRICS = prom.CollectorRegistry()
+    STAGE_SECONDS = prom.Histogram(
+        "app_stage_seconds", "Time spent per instrumented stage", ["stage", "kind"],
+        buckets=SECONDS_BUCKETS, registry=METRICS,
+    )
+    RENDERED_BYTES = prom.Counter(
+        "app_rendered_bytes", "Chart and image bytes sent to the browser", ["stage"], registry=METRICS
+    )
+    CACHE_LOOKUPS = prom.Counter(
+        "app_cache_lookups", "Cache lookups by result", ["cache", "result"], registry=METRICS
+    )
+    RERUN_SECONDS = prom.Histogram(
+        "app_rerun_seconds", "Script run time per page", ["page"], buckets=SECONDS_BUCKETS, registry=METRICS
+    )
+
+_LOCAL = threading.local()
+_LOCK = threading.Lock()
+_SERVER = {}
+_GAUGES = {}
+
+
+class Rerun:
+    """Stages and cache lookups of one script run."""
+
+    def __init__(self, page):
+        self.page = page
+        self.stages = []
+        self.hits = 0
+        self.misses = 0
+        self.seconds = None
+        self.depth = 0
+
+    def table(self):
+        """One row per stage in first-call order, with nested stages indented."""
+        rows = {}
+        for name, kind, depth, seconds, size in self.stages:
+            row = rows.setdefault(name, {"Stage": "  " * depth + name, "Kind": kind, "Calls": 0,
+                                         "Time [ms]": 0.0, "Bytes": 0})
+            row["Calls"] += 1
+            row["Time [ms]"] += seconds * 1000
+            row["Bytes"] += size
+        for row in rows.values():
+            row["Time [ms]"] = round(row["Time [ms]"], 1)
+        return list(rows.values())
+
+
+class Stage:
+    """Handle yielded by ``stage``; renderers add the bytes they produced."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def add_bytes(self, n):
+        self.bytes += int(n)
+
+
+def current():
+    """The ``Rerun`` being recorded on this thread, or None."""
+    return getattr(_LOCAL, "rerun", None)
+
+
+@contextmanager
+def rerun(page):
+    """Record the stages of one page run on this thread; yields the ``Rerun``."""
+    record = Rerun(page)
+    previous, _LOCAL.rerun = current(), record
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - started
+        _LOCAL.rerun = previous
+        if prom is not None:
+            RERUN_SECONDS.labels(page).observe(record.seconds)
+
+
+@contextmanager
+def stage(name, kind="compute"):
+    """Time the block as stage ``name``; ``kind`` is load, stats, render or compute."""
+    record = current()
+    depth = 0
+    if record is not None:
+        depth, record.depth = record.depth, record.depth + 1
+    handle = Stage()
+    started = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        seconds = time.perf_counter() - started
+        if record is not None:
+            record.depth = depth
+            record.stages.append((name, kind, depth, seconds, handle.bytes))
+        if prom is not None:
+            STAGE_SECONDS.labels(name, kind).observe(seconds)
+            if handle.bytes:
+                RENDERED_BYTES.labels(name).inc(handle.bytes)
+
+
+def timed(name=None, kind="compute"):
+    """Decorator form of ``stage``; the default name is ``module.function``."""
+    def decorate(fn):
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(label, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def cache_lookup(cache, hit):
+    record = current()
+    if record is not None:
+        if hit:
+            record.hits += 1
+        else:
+            record.misses += 1
+    if prom is not None:
+        CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def gauge(name, documentation, value):
+    """Export ``value()`` as a gauge, sampled on every scrape.
+
+    Registering a name again (e.g. from a re-imported module) replaces the
+    sampled function instead of adding a second timeseries.
+    """
+    if prom is None:
+        return
+    with _LOCK:
+        if name not in _GAUGES:
+            _GAUGES[name] = prom.Gauge(name, documentation, registry=METRICS)
+        _GAUGES[name].set_function(value)
+
+
+def serve(port=METRICS_PORT):
+    """Start the metrics endpoint once per process; returns its port, or None if unavailable."""
+    if prom is None or not port:
+        return None
+    with _LOCK:
+        if port not in _SERVER:
+            try:
+                prom.start_http_server(port, addr="127.0.0.1", registry=METRICS)
+                _SERVER[port] = port
+            except OSError:
+                # Another server process already holds the port
+                _SERVER[port] = None
+        return _SERVER[port]
+
+
+def figure_bytes(fig):
+    """Size of the data arrays of a Plotly figure's traces."""
+    total = 0
+    for trace in fig.data:
+        for attr in ("x", "y", "z"):
+            values = getattr(trace, attr, None)
+            if values is not None:
+                total += np.asarray(values).nbytes
+    return total
+
+
+def plotly_chart(fig, name, **kwargs):
+    """``st.plotly_chart`` timed as a render stage."""
+    with stage(name, "render") as handle:
+        handle.add_bytes(figure_bytes(fig))
+        return st.plotly_chart(fig, **kwargs)
+
+
+def image(png, name, **kwargs):
+    """``st.image`` of encoded image bytes, timed as a render stage."""
+    with stage(name, "render") as handle:
+        handle.add_bytes(len(png))
+        return st.image(png, **kwargs)
+
+
+def panel(record, container=st.sidebar):
+    """Timing panel for one rerun: total time, registry lookups and every stage."""
+    with container.expander("Rerun timings", expanded=True):
+        st.caption(f"{record.page}: {record.seconds * 1000:,.0f} ms, "
+                   f"registry {record.hits} hits / {record.misses} misses")
+        st.dataframe(record.table(), hide_index=True, use_container_width=True)
+        if _SERVER.get(METRICS_PORT):
+            st.caption(f"Prometheus metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
@@ -0,0 +1,148 @@
+"""Declarative KPIs materialized as small aggregate tables.
+
+Every KPI in ``KPIS`` names a source, a measure, an aggregation and the
+columns to group by (none for a single value). Sources are read from the
+memory-mapped Arrow cache and cut into blocks of ``BLOCK_ROWS`` rows, each
+with a content fingerprint. A block is aggregated once per KPI with
+Arrow's grouped aggregation into mergeable partials (sum, count, min,
+max) stored under ``.cache/kpi``; a KPI table merges the partials of all
+blocks and is itself stored per set of block fingerprints.
+
+When a source file changes, only blocks whose content changed are
+aggregated again: appending rows to train.csv re-reads the whole file
+once to fingerprint it, but aggregates just the new tail. On an unchanged
+source a KPI is a registry hit, so the dashboard's cost does not depend on
+the number of raw rows.
+"""
+import hashlib
+import json
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from core import data, instrument, registry
+
+KPI_DIR = data.CACHE_DIR / "kpi"
+# Bump when the stored partial layout changes
+KPI_VERSION = 1
+BLOCK_ROWS = 65_536
+
+# name -> (source file, memory-mapped Arrow table)
+SOURCES = {
+    "orders": (data.TRAIN_PATH, data.orders_table),
+    "overview": (data.OVERVIEW_PATH, data.overview_table),
+}
+# Grouping columns derived from source columns
+DERIVED = {
+    "Month": lambda t: pc.floor_temporal(t["Order Date"], unit="month"),
+    "Year": lambda t: pc.year(t["Order Date"]),
+    # TripA.. are the summer drives, TripB.. the winter drives
+    "Trip series": lambda t: pc.utf8_slice_codeunits(t["Trip"], 0, 5),
+}
+
+KPIS = {
+    "Total sales": {"source": "orders", "measure": "Sales", "agg": "sum", "by": []},
+    "Order lines": {"source": "orders", "measure": "Sales", "agg": "count", "by": []},
+    "Sales by month": {"source": "orders", "measure": "Sales", "agg": "sum", "by": ["Month"]},
+    "Sales by region": {"source": "orders", "measure": "Sales", "agg": "sum", "by": ["Region"]},
+    "Sales by segment and category": {
+        "source": "orders", "measure": "Sales", "agg": "sum", "by": ["Segment", "Category"],
+    },
+    "Mean order line by year": {"source": "orders", "measure": "Sales", "agg": "mean", "by": ["Year"]},
+    "Trips": {"source": "overview", "measure": "Distance [km]", "agg": "count", "by": []},
+    "Mean SoC difference": {"source": "overview", "measure": "SoC difference", "agg": "mean", "by": []},
+    "Mean SoC difference by trip series": {
+        "source": "overview", "measure": "SoC difference", "agg": "mean", "by": ["Trip series"],
+    },
+    "Distance by route": {"source": "overview", "measure": "Distance [km]", "agg": "sum", "by": ["Route/Area"]},
+}
+
+
+def spec_key(spec):
+    raw = json.dumps({**spec, "version": KPI_VERSION}, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def blocks(source):
+    """``(offset, rows, fingerprint)`` blocks of a source, fingerprinted once per file version."""
+    path, load = SOURCES[source]
+
+    def build():
+        table = load()
+        return [
+            (lo, min(BLOCK_ROWS, table.num_rows - lo), data.fingerprint(table.slice(lo, BLOCK_ROWS)))
+            for lo in range(0, table.num_rows, BLOCK_ROWS)
+        ]
+
+    key = ("kpi-blocks", source, data.source_key(path))
+    # Fingerprints of older file versions are not needed again
+    registry.REGISTRY.discard(lambda k: k[:2] == key[:2] and k != key)
+    return registry.get(key, build)
+
+
+def _renamed(table, names):
+    return table.rename_columns([names.get(n, n) for n in table.column_names])
+
+
+def _aggregate(table, spec):
+    """Mergeable partials of ``spec`` over ``table``: group columns plus sum/count/min/max."""
+    columns = {c: DERIVED[c](table) if c in DERIVED else table[c] for c in spec["by"]}
+    frame = pa.table({**columns, "value": pc.cast(table[spec["measure"]], pa.float64())})
+    partial = frame.group_by(spec["by"]).aggregate(
+        [("value", "sum"), ("value", "count"), ("value", "min"), ("value", "max")]
+    )
+    return _renamed(partial, {"value_sum": "sum", "value_count": "count", "value_min": "min", "value_max": "max"})
+
+
+def _partial(spec, block, load):
+    lo, rows, fp = block
+    path = KPI_DIR / "partials" / f"{spec_key(spec)}-{fp}.arrow"
+    if not path.exists():
+        data.write_table(_aggregate(load().slice(lo, rows), spec), path)
+    return data.read_table(path)
+
+
+def _merge(partials, spec):
+    merged = pa.concat_tables(partials).group_by(spec["by"]).aggregate(
+        [("sum", "sum"), ("count", "sum"), ("min", "min"), ("max", "max")]
+    )
+    return _renamed(merged, {"sum_sum": "sum", "count_sum": "count", "min_min": "min", "max_max": "max"})
+
+
+def _value(merged, agg):
+    if agg == "mean":
+        return pc.divide(merged["sum"], pc.cast(merged["count"], pa.float64()))
+    return merged[agg]
+
+
+@instrument.timed(kind="stats")
+def table(name):
+    """KPI ``name`` as a DataFrame of its group columns and ``Value``, sorted by group."""
+    spec = KPIS[name]
+    source_blocks = blocks(spec["source"])
+
+    def build():
+        fps = hashlib.sha1("".join(fp for _, _, fp in source_blocks).encode("utf-8")).hexdigest()[:16]
+        path = KPI_DIR / f"{spec_key(spec)}-{fps}.arrow"
+        if not path.exists():
+            load = SOURCES[spec["source"]][1]
+            merged = _merge([_partial(spec, b, load) for b in source_blocks], spec)
+            result = pa.table({**{c: merged[c] for c in spec["by"]}, "Value": _value(merged, spec["agg"])})
+            if spec["by"]:
+                result = result.sort_by([(c, "ascending") for c in spec["by"]])
+            data.write_table(result, path)
+        return data.to_pandas(data.read_table(path))
+
+    key = ("kpi", name, spec_key(spec), tuple(fp for _, _, fp in source_blocks))
+    return registry.get(key, build)
+
+
+def value(name):
+    """Single value of a KPI without group columns."""
+    result = table(name)
+    return result["Value"].iloc[0] if len(result) else None
+
+
+def materialize_all():
+    """Build or refresh every KPI table; used by the startup prewarm."""
+    return {name: len(table(name)) for name in KPIS}
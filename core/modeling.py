@@ -0,0 +1,343 @@
+"""Out-of-core model training and a persistent model registry.
+
+Models are ridge regressions fitted from accumulated normal equations:
+``partial_fit`` only adds a mini-batch to ``X'X``, ``X'y`` and the column
+sums, so memory is O(features^2) whatever the number of rows, and the
+final solve on standardized features is exact. Two tasks are supported:
+
+* ``sales``: next-period sales from lagged sales and calendar features,
+  one mini-batch per series of the order rollups;
+* ``soc``: a trip channel (state of charge by default) from other channels,
+  streamed trip partition by partition.
+
+Training runs on a background worker so the script thread never blocks.
+Fitted models are pickled under ``.cache/models`` keyed by the data
+fingerprint and hyperparameters, and shared through the registry, so a
+page reopening an existing model only pays for a dictionary lookup.
+
+The number of training workers is ``MODEL_WORKERS`` (default 1).
+"""
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from core import data, preprocessing, registry, timeseries
+
+MODEL_DIR = data.CACHE_DIR / "models"
+# Bump when the pickled TrainedModel layout changes
+MODEL_VERSION = 1
+BATCH_ROWS = 100_000
+CALENDAR_FEATURES = ["Years", "sin(year)", "cos(year)", "sin(half year)", "cos(half year)"]
+EPOCH = pd.Timestamp("2015-01-01")
+# Other readings of the state of charge (displayed, min/max) leak the SoC target
+SOC_CHANNEL = re.compile(r"\bsoc\b", re.IGNORECASE)
+
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("MODEL_WORKERS", 1)), thread_name_prefix="modeling"
+)
+_JOBS = {}
+_JOBS_LOCK = threading.Lock()
+
+
+class RidgeRegression:
+    """Ridge regression fitted incrementally from sufficient statistics.
+
+    Features are standardized inside the solve, so ``alpha`` means the same
+    for channels of very different scales; the intercept is not penalized.
+    """
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+        self.n = 0
+        self.sx = self.sxx = self.sxy = None
+        self.sy = 0.0
+        self.coef_ = None
+        self.intercept_ = 0.0
+
+    def partial_fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        keep = ~(np.isnan(X).any(axis=1) | np.isnan(y))
+        X, y = X[keep], y[keep]
+        if self.sx is None:
+            d = X.shape[1]
+            self.sx, self.sxx, self.sxy = np.zeros(d), np.zeros((d, d)), np.zeros(d)
+        self.n += len(y)
+        self.sx += X.sum(axis=0)
+        self.sxx += X.T @ X
+        self.sxy += X.T @ y
+        self.sy += y.sum()
+        return self
+
+    def solve(self):
+        if self.n == 0:
+            raise ValueError("no training rows")
+        mean_x = self.sx / self.n
+        mean_y = self.sy / self.n
+        cov = self.sxx - self.n * np.outer(mean_x, mean_x)
+        cross = self.sxy - self.n * mean_x * mean_y
+        scale = np.sqrt(np.maximum(np.diag(cov), 0) / self.n)
+        scale[scale == 0] = 1.0
+        lhs = cov / np.outer(scale, scale) + self.alpha * np.eye(len(scale))
+        self.coef_ = np.linalg.solve(lhs, cross / scale) / scale
+        self.intercept_ = mean_y - mean_x @ self.coef_
+        return self
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+
+class ErrorMetrics:
+    """Streaming MAE, RMSE and R² over batches of predictions."""
+
+    def __init__(self):
+        self.n = 0
+        self.abs = self.sq = self.sy = self.syy = 0.0
+
+    def update(self, y, pred):
+        keep = ~(np.isnan(y) | np.isnan(pred))
+        y, err = y[keep], y[keep] - pred[keep]
+        self.n += len(y)
+        self.abs += np.abs(err).sum()
+        self.sq += (err ** 2).sum()
+        self.sy += y.sum()
+        self.syy += (y ** 2).sum()
+        return self
+
+    def result(self):
+        if self.n == 0:
+            return {"rows": 0}
+        total = self.syy - self.sy ** 2 / self.n
+        return {
+            "rows": self.n,
+            "MAE": float(self.abs / self.n),
+            "RMSE": float(np.sqrt(self.sq / self.n)),
+            "R2": float(1 - self.sq / total) if total > 0 else float("nan"),
+        }
+
+
+class TrainedModel:
+    """A fitted model with the settings, feature names and evaluation it came from."""
+
+    def __init__(self, task, params, features, model, metrics, rows, seconds):
+        self.task = task
+        self.params = params
+        self.features = features
+        self.model = model
+        self.metrics = metrics
+        self.rows = rows
+        self.seconds = seconds
+        self.trained_at = time.time()
+
+    def coefficients(self):
+        return pd.Series(self.model.coef_, index=self.features, name="Coefficient")
+
+
+# --- Sales forecasting -----------------------------------------------------
+
+def calendar_features(periods):
+    periods = pd.DatetimeIndex(periods)
+    phase = 2 * np.pi * periods.dayofyear.to_numpy() / 365.25
+    years = (periods - EPOCH).days.to_numpy() / 365.25
+    return np.column_stack([years, np.sin(phase), np.cos(phase), np.sin(2 * phase), np.cos(2 * phase)])
+
+
+def sales_features(values, periods, lags):
+    """Rows ``[y(t-1) .. y(t-lags), calendar(t)]`` and targets ``y(t)`` of one series."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= lags:
+        return np.empty((0, lags + len(CALENDAR_FEATURES))), values[:0]
+    history = sliding_window_view(values, lags)[:-1, ::-1]
+    return np.hstack([history, calendar_features(periods[lags:])]), values[lags:]
+
+
+def sales_frame(level, by):
+    """Gap-free wide frame of sales per period, one column per ``by`` value.
+
+    Periods without orders between a series' first and last sale count as
+    zero sales; periods before or after them are NaN, not zero.
+    """
+    first, last = timeseries.order_range()
+    frame = timeseries.order_series(level, first, last, by=by)
+    full = pd.period_range(first, last, freq=timeseries.ORDER_LEVELS[level]).start_time
+    frame = frame.reindex(full)
+    sold = frame.notna() & frame.ne(0)
+    observed = sold.cummax() & sold[::-1].cummax()[::-1]
+    return frame.fillna(0).where(observed)
+
+
+def _train_sales(params):
+    model = RidgeRegression(params["alpha"])
+    frame = sales_frame(params["level"], params["by"])
+    lags, test = params["lags"], params["test_periods"]
+    train_until = len(frame) - test
+    # Each series is one mini-batch; the last ``test`` periods are held out
+    for column in frame.columns:
+        X, y = sales_features(frame[column].to_numpy()[:train_until], frame.index[:train_until], lags)
+        if len(y):
+            model.partial_fit(X, y)
+    if model.n == 0:
+        raise ValueError(f"not enough periods for {lags} lags")
+    model.solve()
+    metrics = ErrorMetrics()
+    for column in frame.columns:
+        X, y = sales_features(frame[column].to_numpy(), frame.index, lags)
+        metrics.update(y[-test:], model.predict(X[-test:]))
+    features = [f"Sales (t-{i})" for i in range(1, lags + 1)] + CALENDAR_FEATURES
+    return features, model, metrics.result()
+
+
+def forecast_sales(trained, history, horizon):
+    """Recursive ``horizon``-period forecast continuing the ``history`` series."""
+    level, lags = trained.params["level"], trained.params["lags"]
+    freq = timeseries.ORDER_LEVELS[level]
+    # A series that stopped selling is continued from its last observed period
+    history = history.dropna()
+    if len(history) < lags:
+        raise ValueError(f"not enough periods for {lags} lags")
+    periods = pd.period_range(history.index[-1], periods=horizon + 1, freq=freq).start_time[1:]
+    values = list(history.to_numpy(dtype=np.float64)[-lags:])
+    calendar = calendar_features(periods)
+    for step in range(horizon):
+        row = np.concatenate([values[::-1][:lags], calendar[step]])
+        values.append(float(trained.model.predict(row[None, :])[0]))
+    return pd.Series(values[lags:], index=periods, name="Forecast")
+
+
+# --- SoC prediction --------------------------------------------------------
+
+def default_soc_features(channels, target):
+    """Default inputs for predicting ``target``: every other channel except SoC readings."""
+    return [c for c in channels if c != target and not SOC_CHANNEL.search(c)]
+
+
+def split_trips(trips):
+    """Training and held-out trips: every fifth trip is held out (none for one trip)."""
+    trips = list(trips)
+    if len(trips) < 2:
+        return trips, []
+    test = trips[4::5] or trips[-1:]
+    return [t for t in trips if t not in test], test
+
+
+def _batches(df, features, target):
+    X = df[features].to_numpy(dtype=np.float64)
+    y = df[target].to_numpy(dtype=np.float64)
+    for start in range(0, len(y), BATCH_ROWS):
+        yield X[start:start + BATCH_ROWS], y[start:start + BATCH_ROWS]
+
+
+def _soc_frames(params, trips):
+    """Raw target next to raw or preprocessed features, one trip at a time."""
+    features, target = list(params["features"]), params["target"]
+    raw = data.iter_trips(trips, columns=[target] if params.get("preprocess") else features + [target])
+    if not params.get("preprocess"):
+        for _, df in raw:
+            yield df
+        return
+    prepared = preprocessing.iter_trips(trips, params["preprocess"], columns=features)
+    for (_, target_df), (_, feature_df) in zip(raw, prepared):
+        yield feature_df.assign(**{target: target_df[target].to_numpy()})
+
+
+def _train_soc(params):
+    features, target = list(params["features"]), params["target"]
+    train, test = split_trips(params["trips"])
+    model = RidgeRegression(params["alpha"])
+    for df in _soc_frames(params, train):
+        for X, y in _batches(df, features, target):
+            model.partial_fit(X, y)
+    model.solve()
+    metrics = ErrorMetrics()
+    for df in _soc_frames(params, test or train):
+        for X, y in _batches(df, features, target):
+            metrics.update(y, model.predict(X))
+    result = metrics.result()
+    result["evaluated on"] = "held-out trips" if test else "training trips"
+    return features, model, result
+
+
+def predict_trip(trained, trip):
+    """Actual and predicted target over one trip, indexed by time."""
+    features, target = trained.features, trained.params["target"]
+    df = data.to_pandas(data.read_trip(trip, columns=list(dict.fromkeys([data.TIME_COLUMN, target]))))
+    if trained.params.get("preprocess"):
+        _, inputs = next(preprocessing.iter_trips([trip], trained.params["preprocess"], columns=features))
+    else:
+        inputs = data.to_pandas(data.read_trip(trip, columns=features))
+    predicted = trained.model.predict(inputs[features].to_numpy(dtype=np.float64))
+    return pd.DataFrame(
+        {"Actual": df[target].to_numpy(), "Predicted": predicted}, index=df[data.TIME_COLUMN].to_numpy()
+    )
+
+
+# --- Registry and background training --------------------------------------
+
+TASKS = {"sales": _train_sales, "soc": _train_soc}
+
+
+def data_fingerprint(task, params):
+    if task == "sales":
+        return data.source_key(data.TRAIN_PATH)
+    wanted = set(params["trips"])
+    h = hashlib.blake2b(digest_size=8)
+    for entry in data.list_trips():
+        if entry["trip"] in wanted:
+            h.update(entry["fingerprint"].encode("utf-8"))
+    return h.hexdigest()
+
+
+def model_key(task, params):
+    """Registry key for a model trained on the current data with ``params``."""
+    spec = json.dumps({"params": params, "version": MODEL_VERSION}, sort_keys=True)
+    digest = hashlib.sha1(spec.encode("utf-8")).hexdigest()[:12]
+    return f"{task}-{data_fingerprint(task, params)}-{digest}"
+
+
+def _model_path(key):
+    return MODEL_DIR / f"{key}.pkl"
+
+
+def cached_model(key):
+    """The trained model under ``key``, or None if it was never trained."""
+    path = _model_path(key)
+    if not path.exists():
+        return None
+    return registry.get(("model", key), lambda: pickle.loads(path.read_bytes()))
+
+
+def _train(task, params, key):
+    started = time.perf_counter()
+    features, model, metrics = TASKS[task](params)
+    trained = TrainedModel(task, params, features, model, metrics, model.n, time.perf_counter() - started)
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = _model_path(key).with_suffix(".tmp")
+    tmp.write_bytes(pickle.dumps(trained))
+    tmp.replace(_model_path(key))
+    registry.REGISTRY.put(("model", key), trained)
+    return trained
+
+
+def submit(task, params):
+    """Start training in the background unless the same model is already training."""
+    key = model_key(task, params)
+    with _JOBS_LOCK:
+        job = _JOBS.get(key)
+        if job is None or (job.done() and job.exception() is not None):
+            job = _JOBS[key] = _EXECUTOR.submit(_train, task, params, key)
+    return key, job
+
+
+def job(key):
+    """The background training future for ``key``, if one was submitted."""
+    with _JOBS_LOCK:
+        return _JOBS.get(key)
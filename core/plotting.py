@@ -0,0 +1,69 @@
+"""Screen-sized plotting of long trip signals.
+
+Each column is reduced to a few points per horizontal pixel before it is
+handed to Plotly, so render time and payload depend on the plot width and
+not on the number of samples in a trip.
+"""
+import math
+
+import numpy as np
+
+from core import instrument
+
+
+def minmax_decimate(y, n_out, start=0):
+    """Indices of the min and max sample in each of ``n_out // 2`` buckets.
+
+    Keeping both extremes per pixel column preserves spikes that plain
+    striding would drop. Returned indices are sorted and offset by ``start``.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(start, start + n)
+    n_buckets = max(n_out // 2, 1)
+    size = math.ceil(n / n_buckets)
+    n_buckets = math.ceil(n / size)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(n_buckets, size)
+    lo = np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    hi = np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    offsets = np.arange(n_buckets) * size
+    idx = np.unique(np.concatenate([offsets + lo, offsets + hi]))
+    return idx[idx < n] + start
+
+
+def decimate(y, width_px, start=0, stop=None):
+    """Return ``(x, y)`` for ``y[start:stop]`` reduced to about two points per pixel."""
+    stop = len(y) if stop is None else min(stop, len(y))
+    window = np.asarray(y[start:stop], dtype=float)
+    idx = minmax_decimate(window, max(int(width_px) * 2, 4), start)
+    return idx, window[idx - start]
+
+
+@instrument.timed(kind="render")
+def signal_grid(points, ncols=4, row_height=220):
+    """Build one Plotly figure with a subplot per column from decimated points.
+
+    ``points`` maps a column name to the ``(x, y)`` pair returned by
+    :func:`decimate`.
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    columns = list(points)
+    nrows = max(math.ceil(len(columns) / ncols), 1)
+    fig = make_subplots(
+        rows=nrows, cols=ncols, subplot_titles=columns,
+        vertical_spacing=min(0.3 / nrows, 0.08), horizontal_spacing=0.04,
+    )
+    for i, column in enumerate(columns):
+        x, y = points[column]
+        fig.add_trace(
+            go.Scattergl(x=x, y=y, mode="lines", name=column, line={"width": 1}),
+            row=i // ncols + 1, col=i % ncols + 1,
+        )
+    fig.update_layout(height=nrows * row_height, showlegend=False, margin={"t": 40, "b": 20})
+    fig.update_annotations(font_size=11)
+    return fig
@@ -0,0 +1,200 @@
+"""Fitted impute -> clip -> scale pipeline for the overview and trip data.
+
+Parameters are fitted from the cached column sketches in ``core.stats``
+(mean, KLL quantiles, min/max), so fitting never rescans raw rows. A
+transform is a single allocation followed by in-place NumPy passes over
+all columns at once. Trip data is transformed one partition at a time and
+written next to the fitted parameters under ``.cache/preprocessing``; other
+pages read those files instead of preprocessing again.
+
+Settings are a dict with:
+
+* ``impute``: ``"median"``, ``"mean"``, ``"zero"`` or ``"none"``;
+* ``clip``: tail quantile clipped on both sides (``0`` disables clipping);
+* ``scale``: ``"zscore"``, ``"minmax"`` or ``"none"``.
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core import data, registry, stats
+
+PREP_DIR = data.CACHE_DIR / "preprocessing"
+IMPUTERS = ["median", "mean", "zero", "none"]
+SCALERS = ["zscore", "minmax", "none"]
+DEFAULT_SETTINGS = {"impute": "median", "clip": 0.01, "scale": "zscore"}
+
+
+class Pipeline:
+    """Per-column fill value, clip bounds and affine scaling."""
+
+    def __init__(self, columns, fill, lower, upper, offset, scale, settings):
+        self.columns = list(columns)
+        self.fill = np.asarray(fill, dtype=np.float64)
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.offset = np.asarray(offset, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.settings = dict(settings)
+
+    @classmethod
+    def fit(cls, summary, columns, settings=DEFAULT_SETTINGS):
+        """Fit from a ``stats.Summary``; z-scores use the moments of the unclipped data."""
+        sketches = [summary.columns[c] for c in columns]
+        means = np.array([s.moments.mean for s in sketches])
+        q = settings["clip"]
+        if q > 0:
+            lower = np.array([s.quantiles.quantile(q) for s in sketches])
+            upper = np.array([s.quantiles.quantile(1 - q) for s in sketches])
+        else:
+            lower = np.array([s.moments.min for s in sketches])
+            upper = np.array([s.moments.max for s in sketches])
+
+        fill = {
+            "median": lambda: np.array([s.quantiles.quantile(0.5) for s in sketches]),
+            "mean": lambda: means,
+            "zero": lambda: np.zeros(len(sketches)),
+            "none": lambda: np.full(len(sketches), np.nan),
+        }[settings["impute"]]()
+
+        if settings["scale"] == "zscore":
+            offset, scale = means, np.array([s.moments.std for s in sketches])
+        elif settings["scale"] == "minmax":
+            offset, scale = lower, upper - lower
+        else:
+            offset, scale = np.zeros(len(sketches)), np.ones(len(sketches))
+        # Constant or empty columns pass through unscaled
+        scale = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+        if q == 0:
+            lower, upper = np.full(len(sketches), -np.inf), np.full(len(sketches), np.inf)
+        return cls(columns, fill, lower, upper, offset, scale, settings)
+
+    def transform(self, X, dtype=np.float64):
+        """Impute, clip and scale the columns of ``X`` (rows x ``self.columns``)."""
+        out = np.array(X, dtype=dtype)
+        if self.settings["impute"] != "none":
+            missing = np.isnan(out)
+            if missing.any():
+                out[missing] = np.broadcast_to(self.fill.astype(dtype), out.shape)[missing]
+        np.clip(out, self.lower.astype(dtype), self.upper.astype(dtype), out=out)
+        out -= self.offset.astype(dtype)
+        out /= self.scale.astype(dtype)
+        return out
+
+    def transform_frame(self, df):
+        """Copy of ``df`` with the pipeline's columns transformed; other columns untouched."""
+        dtypes = {df[c].dtype for c in self.columns}
+        dtype = np.float32 if dtypes == {np.dtype(np.float32)} else np.float64
+        values = self.transform(df[self.columns].to_numpy(dtype=dtype, na_value=np.nan), dtype)
+        out = df.copy(deep=False)
+        out[self.columns] = values
+        return out
+
+    @property
+    def key(self):
+        """Content hash of the fitted parameters, naming the transformed outputs."""
+        return hashlib.sha1(self.to_json().encode("utf-8")).hexdigest()[:16]
+
+    def parameters(self):
+        """Fitted parameters as a frame, one row per column."""
+        return pd.DataFrame(
+            {"Fill": self.fill, "Lower": self.lower, "Upper": self.upper, "Offset": self.offset, "Scale": self.scale},
+            index=self.columns,
+        )
+
+    def to_json(self):
+        arrays = {k: getattr(self, k).tolist() for k in ("fill", "lower", "upper", "offset", "scale")}
+        return json.dumps({"columns": self.columns, "settings": self.settings, **arrays})
+
+    @classmethod
+    def from_json(cls, text):
+        raw = json.loads(text)
+        return cls(raw["columns"], raw["fill"], raw["lower"], raw["upper"], raw["offset"], raw["scale"], raw["settings"])
+
+
+def _key(parts, settings):
+    h = hashlib.sha1(json.dumps([parts, settings], sort_keys=True).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _fitted(name, key, fit):
+    """Pipeline persisted as ``PREP_DIR/{name}-{key}.json``, fitted on first use."""
+    def load():
+        path = PREP_DIR / f"{name}-{key}.json"
+        if not path.exists():
+            PREP_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(fit().to_json())
+            tmp.replace(path)
+        return Pipeline.from_json(path.read_text())
+
+    return registry.get(("preprocessing", name, key), load)
+
+
+def overview_pipeline(settings=DEFAULT_SETTINGS):
+    """Pipeline over the numeric overview columns, fitted once per source version."""
+    source = data.source_key(data.OVERVIEW_PATH)
+
+    def fit():
+        summary = stats.frame_summary(data.load_overview(), key=("overview", source))
+        return Pipeline.fit(summary, summary.numeric_columns(), settings)
+
+    return _fitted("overview", _key(source, settings), fit)
+
+
+def preprocessed_overview(settings=DEFAULT_SETTINGS):
+    pipeline = overview_pipeline(settings)
+    key = ("preprocessing", "overview-data", pipeline.key)
+    return registry.get(key, lambda: pipeline.transform_frame(data.load_overview()))
+
+
+def trip_pipeline(settings=DEFAULT_SETTINGS, path=data.MASTER_PATH):
+    """Pipeline over every numeric trip channel but time, fitted on all trips."""
+    entries = data.list_trips(path)
+
+    def fit():
+        summary = stats.trips_summary([e["trip"] for e in entries], path)
+        columns = [c for c in summary.numeric_columns() if c != data.TIME_COLUMN]
+        return Pipeline.fit(summary, columns, settings)
+
+    return _fitted("trips", _key([e["fingerprint"] for e in entries], settings), fit)
+
+
+def _trip_file(pipeline, entry):
+    return PREP_DIR / f"trip-{pipeline.key}-{entry['fingerprint']}.arrow"
+
+
+def preprocessed_trip(entry, pipeline, path=data.MASTER_PATH):
+    """Memory-mapped Arrow table of one transformed trip partition, written on first use."""
+    file = _trip_file(pipeline, entry)
+    if not file.exists():
+        df = data.to_pandas(data.read_trip(entry["trip"], path))
+        data.write_table(pa.Table.from_pandas(pipeline.transform_frame(df), preserve_index=False), file)
+    return data.read_table(file)
+
+
+def iter_trips(trips=None, settings=DEFAULT_SETTINGS, path=data.MASTER_PATH, columns=None):
+    """Like ``data.iter_trips`` but yielding preprocessed partitions."""
+    pipeline = trip_pipeline(settings, path)
+    wanted = None if trips is None else set(trips)
+    for entry in data.list_trips(path):
+        if wanted is None or entry["trip"] in wanted:
+            table = preprocessed_trip(entry, pipeline, path)
+            yield entry["trip"], data.to_pandas(table.select(columns) if columns is not None else table)
+
+
+def load_trips(trips, settings=DEFAULT_SETTINGS, path=data.MASTER_PATH):
+    """Preprocessed counterpart of ``data.load_trips``."""
+    trips = tuple(trips)
+    pipeline = trip_pipeline(settings, path)
+    by_trip = {e["trip"]: e for e in data.list_trips(path)}
+
+    def load():
+        tables = [preprocessed_trip(by_trip[t], pipeline, path) for t in trips]
+        return data.to_pandas(pa.concat_tables(tables).combine_chunks())
+
+    key = ("preprocessing", "trips-data", pipeline.key, trips)
+    return registry.get(key, load)
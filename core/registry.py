@@ -0,0 +1,190 @@
+"""Process-wide dataset registry shared by all sessions.
+
+Loaded frames and derived objects are kept once per server process (the
+same lifetime as ``st.cache_resource``) under a memory budget, evicting the
+least recently used entries first. Callers get read-only views rather than
+pickled copies, so memory stays nearly flat as more users connect. Frames
+are only shared without copying when pandas' copy-on-write mode is on (the
+app turns it on at startup); otherwise every caller gets its own copy.
+
+The budget is ``DATASET_CACHE_MB`` megabytes (default 1024).
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from core import instrument
+
+_TRACE = threading.local()
+
+
+@contextmanager
+def trace():
+    """Collect the keys of every lookup this thread makes inside the block."""
+    keys = []
+    _TRACE.keys = keys
+    try:
+        yield keys
+    finally:
+        _TRACE.keys = None
+
+
+def _traced(key):
+    keys = getattr(_TRACE, "keys", None)
+    if keys is not None:
+        keys.append(key)
+
+
+def nbytes(value, _seen=None):
+    """Approximate in-memory size of a cached value, without serializing it.
+
+    Arrays, frames and Arrow tables report their buffers; any other object can
+    state its own size with an ``nbytes`` attribute. Containers and plain
+    objects are walked, counting each object once.
+    """
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (bytes, bytearray, str)):
+        return sys.getsizeof(value)
+    if isinstance(getattr(value, "nbytes", None), (int, np.integer)):
+        return int(value.nbytes)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        return size + sum(nbytes(k, seen) + nbytes(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(nbytes(v, seen) for v in value)
+    if hasattr(value, "__dict__"):
+        return size + nbytes(vars(value), seen)
+    return size
+
+
+def view(value):
+    """Read-only view of a cached value; copies frames only without copy-on-write."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        # With copy-on-write a shallow copy shares the data but isolates edits;
+        # without it, edits would write through to every other session
+        return value.copy(deep=pd.get_option("mode.copy_on_write") is not True)
+    if isinstance(value, np.ndarray):
+        out = value.view()
+        out.flags.writeable = False
+        return out
+    return value
+
+
+class DatasetRegistry:
+    """LRU cache bounded by total size in bytes, with hit/miss/eviction counters."""
+
+    def __init__(self, budget_bytes):
+        self.budget = budget_bytes
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def get(self, key, loader):
+        """Return a view of the value under ``key``, calling ``loader()`` on a miss.
+
+        Concurrent misses on the same key wait for a single load.
+        """
+        _traced(key)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                instrument.cache_lookup("registry", True)
+                return view(self._entries[key][0])
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    instrument.cache_lookup("registry", True)
+                    return view(self._entries[key][0])
+                self.misses += 1
+                instrument.cache_lookup("registry", False)
+            try:
+                value = loader()
+                self.put(key, value)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return view(value)
+
+    def peek(self, key):
+        """View of the value under ``key``, or None; for callers that batch their misses."""
+        _traced(key)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                instrument.cache_lookup("registry", True)
+                return view(self._entries[key][0])
+            self.misses += 1
+            instrument.cache_lookup("registry", False)
+            return None
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, value):
+        size = nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self.used -= self._entries.pop(key)[1]
+            if size > self.budget:
+                # Too large to keep; the caller still gets the value once
+                return
+            self._entries[key] = (value, size)
+            self.used += size
+            while self.used > self.budget:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.used -= evicted
+                self.evictions += 1
+
+    def discard(self, match):
+        """Drop every entry whose key satisfies ``match(key)``."""
+        with self._lock:
+            for key in [k for k in self._entries if match(k)]:
+                self.used -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.used = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "used_mb": round(self.used / 2**20, 1),
+                "budget_mb": round(self.budget / 2**20, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+REGISTRY = DatasetRegistry(int(float(os.environ.get("DATASET_CACHE_MB", 1024)) * 2**20))
+instrument.gauge("app_registry_used_bytes", "Bytes held by the dataset registry", lambda: REGISTRY.used)
+
+
+def get(key, loader):
+    return REGISTRY.get(key, loader)
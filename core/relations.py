@@ -0,0 +1,91 @@
+"""Correlation heatmap and pairwise density grid built from summary sketches.
+
+Both views read only the merged :class:`core.stats.Summary`: the correlation
+matrix comes from its co-moments and the scatter panels are 2D histograms of
+its fixed-size row sample, so the cost does not depend on the number of rows
+and all ~48 trip channels fit in one view.
+
+plotly.express and matplotlib are imported on first use (see ``core.startup``).
+"""
+import io
+
+import numpy as np
+
+from core import instrument
+
+
+@instrument.timed(kind="render")
+def corr_figure(corr, annotate_max=12):
+    """Plotly heatmap of a correlation matrix; values are printed for small ones."""
+    import plotly.express as px
+
+    fig = px.imshow(
+        corr, zmin=-1, zmax=1, color_continuous_scale="RdBu_r", aspect="auto",
+        text_auto=".2f" if len(corr) <= annotate_max else False,
+    )
+    fig.update_layout(title="Correlation Matrix", height=max(400, 18 * len(corr)), margin={"t": 40})
+    return fig
+
+
+def pair_histograms(sample, ranges, bins=24):
+    """``counts[i, j]`` is the ``bins x bins`` histogram of column i against column j.
+
+    Each column is binned once; one ``bincount`` per column then fills every
+    panel of its row.
+    """
+    k = sample.shape[1]
+    lo, hi = ranges[:, 0], ranges[:, 1]
+    width = np.where(hi > lo, hi - lo, 1.0)
+    with np.errstate(invalid="ignore"):
+        binned = np.floor((sample - lo) / width * bins)
+    valid = ~np.isnan(binned)
+    binned = np.clip(np.nan_to_num(binned), 0, bins - 1).astype(np.int64)
+    panel = np.arange(k) * bins * bins
+    counts = np.empty((k, k, bins, bins), dtype=np.int64)
+    for i in range(k):
+        idx = panel + binned[:, i, None] * bins + binned
+        keep = valid & valid[:, i, None]
+        counts[i] = np.bincount(idx[keep], minlength=k * bins * bins).reshape(k, bins, bins)
+    return counts
+
+
+def density_mosaic(counts, gap=2):
+    """Tile the pair histograms into one image with a marginal histogram on the diagonal."""
+    k, _, bins, _ = counts.shape
+    step = bins + gap
+    image = np.full((k * step - gap, k * step - gap), np.nan)
+    for i in range(k):
+        for j in range(k):
+            if i == j:
+                marginal = np.diagonal(counts[i, i]).astype(float)
+                height = np.round(marginal / max(marginal.max(), 1) * bins)
+                # Bars grow upwards from the bottom of the panel
+                panel = (np.arange(bins)[::-1, None] < height[None, :]).astype(float)
+            else:
+                # Column i on the vertical axis (flipped so it increases upwards)
+                panel = np.log1p(counts[i, j])[::-1]
+                panel = panel / max(panel.max(), 1e-12)
+            image[i * step:i * step + bins, j * step:j * step + bins] = panel
+    return image
+
+
+@instrument.timed(kind="render")
+def mosaic_png(sample, ranges, columns, bins=24):
+    """Render the pairwise density grid for ``columns`` as PNG bytes."""
+    from matplotlib.figure import Figure
+
+    image = density_mosaic(pair_histograms(sample, ranges, bins))
+    k = len(columns)
+    size = min(max(4, 0.45 * k + 2), 24)
+    fig = Figure(figsize=(size, size))
+    ax = fig.add_subplot()
+    ax.imshow(image, cmap="viridis", interpolation="nearest")
+    ticks = np.arange(k) * (bins + 2) + bins / 2
+    fontsize = 9 if k <= 12 else 6
+    ax.set_xticks(ticks, columns, rotation=90, fontsize=fontsize)
+    ax.set_yticks(ticks, columns, fontsize=fontsize)
+    ax.set_title("Pairwise density (log counts)")
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=100)
+    return buf.getvalue()
@@ -0,0 +1,203 @@
+"""Inverted text index and bitmap facets over the order history (train.csv).
+
+The index is built once per source version with vectorized pandas/NumPy
+passes and persisted as ``.npy`` files under ``.cache/search``, which are
+memory-mapped when loaded. A query only touches posting lists and packed
+bitmaps, never the order DataFrame itself:
+
+* text fields are tokenized into a sorted vocabulary with CSR posting lists;
+  terms shorter than three characters match by prefix, longer ones by
+  substring through a trigram index over the vocabulary;
+* every facet value has a packed bitmap over all rows, so filters are
+  bitwise ANDs/ORs and facet counts are popcounts.
+"""
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from core import data, registry
+
+SEARCH_DIR = data.CACHE_DIR / "search"
+TEXT_FIELDS = ["Customer Name", "Product Name", "City", "State", "Category", "Sub-Category"]
+FACET_FIELDS = ["Region", "Segment", "Category", "Ship Mode"]
+TOKEN = re.compile(r"[0-9a-z]+")
+NGRAM = 3
+
+
+def tokenize(text):
+    return TOKEN.findall(str(text).lower())
+
+
+def _csr(keys, values, n_keys):
+    """Sort ``values`` by ``keys`` and return ``(offsets, values)``."""
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_keys), out=offsets[1:])
+    return offsets, values[order]
+
+
+def _gather(offsets, values, ids):
+    """Concatenate the CSR rows ``ids`` without a Python loop."""
+    starts, lengths = offsets[ids], offsets[ids + 1] - offsets[ids]
+    total = int(lengths.sum())
+    if total == 0:
+        return values[:0]
+    shift = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return values[shift + np.arange(total)]
+
+
+def _doc_tokens(df):
+    """Unique (doc, token) pairs over all text fields.
+
+    Only distinct field values are tokenized and the tokens are joined back to
+    rows by value code, so the regex cost scales with distinct values.
+    """
+    pairs = []
+    for field in TEXT_FIELDS:
+        codes, uniques = pd.factorize(df[field], use_na_sentinel=True)
+        tokens = pd.Series([tokenize(v) for v in uniques], dtype=object).explode().dropna()
+        by_value = pd.DataFrame({"code": tokens.index.to_numpy(), "token": tokens.to_numpy()})
+        docs = pd.DataFrame({"doc": np.arange(len(codes)), "code": codes})
+        pairs.append(docs.merge(by_value, on="code")[["doc", "token"]])
+    return pd.concat(pairs, ignore_index=True)
+
+
+class SearchIndex:
+    """Posting lists, trigram vocabulary index and facet bitmaps for one table."""
+
+    ARRAYS = ["vocab", "post_offsets", "post_docs", "trigrams", "tri_offsets", "tri_tokens"]
+
+    def __init__(self, n_docs, arrays, facets):
+        self.n_docs = n_docs
+        self.arrays = arrays
+        # field -> (values, packed bitmaps of shape (len(values), ceil(n_docs / 8)))
+        self.facets = facets
+
+    @property
+    def nbytes(self):
+        arrays = list(self.arrays.values()) + [bits for _, bits in self.facets.values()]
+        return int(sum(a.nbytes for a in arrays))
+
+    @classmethod
+    def build(cls, df):
+        n = len(df)
+        pairs = _doc_tokens(df)
+        token_ids, vocab = pd.factorize(pairs["token"], sort=True)
+        keys = np.unique(token_ids.astype(np.int64) * n + pairs["doc"].to_numpy())
+        post_offsets, post_docs = _csr(keys // n, (keys % n).astype(np.int32), len(vocab))
+
+        # Trigram -> vocabulary ids, for substring matches on longer terms
+        tri_pairs = [(g, i) for i, token in enumerate(vocab)
+                     for g in {token[j:j + NGRAM] for j in range(len(token) - NGRAM + 1)}]
+        grams = pd.Series([g for g, _ in tri_pairs], dtype=object)
+        gram_ids, trigrams = pd.factorize(grams, sort=True)
+        tri_offsets, tri_tokens = _csr(gram_ids, np.array([i for _, i in tri_pairs], dtype=np.int32), len(trigrams))
+
+        arrays = {
+            "vocab": np.asarray(vocab, dtype=str),
+            "post_offsets": post_offsets,
+            "post_docs": post_docs,
+            "trigrams": np.asarray(trigrams, dtype=str),
+            "tri_offsets": tri_offsets,
+            "tri_tokens": tri_tokens,
+        }
+        facets = {}
+        for field in FACET_FIELDS:
+            codes, values = pd.factorize(df[field].fillna(""), sort=True)
+            bits = np.packbits(codes[None, :] == np.arange(len(values))[:, None], axis=1)
+            facets[field] = ([str(v) for v in values], bits)
+        return cls(n, arrays, facets)
+
+    def save(self, dest):
+        tmp = dest.with_name(dest.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name, array in self.arrays.items():
+            np.save(tmp / f"{name}.npy", array)
+        meta = {"n_docs": self.n_docs, "facets": {}}
+        for i, (field, (values, bits)) in enumerate(self.facets.items()):
+            np.save(tmp / f"facet{i}.npy", bits)
+            meta["facets"][field] = {"file": f"facet{i}.npy", "values": values}
+        (tmp / "meta.json").write_text(json.dumps(meta))
+        shutil.rmtree(dest, ignore_errors=True)
+        os.replace(tmp, dest)
+
+    @classmethod
+    def load(cls, src):
+        meta = json.loads((src / "meta.json").read_text())
+        arrays = {name: np.load(src / f"{name}.npy", mmap_mode="r") for name in cls.ARRAYS}
+        facets = {
+            field: (info["values"], np.load(src / info["file"], mmap_mode="r"))
+            for field, info in meta["facets"].items()
+        }
+        return cls(meta["n_docs"], arrays, facets)
+
+    def match_tokens(self, term):
+        """Vocabulary ids matching ``term`` (prefix below three characters, else substring)."""
+        vocab = self.arrays["vocab"]
+        if len(term) < NGRAM:
+            lo = np.searchsorted(vocab, term, side="left")
+            hi = np.searchsorted(vocab, term + "\uffff", side="left")
+            return np.arange(lo, hi)
+        trigrams, offsets, tokens = (self.arrays[k] for k in ("trigrams", "tri_offsets", "tri_tokens"))
+        candidates = None
+        for gram in {term[j:j + NGRAM] for j in range(len(term) - NGRAM + 1)}:
+            pos = np.searchsorted(trigrams, gram)
+            if pos == len(trigrams) or trigrams[pos] != gram:
+                return np.empty(0, dtype=np.int64)
+            ids = tokens[offsets[pos]:offsets[pos + 1]]
+            candidates = ids if candidates is None else np.intersect1d(candidates, ids)
+        candidates = np.asarray(candidates, dtype=np.int64)
+        return candidates[np.char.find(vocab[candidates], term) >= 0]
+
+    def text_bits(self, query):
+        """Packed bitmap of rows matching every term of ``query`` (all rows if empty)."""
+        mask = np.ones(self.n_docs, dtype=bool)
+        for term in tokenize(query):
+            docs = _gather(self.arrays["post_offsets"], self.arrays["post_docs"], self.match_tokens(term))
+            term_mask = np.zeros(self.n_docs, dtype=bool)
+            term_mask[docs] = True
+            mask &= term_mask
+        return np.packbits(mask)
+
+    def facet_bits(self, selected, exclude=None):
+        """Packed bitmap of rows passing the facet selections (OR within, AND across)."""
+        bits = np.packbits(np.ones(self.n_docs, dtype=bool))
+        for field, chosen in selected.items():
+            if field == exclude or not chosen:
+                continue
+            values, bitmaps = self.facets[field]
+            idx = [values.index(v) for v in chosen if v in values]
+            bits &= np.bitwise_or.reduce(bitmaps[idx], axis=0) if idx else 0
+        return bits
+
+    def search(self, query, selected):
+        """Matching row positions plus ``{field: {value: count}}`` facet counts.
+
+        Each facet's counts ignore that facet's own selection, so the user can
+        see what widening the selection would add.
+        """
+        text = self.text_bits(query)
+        counts = {}
+        for field, (values, bitmaps) in self.facets.items():
+            base = text & self.facet_bits(selected, exclude=field)
+            counts[field] = dict(zip(values, np.bitwise_count(bitmaps & base).sum(axis=1).tolist()))
+        hits = text & self.facet_bits(selected)
+        return np.flatnonzero(np.unpackbits(hits, count=self.n_docs)), counts
+
+
+def _load_or_build(key):
+    dest = SEARCH_DIR / f"{data.TRAIN_PATH.stem}-{key}"
+    if not (dest / "meta.json").exists():
+        SearchIndex.build(data.load_orders()).save(dest)
+    return SearchIndex.load(dest)
+
+
+def load():
+    """Shared index for the current version of the order file."""
+    key = data.source_key(data.TRAIN_PATH)
+    return registry.get(("search", key), lambda: _load_or_build(key))
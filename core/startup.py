@@ -0,0 +1,101 @@
+"""Background prewarming after login and per-page latency profiling.
+
+Pages only import what they need, and the heavy plotting libraries
+(matplotlib, plotly.express) are imported inside the functions that draw
+with them. Right after login, ``prewarm`` imports those libraries and
+loads the shared datasets into the registry on a daemon thread, so the
+first visit to a page usually finds them ready. It runs once per server
+process; failures (e.g. a missing data file) are recorded, not raised.
+
+``profile`` times every page run. The first run of a page in the process
+is its cold latency, including the modules it imported; later runs are
+warm.
+"""
+import importlib
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+HEAVY_MODULES = ["plotly.express", "matplotlib.figure"]
+# (label, "module:function") loaded in order; resolved on the prewarm thread
+PREWARM_STEPS = [
+    ("Overview", "core.data:load_overview"),
+    ("Trip partitions", "core.data:partition_master"),
+    ("Order rollups", "core.timeseries:order_range"),
+    ("Search index", "core.search_index:load"),
+    ("Alert table", "core.anomaly:alert_table"),
+    ("KPI tables", "core.kpi:materialize_all"),
+]
+
+_LOCK = threading.Lock()
+_PREWARM = None
+_STATUS = {}
+_TIMINGS = {}
+
+
+def _run_prewarm():
+    for name in HEAVY_MODULES:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            _STATUS[f"import {name}"] = (time.perf_counter() - started, None)
+        except Exception as exc:
+            _STATUS[f"import {name}"] = (time.perf_counter() - started, repr(exc))
+    for label, target in PREWARM_STEPS:
+        module, function = target.split(":")
+        started = time.perf_counter()
+        try:
+            getattr(importlib.import_module(module), function)()
+            _STATUS[label] = (time.perf_counter() - started, None)
+        except Exception as exc:
+            _STATUS[label] = (time.perf_counter() - started, repr(exc))
+
+
+def prewarm():
+    """Start the background prewarm once per process; returns its thread."""
+    global _PREWARM
+    with _LOCK:
+        if _PREWARM is None:
+            _PREWARM = threading.Thread(target=_run_prewarm, name="prewarm", daemon=True)
+            _PREWARM.start()
+    return _PREWARM
+
+
+def prewarm_status():
+    """``{step: (seconds, error or None)}`` for the steps finished so far."""
+    return dict(_STATUS)
+
+
+@contextmanager
+def profile(page):
+    """Time one run of ``page``, noting how many modules the run imported."""
+    modules = len(sys.modules)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _LOCK:
+            entry = _TIMINGS.get(page)
+            if entry is None:
+                _TIMINGS[page] = {"cold": elapsed, "imports": len(sys.modules) - modules, "warm": []}
+            else:
+                entry["warm"] = (entry["warm"] + [elapsed])[-100:]
+
+
+def timings():
+    """Per-page cold latency, modules imported on the cold run, and median warm latency."""
+    with _LOCK:
+        rows = [
+            {
+                "Page": page,
+                "Cold [ms]": round(t["cold"] * 1000),
+                "Imports": t["imports"],
+                "Warm [ms]": round(statistics.median(t["warm"]) * 1000) if t["warm"] else None,
+                "Warm runs": len(t["warm"]),
+            }
+            for page, t in _TIMINGS.items()
+        ]
+    return rows
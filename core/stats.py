@@ -0,0 +1,390 @@
+"""One-pass, mergeable summary statistics for the EDA pages.
+
+Each trip partition is summarized once into small sketches per column:
+Welford moments (mean/variance/min/max), a KLL quantile sketch for the
+median, HyperLogLog for distinct counts, pairwise co-moments for the
+correlation matrix and a fixed-size row sample for scatter densities.
+Summaries of several partitions merge without touching
+the raw rows again, so changing the column selection or adding trips only
+combines cached partials.
+"""
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from core import data, instrument, registry
+
+STATS_DIR = data.CACHE_DIR / "stats"
+# Bump when the pickled Summary layout changes so stale partials are rebuilt
+SUMMARY_VERSION = 2
+
+
+class Moments:
+    """Count, mean, sum of squared deviations, min and max (Chan/Welford merge)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        batch = Moments()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        return self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def var(self):
+        # Sample variance, matching pandas' ddof=1
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.var))
+
+
+class KLL:
+    """KLL quantile sketch holding about ``3 * k`` items whatever the input size."""
+
+    def __init__(self, k=512, seed=0):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(self.k * (2 / 3) ** depth), 2)
+
+    def _compress(self):
+        # Compact any level over capacity by keeping every other sorted item at
+        # double weight; adding a level shrinks the lower capacities, so repeat.
+        compacted = True
+        while compacted:
+            compacted = False
+            for level, items in enumerate(self.levels):
+                if len(items) <= self._capacity(level):
+                    continue
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                odd = len(items) % 2
+                promoted = items[odd:][self._rng.integers(2)::2]
+                self.levels[level] = items[:odd]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                compacted = True
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        items = np.concatenate(self.levels)
+        if len(items) == 0:
+            return np.nan
+        weights = np.concatenate([np.full(len(x), 2.0 ** i) for i, x in enumerate(self.levels)])
+        order = np.argsort(items)
+        cum = np.cumsum(weights[order])
+        return float(items[order][min(np.searchsorted(cum, q * cum[-1]), len(items) - 1)])
+
+
+class HyperLogLog:
+    """Distinct-count estimate from ``2 ** p`` one-byte registers."""
+
+    def __init__(self, p=12):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, values):
+        values = pd.Series(values).dropna().to_numpy()
+        if len(values) == 0:
+            return self
+        h = pd.util.hash_array(values)
+        idx = (h >> np.uint64(64 - self.p)).astype(np.intp)
+        rest = h & np.uint64((1 << (64 - self.p)) - 1)
+        # frexp gives the exact bit length since rest < 2**53 for p >= 11
+        _, bits = np.frexp(rest.astype(np.float64))
+        rank = (64 - self.p - bits + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def merge(self, other):
+        self.registers = np.maximum(self.registers, other.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+
+class CoMoments:
+    """Pairwise-complete co-moments of numeric columns, shifted for stability.
+
+    For every pair (i, j) over rows where both are present: ``n`` counts rows,
+    ``s[i, j]`` sums ``x_i``, ``q[i, j]`` sums ``x_i ** 2`` and ``c[i, j]``
+    sums ``x_i * x_j``, all taken around ``shift``.
+    """
+
+    def __init__(self, columns):
+        k = len(columns)
+        self.columns = list(columns)
+        self.shift = np.zeros(k)
+        self.n = np.zeros((k, k))
+        self.s = np.zeros((k, k))
+        self.q = np.zeros((k, k))
+        self.c = np.zeros((k, k))
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        mask = ~np.isnan(X)
+        counts = mask.sum(axis=0)
+        batch = CoMoments(self.columns)
+        batch.shift = np.where(mask, X, 0.0).sum(axis=0) / np.maximum(counts, 1)
+        Z = np.where(mask, X - batch.shift, 0.0)
+        M = mask.astype(np.float64)
+        batch.n = M.T @ M
+        batch.s = Z.T @ M
+        batch.q = (Z * Z).T @ M
+        batch.c = Z.T @ Z
+        return self.merge(batch)
+
+    def _around(self, shift):
+        """``(s, q, c)`` re-expressed around a different shift."""
+        d = (self.shift - shift)[:, None]
+        s = self.s + d * self.n
+        q = self.q + 2 * d * self.s + d * d * self.n
+        c = self.c + self.s * d.T + d * self.s.T + d * d.T * self.n
+        return s, q, c
+
+    def merge(self, other):
+        w1, w2 = np.diag(self.n), np.diag(other.n)
+        shift = np.where(w1 + w2 > 0, (w1 * self.shift + w2 * other.shift) / np.maximum(w1 + w2, 1), 0.0)
+        s1, q1, c1 = self._around(shift)
+        s2, q2, c2 = other._around(shift)
+        self.shift = shift
+        self.n = self.n + other.n
+        self.s, self.q, self.c = s1 + s2, q1 + q2, c1 + c2
+        return self
+
+    def corr(self, columns):
+        idx = [self.columns.index(c) for c in columns]
+        sub = np.ix_(idx, idx)
+        n, s, q, c = self.n[sub], self.s[sub], self.q[sub], self.c[sub]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mi, mj = s / n, s.T / n
+            cov = c / n - mi * mj
+            var_i = np.maximum(q / n - mi * mi, 0)
+            var_j = np.maximum(q.T / n - mj * mj, 0)
+            r = np.clip(cov / np.sqrt(var_i * var_j), -1, 1)
+        r[n < 2] = np.nan
+        return pd.DataFrame(r, index=columns, columns=columns)
+
+
+class Reservoir:
+    """Uniform fixed-size row sample that stays uniform when merged.
+
+    Every row gets a random key and the ``size`` smallest keys are kept
+    (bottom-k sampling), so merging two samples is a concat and a partition.
+    """
+
+    def __init__(self, columns, size=8192, seed=None):
+        self.columns = list(columns)
+        self.size = size
+        self.keys = np.empty(0)
+        self.rows = np.empty((0, len(self.columns)), dtype=np.float32)
+        self._rng = np.random.default_rng(seed)
+
+    def _keep(self, keys, rows):
+        if len(keys) > self.size:
+            best = np.argpartition(keys, self.size)[:self.size]
+            keys, rows = keys[best], rows[best]
+        self.keys, self.rows = keys, rows
+        return self
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        keys = self._rng.random(len(X))
+        return self._keep(np.concatenate([self.keys, keys]), np.concatenate([self.rows, X]))
+
+    def merge(self, other):
+        return self._keep(np.concatenate([self.keys, other.keys]), np.concatenate([self.rows, other.rows]))
+
+    def sample(self, columns):
+        return self.rows[:, [self.columns.index(c) for c in columns]]
+
+
+class ColumnSketch:
+    """All per-column sketches; numeric columns get moments and quantiles."""
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        self.distinct = HyperLogLog()
+        self.moments = Moments() if self.numeric else None
+        self.quantiles = KLL() if self.numeric else None
+
+    def update(self, values):
+        self.distinct.update(values)
+        if self.numeric:
+            values = np.asarray(values, dtype=np.float64)
+            self.moments.update(values)
+            self.quantiles.update(values)
+        return self
+
+    def merge(self, other):
+        self.distinct.merge(other.distinct)
+        if self.numeric:
+            self.moments.merge(other.moments)
+            self.quantiles.merge(other.quantiles)
+        return self
+
+
+class Summary:
+    """Mergeable summary of a DataFrame (or of several partitions of one)."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+        self.comoments = None
+        self.reservoir = None
+
+    @classmethod
+    @instrument.timed(kind="stats")
+    def of(cls, df):
+        summary = cls()
+        summary.rows = len(df)
+        for column in df.columns:
+            summary.columns[column] = ColumnSketch(df[column].dtype).update(df[column].to_numpy())
+        numeric = summary.numeric_columns()
+        summary.comoments = CoMoments(numeric)
+        summary.reservoir = Reservoir(numeric)
+        if numeric:
+            X = df[numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+            summary.comoments.update(X)
+            summary.reservoir.update(X)
+        return summary
+
+    def merge(self, other):
+        if not self.columns:
+            self.columns = {c: ColumnSketch(s.dtype) for c, s in other.columns.items()}
+            self.comoments = CoMoments(other.comoments.columns)
+            self.reservoir = Reservoir(other.reservoir.columns)
+        self.rows += other.rows
+        for column, sketch in other.columns.items():
+            self.columns[column].merge(sketch)
+        self.comoments.merge(other.comoments)
+        self.reservoir.merge(other.reservoir)
+        return self
+
+    def numeric_columns(self):
+        return [c for c, s in self.columns.items() if s.numeric]
+
+    def nunique(self, column):
+        return self.columns[column].distinct.estimate()
+
+    def describe(self, columns):
+        """Mean/Median/Min/Max/Std Dev for the numeric ``columns``."""
+        rows = {}
+        for column in columns:
+            sketch = self.columns[column]
+            if not sketch.numeric:
+                continue
+            m = sketch.moments
+            rows[column] = {
+                "Mean": m.mean if m.count else np.nan,
+                "Median": sketch.quantiles.quantile(0.5),
+                "Min": m.min if m.count else np.nan,
+                "Max": m.max if m.count else np.nan,
+                "Std Dev": m.std,
+            }
+        return pd.DataFrame.from_dict(rows, orient="index", columns=["Mean", "Median", "Min", "Max", "Std Dev"])
+
+    def corr(self, columns):
+        return self.comoments.corr(list(columns))
+
+    def sample(self, columns):
+        """Up to ``Reservoir.size`` uniformly sampled rows of numeric ``columns``."""
+        return self.reservoir.sample(list(columns))
+
+    def ranges(self, columns):
+        return np.array([[self.columns[c].moments.min, self.columns[c].moments.max] for c in columns])
+
+
+@instrument.timed(kind="stats")
+def frame_summary(df, key):
+    """Summary of a whole frame, kept in the shared registry under ``key``."""
+    return registry.get(("summary", key), lambda: Summary.of(df))
+
+
+def _load_partition_summary(entry, path):
+    cached = STATS_DIR / f"{entry['fingerprint']}-v{SUMMARY_VERSION}.pkl"
+    if cached.exists():
+        return pickle.loads(cached.read_bytes())
+    summary = Summary.of(data.to_pandas(data.read_trip(entry["trip"], path)))
+    STATS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = cached.with_suffix(".tmp")
+    tmp.write_bytes(pickle.dumps(summary))
+    tmp.replace(cached)
+    return summary
+
+
+def partition_summary(entry, path=data.MASTER_PATH):
+    """Summary of one trip partition, cached on disk by its content fingerprint."""
+    key = ("summary", entry["fingerprint"])
+    return registry.get(key, lambda: _load_partition_summary(entry, path))
+
+
+@instrument.timed(kind="stats")
+def trips_summary(trips, path=data.MASTER_PATH):
+    """Merged summary of the given trips; only partitions never seen are scanned."""
+    wanted = set(trips)
+    entries = [e for e in data.list_trips(path) if e["trip"] in wanted]
+
+    def merge():
+        summary = Summary()
+        for entry in entries:
+            summary.merge(partition_summary(entry, path))
+        return summary
+
+    key = ("summary", tuple(e["fingerprint"] for e in entries))
+    return registry.get(key, merge)
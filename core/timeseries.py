@@ -0,0 +1,216 @@
+"""Multi-resolution rollups for the time-series pages.
+
+Order sales are rolled up once per source version into day/week/month
+tables by Region/Segment/Category/State, and every trip partition into 1 s, 10 s
+and 1 min bins per channel. The rollups are stored as Arrow files under
+``.cache/timeseries``. Range and granularity changes are answered from the
+nearest stored level (coarser levels such as quarters are re-aggregated
+from months), so no raw rows are resampled on a slider move.
+
+Only mergeable aggregates are stored (sum, count, min, max); means are
+derived when a series is read.
+"""
+import pandas as pd
+import pyarrow as pa
+
+from core import data, instrument, registry
+
+TS_DIR = data.CACHE_DIR / "timeseries"
+# Bumped whenever the stored rollup layout changes
+ROLLUP_VERSION = 2
+
+# Order rollups: stored levels, and levels derived from a stored one
+ORDER_LEVELS = {"Day": "D", "Week": "W", "Month": "M"}
+DERIVED_LEVELS = {"Quarter": ("Q", "Month"), "Year": ("Y", "Month")}
+ORDER_DIMS = ["Region", "Segment", "Category", "State"]
+ORDER_MEASURES = {"Sales": "Sales", "Order lines": "Lines"}
+# Approximate days per period, for picking a level from a date range
+PERIOD_DAYS = {"Day": 1, "Week": 7, "Month": 30.4, "Quarter": 91.3, "Year": 365.25}
+
+# Trip rollups in seconds, each built from the previous one
+TRIP_LEVELS = {"1 s": 1, "10 s": 10, "1 min": 60}
+
+
+def _period_start(dates, freq):
+    return dates.dt.to_period(freq).dt.start_time
+
+
+def _build_order_level(df, level):
+    frame = df[ORDER_DIMS + ["Sales"]].copy()
+    frame["Period"] = _period_start(df["Order Date"], ORDER_LEVELS[level])
+    frame["Lines"] = 1
+    return frame.groupby(["Period"] + ORDER_DIMS, observed=True, as_index=False)[["Sales", "Lines"]].sum()
+
+
+def _cached_table(name, build):
+    """Arrow file ``name`` under TS_DIR, built on first use and shared via the registry."""
+    def load():
+        path = TS_DIR / f"{name}.arrow"
+        if not path.exists():
+            data.write_table(pa.Table.from_pandas(build(), preserve_index=False), path)
+        return data.to_pandas(data.read_table(path))
+    return registry.get(("timeseries", name), load)
+
+
+def order_rollup(level):
+    """Stored rollup table for ``Day``, ``Week`` or ``Month``."""
+    key = data.source_key(data.TRAIN_PATH)
+    return _cached_table(f"orders-v{ROLLUP_VERSION}-{key}-{level}", lambda: _build_order_level(data.load_orders(), level))
+
+
+def order_range():
+    days = order_rollup("Day")["Period"]
+    return days.min(), days.max()
+
+
+def auto_level(start, end, max_points=400):
+    """Finest order level that draws at most ``max_points`` periods for the range."""
+    days = (end - start).days + 1
+    for level, per in PERIOD_DAYS.items():
+        if days / per <= max_points:
+            return level
+    return "Year"
+
+
+@instrument.timed(kind="stats")
+def order_series(level, start, end, measure="Sales", by=None, filters=None):
+    """Wide frame of ``measure`` per period (one column per ``by`` value, or ``Total``)."""
+    if level in DERIVED_LEVELS:
+        freq, source = DERIVED_LEVELS[level]
+    else:
+        freq, source = None, level
+    table = order_rollup(source)
+    period = table["Period"] if freq is None else _period_start(table["Period"], freq)
+    # Periods are labelled by their start, so the one containing ``start`` begins before it
+    first = _period_start(pd.Series([pd.Timestamp(start)]), freq or ORDER_LEVELS[source])[0]
+    keep = (period >= first) & (period <= pd.Timestamp(end))
+    for dim, values in (filters or {}).items():
+        if values:
+            keep &= table[dim].isin(values)
+    table, period = table[keep], period[keep]
+    column = ORDER_MEASURES[measure]
+    if by:
+        series = table.groupby([period, table[by]], observed=True)[column].sum().unstack(fill_value=0)
+    else:
+        series = table.groupby(period)[column].sum().to_frame("Total")
+    series.index.name = "Period"
+    return series
+
+
+def _rollup_trip(df, seconds):
+    """Sum/count/min/max of every channel per ``seconds``-wide time bin."""
+    bins = (df[data.TIME_COLUMN] // seconds).astype("int64")
+    channels = df.drop(columns=[data.TIME_COLUMN]).select_dtypes("number")
+    grouped = channels.groupby(bins.rename("bin"))
+    parts = {stat: getattr(grouped, stat)() for stat in ("sum", "count", "min", "max")}
+    return pd.concat(parts, axis=1)
+
+
+def _coarsen(rollup, factor):
+    how = {col: col[0] if col[0] in ("min", "max") else "sum" for col in rollup.columns}
+    return rollup.groupby(rollup.index // factor).agg(how)
+
+
+def _build_trip_levels(df):
+    """Every TRIP_LEVELS rollup of one trip, flattened into a single table."""
+    flat, previous, prev_seconds = [], None, None
+    for name, seconds in TRIP_LEVELS.items():
+        if previous is None:
+            previous = _rollup_trip(df, seconds)
+        else:
+            previous = _coarsen(previous, seconds // prev_seconds)
+        prev_seconds = seconds
+        level = previous.copy()
+        level.columns = [f"{stat}|{channel}" for stat, channel in level.columns]
+        flat.append(level.reset_index().assign(level=name))
+    return pd.concat(flat, ignore_index=True)
+
+
+def trip_rollups(entry, path=data.MASTER_PATH):
+    """All stored levels for one trip partition as ``{level: rollup}``.
+
+    Rollup columns are ``(stat, channel)`` pairs indexed by time bin.
+    """
+    def load():
+        file = TS_DIR / f"trip-{entry['fingerprint']}.arrow"
+        if not file.exists():
+            df = data.to_pandas(data.read_trip(entry["trip"], path))
+            data.write_table(pa.Table.from_pandas(_build_trip_levels(df), preserve_index=False), file)
+        flat = data.to_pandas(data.read_table(file))
+        levels = {}
+        for name, rows in flat.groupby("level", sort=False):
+            rollup = rows.drop(columns="level").set_index("bin")
+            rollup.columns = pd.MultiIndex.from_tuples([tuple(c.split("|", 1)) for c in rollup.columns])
+            levels[name] = rollup
+        return levels
+
+    return registry.get(("timeseries", "trip", entry["fingerprint"]), load)
+
+
+def trip_duration(trips, path=data.MASTER_PATH):
+    """Approximate length in seconds of the given trips, from the coarsest rollup."""
+    name, seconds = list(TRIP_LEVELS.items())[-1]
+    wanted = set(trips)
+    total = 0
+    for entry in data.list_trips(path):
+        if entry["trip"] in wanted:
+            index = trip_rollups(entry, path)[name].index
+            total += (index.max() - index.min() + 1) * seconds
+    return float(total)
+
+
+def auto_trip_level(duration, max_points=2000):
+    """Finest trip level that draws at most ``max_points`` bins for ``duration`` seconds."""
+    for name, seconds in TRIP_LEVELS.items():
+        if duration / seconds <= max_points:
+            return name
+    return name
+
+
+@instrument.timed(kind="stats")
+def trip_series(trips, level, channels, path=data.MASTER_PATH):
+    """Mean, ``(min)`` and ``(max)`` columns of ``channels`` per bin over consecutive trips.
+
+    Trips are laid end to end on an ``Elapsed [s]`` axis.
+    """
+    seconds = TRIP_LEVELS[level]
+    wanted = set(trips)
+    frames, offset = [], 0.0
+    for entry in data.list_trips(path):
+        if entry["trip"] not in wanted:
+            continue
+        rollup = trip_rollups(entry, path)[level]
+        start = rollup.index.min()
+        frame = pd.DataFrame(index=(rollup.index - start) * seconds + offset)
+        for channel in channels:
+            frame[channel] = rollup[("sum", channel)].to_numpy() / rollup[("count", channel)].to_numpy()
+            frame[f"{channel} (min)"] = rollup[("min", channel)].to_numpy()
+            frame[f"{channel} (max)"] = rollup[("max", channel)].to_numpy()
+        frame["Trip"] = entry["trip"]
+        frames.append(frame)
+        offset = frame.index.max() + seconds
+    if not frames:
+        return pd.DataFrame()
+    series = pd.concat(frames)
+    series.index.name = "Elapsed [s]"
+    return series
+
+
+@instrument.timed(kind="stats")
+def trip_matrix(trips, level, channel, path=data.MASTER_PATH):
+    """Mean of ``channel`` per bin with one column per trip, aligned on elapsed time.
+
+    Shorter trips are padded with NaN.
+    """
+    seconds = TRIP_LEVELS[level]
+    wanted = set(trips)
+    columns = {}
+    for entry in data.list_trips(path):
+        if entry["trip"] not in wanted:
+            continue
+        rollup = trip_rollups(entry, path)[level]
+        mean = rollup[("sum", channel)].to_numpy() / rollup[("count", channel)].to_numpy()
+        columns[entry["trip"]] = pd.Series(mean, index=(rollup.index - rollup.index.min()) * seconds)
+    matrix = pd.DataFrame(columns)
+    matrix.index.name = "Elapsed [s]"
+    return matrix
@@ -0,0 +1,21 @@
+"""Streamlit widgets shared by several pages."""
+import streamlit as st
+
+from core import data
+
+
+def trip_window(key, label="Trips"):
+    """Select one trip or a contiguous window of trips; returns the trip labels.
+
+    Only the chosen partitions are loaded, so the master file is never
+    materialized as a whole. Stops the page if the trip CSV is missing and
+    returns no trips if it has no rows.
+    """
+    if not data.MASTER_PATH.exists():
+        st.warning(f"Trip data not found: {data.MASTER_PATH}")
+        st.stop()
+    trips = [t["trip"] for t in data.list_trips()]
+    if len(trips) <= 1:
+        return trips
+    first, last = st.select_slider(label, options=trips, value=(trips[0], trips[0]), key=key)
+    return trips[trips.index(first):trips.index(last) + 1]
@@ -1,5 +1,18 @@
+import uuid
+
+import pandas as pd
 import streamlit as st
 
+from core import history as history_store
+from core import instrument, registry, startup
+
+# Frames from the shared registry are handed out as shallow copies; with
+# copy-on-write an edit on a page never writes through to other sessions
+pd.set_option("mode.copy_on_write", True)
+
+# Page config must come before any other element, so it is set once here for every page
+st.set_page_config(layout="wide")
+
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 
@@ -55,7 +68,41 @@ if st.session_state.logged_in:
         }
     )
     
+    # Load shared datasets and heavy libraries in the background after login
+    startup.prewarm()
+    # Prometheus endpoint for the instrumented stages (once per process)
+    instrument.serve()
+
+    # Shared dataset cache counters (process-wide, all sessions)
+    with st.sidebar.expander("Data cache"):
+        st.write(registry.REGISTRY.stats())
+        st.write({step: f"{seconds:.2f} s" + (f" ({error})" if error else "")
+                  for step, (seconds, error) in startup.prewarm_status().items()})
+
+    # Cold (first run in this process) and warm latency per page
+    with st.sidebar.expander("Page timings"):
+        st.dataframe(startup.timings(), hide_index=True, use_container_width=True)
+    show_timings = st.sidebar.toggle("Show rerun timings", key="instrument_panel")
+
+    # Every run is recorded with its selections and the cached results it read
+    history_store.PAGES.update({p.title: p for p in [
+        dashboard, bugs, alerts, search, history, eda, data_preprocessing, feature_engineering,
+        statistical_analysis, trend_cycle_analysis, time_series_analysis, visualization, predictive_modeling,
+    ]})
+    session = st.session_state.setdefault("history_session", uuid.uuid4().hex)
+    # Widgets created so far belong to the shell; only the page's own are recorded
+    shell_keys = history_store.widget_keys()
+    with registry.trace() as results, startup.profile(pg.title), instrument.rerun(pg.title) as timing:
+        try:
+            pg.run()
+        finally:
+            page_keys = history_store.widget_keys() - shell_keys
+            history_store.record(session, pg.title, history_store.selections(st.session_state, page_keys), results)
+
+    # Stage timings, rendered bytes and registry lookups of the run above
+    if show_timings:
+        instrument.panel(timing)
+
 else:
     pg = st.navigation([login_page])
-
-pg.run()
\ No newline at end of file
+    pg.run()
\ No newline at end of file
@@ -1,56 +1,75 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-import os
-import glob
 
-# Set Streamlit page layout and title
-st.set_page_config(layout="wide")
+from core import anomaly, data, grid, instrument, plotting, widgets
+
 st.title("Battery Data Analytics")
 
-# Load and display overview Excel data
-@st.cache_data
-def load_overview():
-    df_overview = pd.read_excel('Inputdata/MeasurementData/Overview.xlsx')
-    df_overview = df_overview.drop(['Unnamed: 13', 'Note'], axis=1)
-    df_overview = df_overview.dropna()
-    df_overview.rename(columns={'Unnamed: 8': 'SoC difference'}, inplace=True)
-    return df_overview
+# Alert events from the indexed alert table; only trips never scanned are read
+st.write("### Alerts")
+if not data.MASTER_PATH.exists():
+    st.warning(f"Trip data not found: {data.MASTER_PATH}")
+else:
+    alerts = anomaly.alert_table()
+    kind_col, severity_col, channel_col = st.columns(3)
+    with kind_col:
+        kinds = st.multiselect("Check", anomaly.KINDS, key="alerts_kinds")
+    with severity_col:
+        severities = st.multiselect("Severity", ["Critical", "Warning"], key="alerts_severities")
+    with channel_col:
+        channels = st.multiselect("Channel", list(alerts["Channel"].cat.categories), key="alerts_channels")
+    shown = anomaly.filter_alerts(alerts, kinds=kinds, severities=severities, channels=channels)
+
+    count_col, critical_col, trips_col = st.columns(3)
+    count_col.metric("Alerts", f"{len(shown):,}")
+    critical_col.metric("Critical", f"{int((shown['Severity'] == 'Critical').sum()):,}")
+    trips_col.metric("Trips affected", f"{shown['Trip'].nunique():,}")
+    # Newest trips first
+    st.dataframe(shown.iloc[::-1], hide_index=True, use_container_width=True)
 
+# Load and display overview Excel data (shared, Arrow-cached copy)
 st.write("### Overview Data")
-df_overview = load_overview()
+df_overview = data.load_overview()
 st.dataframe(df_overview)
 
 
 
-# Load and process df_master (make sure to define how to load it)
-@st.cache_data
-def load_master():
-    df_master = pd.read_csv('Inputdata/MeasurementData/CombinedTripData_utf8.csv', encoding='utf-8')  
-    
-    return df_master
-
+# Load only the selected trip(s) from the per-trip partitions; the table
+# itself is filtered, sorted and paged server-side
 st.write("### Master Data")
-df_master = load_master()
-st.dataframe(df_master)
+trips = widgets.trip_window(key="alerts_trips")
+if not trips:
+    st.info("The trip data has no rows yet.")
+    st.stop()
+df_master = data.load_trips(trips)
+grid.data_grid(grid.trips_source(trips), key="alerts_grid")
 
 # Print the remaining column names
 st.write("### Remaining Columns in Master Data")
 remaining_columns = list(df_master.columns.values)
 st.write(remaining_columns)  # Display the column names in Streamlit
 
-# Define the plotting function (if not already defined)
-def plot_dataframe_subplots(df, nrows, ncols, figsize):
-    fig, axes = plt.subplots(nrows=nrows, ncols=ncols, figsize=figsize)
-    for i, column in enumerate(df.columns):
-        ax = axes[i // ncols, i % ncols]
-        df[column].plot(ax=ax, title=column)
-        ax.set_xlabel('Index')
-        ax.set_ylabel(column)
-    plt.tight_layout()
-    st.pyplot(fig)  # Use Streamlit to display the plot
-    
-# Plot results of all trips
+# Decimated points for one column and sample range. Cached per (trips, column,
+# zoom range, width) so reruns and repeated zoom levels are cache hits.
+@st.cache_data(max_entries=512)
+def column_points(source, trips, column, start, stop, width_px):
+    return plotting.decimate(data.load_trips(trips)[column].to_numpy(), width_px, start, stop)
+
+def plot_dataframe_subplots(df, trips, ncols, start, stop, width_px):
+    columns = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    source = data.source_key(data.MASTER_PATH)
+    points = {c: column_points(source, tuple(trips), c, start, stop, width_px // ncols) for c in columns}
+    instrument.plotly_chart(plotting.signal_grid(points, ncols=ncols), "alerts.signal_grid", use_container_width=True)
+
+# Plot results of the selected trips
 st.write("### Trip Data Plots")
-plot_dataframe_subplots(df_master, nrows=12, ncols=4, figsize=(30, 48))
\ No newline at end of file
+if df_master.empty:
+    st.info("The selected trips have no samples to plot.")
+    st.stop()
+zoom_col, width_col = st.columns([3, 1])
+with zoom_col:
+    # Narrowing the range re-decimates at full screen resolution
+    start, stop = st.slider("Sample range", 0, len(df_master), (0, len(df_master)), key="alerts_range")
+with width_col:
+    width_px = st.select_slider("Plot width (px)", options=[800, 1200, 1600, 2400, 3200], value=1600, key="alerts_width")
+plot_dataframe_subplots(df_master, trips, ncols=4, start=start, stop=max(stop, start + 1), width_px=width_px)
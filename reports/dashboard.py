@@ -1,17 +1,14 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
 
-# Set up the page layout
-st.set_page_config(layout="wide")
+from core import figures, instrument, kpi
 
 # Sidebar menu
 st.sidebar.title("Menu")
-menu_option = st.sidebar.selectbox("Choose a section", ["Overview", "Data", "Analysis", "Settings"])
+menu_option = st.sidebar.selectbox("Choose a section", ["Overview", "Data", "Analysis", "Settings"], key="dashboard_section")
 
 # Day/Night Mode Toggle
-theme_mode = st.sidebar.radio("Select Theme Mode", ["Day Mode", "Night Mode"])
+theme_mode = st.sidebar.radio("Select Theme Mode", ["Day Mode", "Night Mode"], key="dashboard_theme")
 
 # Set theme colors
 if theme_mode == "Day Mode":
@@ -40,16 +37,54 @@ st.markdown(f"""
 # Main dashboard area
 st.title("Dashboard")
 
-# Sample data for visualization and table
+# KPIs from the materialized aggregate tables (core.kpi); only these small
+# tables are read here, never the raw order or trip rows
+def kpi_text(name, spec, prefix=""):
+    """A KPI formatted with ``spec``, or a dash when there is nothing to aggregate."""
+    value = kpi.value(name)
+    return "–" if value is None or pd.isna(value) else f"{prefix}{value:{spec}}"
+
+
 data = pd.DataFrame({
-    'Metric': ['Metric A', 'Metric B', 'Metric C', 'Metric D'],
-    'Value': [np.random.randint(100, 500) for _ in range(4)]
+    'Metric': ['Total sales', 'Order lines', 'Trips', 'Mean SoC difference'],
+    'Value': [
+        kpi_text('Total sales', ',.0f', prefix='$'),
+        kpi_text('Order lines', ',.0f'),
+        kpi_text('Trips', ',.0f'),
+        kpi_text('Mean SoC difference', '.1%'),
+    ],
 })
-
-chart_data = pd.DataFrame(
-    np.random.randn(10, 2),
-    columns=['Value 1', 'Value 2']
-)
+monthly_sales = kpi.table("Sales by month")
+region_sales = kpi.table("Sales by region")
+series_soc = kpi.table("Mean SoC difference by trip series")
+segment_sales = kpi.table("Sales by segment and category").pivot(index="Segment", columns="Category", values="Value")
+
+# Chart drawing functions; they fill an empty matplotlib Figure that is
+# rendered off-thread and cached by (chart, KPI table hash, theme, chart type)
+def style_axes(ax, chart_background, text_color):
+    ax.set_facecolor(chart_background)
+    ax.spines['bottom'].set_color(text_color)
+    ax.spines['left'].set_color(text_color)
+    ax.tick_params(axis='x', colors=text_color)
+    ax.tick_params(axis='y', colors=text_color)
+
+def draw_monthly_sales(fig, monthly_sales, chart_type, chart_background, text_color):
+    ax = fig.add_subplot()
+    style_axes(ax, chart_background, text_color)
+    if chart_type == "Line Chart":
+        ax.plot(monthly_sales['Month'], monthly_sales['Value'], label="Sales", color="tab:blue")
+    else:
+        ax.bar(monthly_sales['Month'], monthly_sales['Value'], width=20, label="Sales", color="tab:blue")
+    ax.set_title(label="Sales by month", fontsize=12, color=text_color, pad=20.0, loc='left')
+    fig.autofmt_xdate()
+
+def draw_bars(fig, table, label_column, title, color, chart_background, text_color):
+    ax = fig.add_subplot()
+    style_axes(ax, chart_background, text_color)
+    ax.bar(table[label_column].astype(str), table['Value'], color=color)
+    ax.set_title(label=title,
+      fontsize=12,
+      color=text_color, pad=20.0, loc='left')
 
 # Row 1: Display summary stats in 4 columns with consistent styling
 #st.subheader("Summary Statistics")
@@ -67,30 +102,28 @@ col5, col6 = st.columns(2)
 with col5:
     with st.container():
         #st.markdown(f"<h4 style='color:{text_color};'>Chart</h4>", unsafe_allow_html=True)
-        chart_type = st.selectbox("Select Chart Type", ["Line Chart", "Bar Chart"])
-        fig, ax = plt.subplots(facecolor=chart_background)
-        ax.set_facecolor(chart_background)
-        
-        # Set chart color styling
-        ax.spines['bottom'].set_color(text_color)
-        ax.spines['left'].set_color(text_color)
-        ax.tick_params(axis='x', colors=text_color)
-        ax.tick_params(axis='y', colors=text_color)
-        
-        if chart_type == "Line Chart":
-            ax.plot(chart_data.index, chart_data['Value 1'], label="Value 1", color="tab:blue")
-            ax.plot(chart_data.index, chart_data['Value 2'], label="Value 2", color="tab:orange")
-        else:
-            ax.bar(chart_data.index, chart_data['Value 1'], label="Value 1", color="tab:blue")
-            ax.bar(chart_data.index, chart_data['Value 2'], label="Value 2", color="tab:orange")
-        ax.legend()
-        st.pyplot(fig)
+        chart_type = st.selectbox("Select Chart Type", ["Line Chart", "Bar Chart"], key="dashboard_chart")
+
+# Render every chart of the page in the figure pool at once
+style = (chart_background, text_color)
+sales_png, region_png, soc_png = figures.render_all([
+    (("monthly sales", figures.data_hash(monthly_sales), theme_mode, chart_type), draw_monthly_sales,
+     (monthly_sales, chart_type, *style), chart_background),
+    (("region sales", figures.data_hash(region_sales), theme_mode), draw_bars,
+     (region_sales, 'Region', "Sales by region", "tab:blue", *style), chart_background),
+    (("series soc", figures.data_hash(series_soc), theme_mode), draw_bars,
+     (series_soc, 'Trip series', "Mean SoC difference by trip series", "tab:orange", *style), chart_background),
+])
+
+with col5:
+    with st.container():
+        instrument.image(sales_png, "dashboard.monthly_sales", use_column_width=True)
 
 # Second column: Data Table in container
 with col6:
     with st.container():
-        st.markdown(f"<p style='color:{text_color};'>Chart</p>", unsafe_allow_html=True)
-        styled_data = chart_data.style.set_properties(**{
+        st.markdown(f"<p style='color:{text_color};'>Sales by segment and category</p>", unsafe_allow_html=True)
+        styled_data = segment_sales.style.format("{:,.0f}").set_properties(**{
             'background-color': background_color,
             'color': text_color
         })
@@ -106,32 +139,10 @@ col7, col8 = st.columns(2)
 with col7:
     with st.container():
         #st.markdown(f"<div class='container-box'><h4>{metric}</h4><p style='font-size:24px;'><strong>{value}</strong></p></div>", unsafe_allow_html=True)
-        fig2, ax2 = plt.subplots(facecolor=chart_background)
-        ax2.set_facecolor(chart_background)
-        ax2.plot(chart_data.index, chart_data['Value 2'], color="tab:orange")
-        ax2.spines['bottom'].set_color(text_color)
-        ax2.spines['left'].set_color(text_color)
-        ax2.tick_params(axis='x', colors=text_color)
-        ax2.tick_params(axis='y', colors=text_color)
-        ax2.set_title(label="ReLU function graph",
-          fontsize=12,
-          color=text_color, pad='20.0', loc='left')
-        st.pyplot(fig2)
+        instrument.image(region_png, "dashboard.region_sales", use_column_width=True)
 
 # Second chart in Row 3
 with col8:
     with st.container():
         #st.markdown(f"<div class='container-box'><h4>{metric}</h4><p style='font-size:24px;'><strong>{value}</strong></p></div>", unsafe_allow_html=True)
-        fig2, ax2 = plt.subplots(facecolor=chart_background)
-        ax2.set_facecolor(chart_background)
-        ax2.plot(chart_data.index, chart_data['Value 2'], color="tab:orange")
-        ax2.spines['bottom'].set_color(text_color)
-        ax2.spines['left'].set_color(text_color)
-        ax2.tick_params(axis='x', colors=text_color)
-        ax2.tick_params(axis='y', colors=text_color)
-        ax2.set_title(label="ReLU function graph",
-          fontsize=12,
-          color=text_color, pad='20.0', loc='left')
-        st.pyplot(fig2)
-
-
+        instrument.image(soc_png, "dashboard.series_soc", use_column_width=True)
@@ -0,0 +1,26 @@
+"""Small synthetic trip data and a private cache for every test session.
+
+core.data reads its paths at import time, so they are set here, before any
+test module imports core. Order checks run against the real train.csv.
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from benchmarks import generate
+
+ROWS = 30_000
+TRIPS = 3
+CHANNELS = 8
+
+_SCRATCH = Path(tempfile.mkdtemp(prefix="app-tests-"))
+generate.generate(_SCRATCH / "data", ROWS, TRIPS, CHANNELS, missing=0.01)
+os.environ["MEASUREMENT_DATA_DIR"] = str(_SCRATCH / "data")
+os.environ["APP_CACHE_DIR"] = str(_SCRATCH / "cache")
+os.environ.pop("TRAIN_DATA", None)
+os.environ["METRICS_PORT"] = "0"
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_SCRATCH, ignore_errors=True)
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import anomaly, data
+
+WINDOW = 40
+
+
+@pytest.fixture
+def signals():
+    rng = np.random.default_rng(3)
+    X = np.cumsum(rng.normal(size=(437, 3)), axis=0)
+    X[::97, 0] += 30
+    X[rng.choice(437, 20, replace=False), 1] = np.nan
+    X[:, 2] = np.round(X[:, 2])
+    return X
+
+
+def test_rolling_zscore_matches_loop(signals):
+    X = signals
+    scale = np.nanstd(X, axis=0)
+    z = anomaly.rolling_zscore(X, WINDOW, scale)
+    for i in range(len(X)):
+        for j in range(X.shape[1]):
+            past = X[max(i - WINDOW, 0):i, j]
+            past = past[~np.isnan(past)]
+            if np.isnan(X[i, j]) or len(past) < max(WINDOW // 10, 2):
+                assert z[i, j] == 0
+                continue
+            std = max(past.std(), 0.05 * scale[j], 1e-12)
+            assert z[i, j] == pytest.approx(abs(X[i, j] - past.mean()) / std, rel=1e-6, abs=1e-9)
+
+
+def test_block_mad_score_matches_loop(signals):
+    X = signals[:, [0, 2]]
+    scale = X.std(axis=0)
+    score = anomaly.block_mad_score(X, WINDOW, scale)
+    for lo in range(0, len(X), WINDOW):
+        block = X[lo:lo + WINDOW].astype(np.float32)
+        deviation = np.abs(block - np.median(block, axis=0))
+        mad = np.maximum(1.4826 * np.median(deviation, axis=0), 0.05 * scale)
+        np.testing.assert_allclose(score[lo:lo + WINDOW], deviation / mad, rtol=1e-5)
+
+
+def test_rate_score_matches_loop(signals):
+    X = signals[:, [0, 2]]
+    scale = X.std(axis=0)
+    score = anomaly.rate_score(X, scale)
+    for j in range(X.shape[1]):
+        change = np.abs(np.diff(X[:, j], prepend=X[0, j]))
+        typical = max(np.median(change), 0.01 * scale[j])
+        np.testing.assert_allclose(score[:, j], change / typical)
+
+
+def test_limit_score():
+    X = np.array([[50.0, 5.0], [40.0, 20.0], [45.0, 10.0]])
+    score = anomaly.limit_score(X, ["Battery Temperature [°C]", "SoC [%]"])
+    np.testing.assert_allclose(score, [[1 + 5 / 45, 1 + 5 / 10], [0, 0], [0, 0]])
+
+
+def brute_force_events(score, threshold):
+    """(column, start, end) of every run of consecutive samples at or over ``threshold``."""
+    runs = []
+    for j in range(score.shape[1]):
+        start = None
+        for i, flagged in enumerate(list(score[:, j] >= threshold) + [False]):
+            if flagged and start is None:
+                start = i
+            elif not flagged and start is not None:
+                runs.append((j, start, i - 1))
+                start = None
+    return sorted(runs)
+
+
+def test_events_split_runs_like_a_loop():
+    rng = np.random.default_rng(5)
+    score = rng.exponential(size=(300, 4))
+    X = rng.normal(size=(300, 4))
+    times = np.arange(300) * 0.5
+    columns = ["a", "b", "c", "d"]
+    events = anomaly._events(score, 1.5, X, times, columns, "Z-score", critical=2.0)
+    expected = brute_force_events(score, 1.5)
+    got = sorted(zip(events["Channel"].map(columns.index), (events["Start [s]"] / 0.5).astype(int),
+                     (events["End [s]"] / 0.5).astype(int)))
+    assert got == expected
+    for _, event in events.iterrows():
+        j = columns.index(event["Channel"])
+        lo, hi = int(event["Start [s]"] / 0.5), int(event["End [s]"] / 0.5) + 1
+        assert event["Samples"] == hi - lo
+        assert event["Score"] == score[lo:hi, j].max()
+        assert event["Peak"] == X[lo + score[lo:hi, j].argmax(), j]
+        assert event["Severity"] == ("Critical" if event["Score"] >= 3.0 else "Warning")
+
+
+def test_scan_skips_state_channels():
+    n = 5000
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        data.TIME_COLUMN: np.arange(n) * 0.1,
+        "Heater Signal": (np.arange(n) // 50 % 2).astype(float),
+        "Velocity [km/h]": rng.normal(50, 1, n),
+    })
+    df.loc[2500, "Velocity [km/h]"] = 500
+    events = anomaly.scan(df)
+    assert set(events["Channel"]) == {"Velocity [km/h]"}
+    assert (events["Start [s]"] <= 250.0).all() and (events["End [s]"] >= 250.0).all()
@@ -0,0 +1,69 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import data
+
+
+@pytest.fixture
+def interleaved_csv(tmp_path):
+    """Eight trips whose rows alternate in blocks of 100, with a channel integral until the last rows."""
+    n = 40_000
+    rng = np.random.default_rng(0)
+    trip = np.repeat(np.arange(1, 9), n // 8)
+    rng.shuffle(trip.reshape(-1, 100))
+    count = np.arange(n, dtype=np.float64)
+    count[-3] = 0.5
+    df = pd.DataFrame({
+        "Trip": [f"Trip {t}" for t in trip],
+        "Time [s]": np.arange(n) * 0.1,
+        "Count": [f"{v:g}" for v in count],
+        "Signal": rng.integers(0, 2, n),
+    })
+    path = tmp_path / "master.csv"
+    df.to_csv(path, index=False)
+    return path, pd.read_csv(path)
+
+
+def test_partitions_match_source_rows_with_few_open_writers(interleaved_csv, tmp_path, monkeypatch):
+    path, source = interleaved_csv
+    monkeypatch.setattr(data, "MAX_OPEN_WRITERS", 2)
+    manifest = data._partition(path, tmp_path / "trips", chunk_bytes=1 << 16)
+    files = sorted(p.name for p in (tmp_path / "trips").iterdir())
+    assert files == [f"{i:05d}.arrow" for i in range(8)] + ["manifest.json"]
+    assert [t["trip"] for t in manifest["trips"]] == list(dict.fromkeys(source["Trip"]))
+    for entry in manifest["trips"]:
+        table = data.read_table(tmp_path / "trips" / entry["file"])
+        expected = source[source["Trip"] == entry["trip"]]
+        assert entry["rows"] == table.num_rows == len(expected)
+        got = data.to_pandas(table)
+        # Rows keep their source order within a trip
+        np.testing.assert_allclose(got["Time [s]"].to_numpy(), expected["Time [s]"].to_numpy(), rtol=1e-12)
+        np.testing.assert_allclose(got["Count"].to_numpy(), expected["Count"].to_numpy())
+        assert entry["fingerprint"] == data.fingerprint(table)
+    assert json.loads((tmp_path / "trips" / "manifest.json").read_text()) == manifest
+
+
+def test_column_types_widen_integers(interleaved_csv):
+    path, _ = interleaved_csv
+    types = data._column_types(path, 1 << 16)
+    assert types["Trip"] == "string"
+    assert types["Count"] == types["Signal"] == "double"
+
+
+def test_trips_split_on_time_reset_without_trip_column():
+    trips = data.list_trips()
+    df = data.load_trips([t["trip"] for t in trips])
+    assert sum(t["rows"] for t in trips) == len(df)
+    # Within a partition time only moves forward
+    for entry in trips:
+        time = data.read_trip(entry["trip"], columns=[data.TIME_COLUMN]).column(0).to_numpy()
+        assert (np.diff(time) >= 0).all()
+
+
+def test_no_trips_load_as_an_empty_frame():
+    df = data.load_trips([])
+    assert df.empty
+    assert list(df.columns) == data.partition_master()["columns"]
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import decomposition
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(11)
+    t = np.arange(120)
+    X = np.stack([
+        0.05 * t + np.sin(2 * np.pi * t / 12) + rng.normal(0, 0.1, 120),
+        10 + 3 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 0.1, 120),
+        rng.normal(size=120),
+    ])
+    X[2, rng.choice(120, 15, replace=False)] = np.nan
+    X[1, 100:] = np.nan
+    return X
+
+
+def test_moving_average_matches_loop(series):
+    windows = np.array([5, 12, 7])
+    average = decomposition.moving_average(series, windows)
+    for i, window in enumerate(windows):
+        for t in range(series.shape[1]):
+            values = series[i, max(t - window // 2, 0):t + window // 2 + 1]
+            expected = np.nanmean(values) if (~np.isnan(values)).any() else np.nan
+            np.testing.assert_allclose(average[i, t], expected, equal_nan=True)
+
+
+def test_detect_period_finds_the_cycle(series):
+    X = series[:2, :96]
+    periods, strength = decomposition.detect_period(X)
+    assert periods.tolist() == [12, 7]
+    T = X.shape[1]
+    for i in range(len(X)):
+        centered = X[i] - X[i].mean()
+        power = {k: abs(np.sum(centered * np.exp(-2j * np.pi * k * np.arange(T) / T))) ** 2 for k in range(1, T // 2 + 1)}
+        best = max((k for k in power if 2 <= T / k <= T // 2), key=power.get)
+        assert periods[i] == round(T / best)
+        assert strength[i] == pytest.approx(power[best] / sum(power.values()))
+
+
+def test_seasonal_profile_matches_per_phase_means(series):
+    D = series - np.nanmean(series, axis=1, keepdims=True)
+    periods = np.array([12, 7, 4])
+    seasonal = decomposition.seasonal_profile(D, periods)
+    for i, period in enumerate(periods):
+        means = pd.Series(D[i]).groupby(np.arange(D.shape[1]) % period).mean()
+        means -= means.mean()
+        np.testing.assert_allclose(seasonal[i], means.to_numpy()[np.arange(D.shape[1]) % period])
+
+
+def test_decompose_adds_back_up(series):
+    out = decomposition.decompose(series, period=12)
+    total = out["trend"] + out["seasonal"] + out["resid"]
+    np.testing.assert_allclose(total, series, equal_nan=True)
+    assert np.isnan(out["seasonal"][np.isnan(series)]).all()
+
+
+def test_decompose_frame_matches_decompose(series):
+    frame = pd.DataFrame(series.T, columns=["a", "b", "c"])
+    direct = decomposition.decompose(series, period=12)
+    for _ in range(2):  # computed, then from the registry
+        results = decomposition.decompose_frame(frame, period=12)
+        for i, column in enumerate(frame.columns):
+            components, period, _ = results[column]
+            assert period == 12
+            for name in ("trend", "seasonal", "resid"):
+                np.testing.assert_allclose(components[name], direct[name][i], equal_nan=True)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import density
+
+
+@pytest.fixture(scope="module")
+def values():
+    rng = np.random.default_rng(6)
+    return np.concatenate([rng.normal(0, 1, 4000), rng.normal(6, 0.5, 1000)])
+
+
+def test_histograms_match_numpy_and_add_up(values):
+    df = pd.DataFrame({"x": values, "y": -values})
+    ranges = [[values.min(), values.max()], [-values.max(), -values.min()]]
+    whole = density.Histograms.of(df, ["x", "y"], ranges, 480)
+    for i, column in enumerate(whole.columns):
+        expected, _ = np.histogram(df[column], 480, range=ranges[i])
+        np.testing.assert_array_equal(whole.counts[i], expected)
+    parts = density.Histograms(["x", "y"], ranges, 480)
+    for chunk in np.array_split(np.arange(len(df)), 5):
+        parts.merge(density.Histograms.of(df.iloc[chunk], ["x", "y"], ranges, 480))
+    np.testing.assert_array_equal(parts.counts, whole.counts)
+
+
+def test_window_keeps_the_counts_inside_the_range(values):
+    df = pd.DataFrame({"x": values})
+    hist = density.Histograms.of(df, ["x"], [[values.min(), values.max()]], 480)
+    window = hist.window([[-1.0, 2.0]])
+    (lo, hi), counts = window.ranges[0], window.counts[0]
+    assert lo <= -1.0 and hi >= 2.0
+    assert hi - lo < (values.max() - values.min()) / 2
+    inside = ((values >= lo) & (values < hi)).sum()
+    assert counts.sum() == pytest.approx(inside, abs=1)
+    # Only the original cells split by a coarse edge are spread, so each bin is off by less than one cell
+    coarse, _ = np.histogram(values, 30, range=(lo, hi))
+    np.testing.assert_allclose(counts.reshape(30, -1).sum(axis=1), coarse, atol=hist.counts.max())
+
+
+def brute_force_kde(counts, lo, hi, bandwidth):
+    """Direct sum of the same truncated, normalized kernel around every grid cell."""
+    grid = len(counts)
+    dx = (hi - lo) / grid
+    half = int(min(np.ceil(4 * bandwidth / dx), grid))
+    weights = np.exp(-0.5 * (np.arange(-half, half + 1) * dx / bandwidth) ** 2)
+    weights /= weights.sum()
+    out = np.zeros(grid)
+    for i in range(grid):
+        for j in range(max(i - half, 0), min(i + half + 1, grid)):
+            out[i] += counts[j] * weights[j - i + half]
+    return out / (counts.sum() * dx)
+
+
+@pytest.mark.parametrize("bandwidth", [0.05, 0.3, 20.0])
+def test_kde_matches_direct_sum(values, bandwidth):
+    lo, hi = values.min(), values.max()
+    counts, _ = np.histogram(values, 480, range=(lo, hi))
+    centers, y = density.kde(counts.astype(np.float64), lo, hi, bandwidth)
+    np.testing.assert_allclose(y, brute_force_kde(counts, lo, hi, bandwidth), atol=1e-12)
+    np.testing.assert_allclose(centers, (np.histogram_bin_edges(values, 480, (lo, hi))[:-1] + (hi - lo) / 960))
+
+
+def test_kde_approximates_the_raw_gaussian_kde(values):
+    lo, hi = values.min(), values.max()
+    counts, _ = np.histogram(values, 480, range=(lo, hi))
+    bandwidth = values.std() * len(values) ** -0.2
+    centers, y = density.kde(counts.astype(np.float64), lo, hi, bandwidth)
+    direct = np.exp(-0.5 * ((centers[:, None] - values[None, :]) / bandwidth) ** 2).sum(axis=1)
+    direct /= len(values) * bandwidth * np.sqrt(2 * np.pi)
+    np.testing.assert_allclose(y, direct, atol=0.01 * direct.max())
+
+
+def test_kde_of_nothing_is_zero():
+    centers, y = density.kde(np.zeros(16), 0.0, 1.0, 0.1)
+    assert len(centers) == 16 and not y.any()
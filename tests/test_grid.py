@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from core import data, grid
+
+
+@pytest.fixture(scope="module")
+def trips():
+    return [t["trip"] for t in data.list_trips()]
+
+
+@pytest.fixture(scope="module")
+def source(trips):
+    return grid.trips_source(trips)
+
+
+@pytest.fixture(scope="module")
+def frame(source):
+    return data.to_pandas(source[1])
+
+
+def test_no_query_is_source_order(source):
+    assert grid.query_rows(source) is None
+
+
+def test_filters_match_pandas(source, frame):
+    velocity, current = "Velocity [km/h]", "Battery Current [A]"
+    lo, hi = frame[velocity].quantile([0.2, 0.7])
+    filters = [(velocity, "between", (lo, hi)), (current, "between", (0.0, None))]
+    rows = grid.query_rows(source, filters)
+    expected = frame[velocity].between(lo, hi) & (frame[current] >= 0)
+    np.testing.assert_array_equal(rows, np.flatnonzero(expected.to_numpy()))
+
+
+def test_contains_filter_on_text(trips):
+    table = data.read_trip(trips[0])
+    labels = pd.Series(np.where(np.arange(table.num_rows) % 3 == 0, "Heater ON", "off"))
+    source = (("test-text",), table.append_column("State", pa.array(labels)))
+    rows = grid.query_rows(source, [("State", "contains", "on")])
+    np.testing.assert_array_equal(rows, np.flatnonzero(labels.str.contains("on", case=False).to_numpy()))
+
+
+@pytest.mark.parametrize("order", ["ascending", "descending"])
+def test_sort_matches_pandas(source, frame, order):
+    column = "Battery Voltage [V]"
+    rows = grid.query_rows(source, [(column, "between", (None, frame[column].median()))], [(column, order)])
+    kept = frame[frame[column] <= frame[column].median()]
+    expected = kept[column].sort_values(ascending=order == "ascending", kind="stable", na_position="last")
+    np.testing.assert_array_equal(frame[column].to_numpy()[rows], expected.to_numpy())
+    assert set(rows) == set(kept.index)
+
+
+def test_page_slices_the_result(source, frame):
+    column = "Velocity [km/h]"
+    rows = grid.query_rows(source, sort=[(column, "descending")])
+    page = grid.page(source, rows, 100, 50, columns=[column])
+    assert list(page.index) == list(rows[100:150])
+    np.testing.assert_array_equal(page[column].to_numpy(), frame[column].to_numpy()[rows[100:150]])
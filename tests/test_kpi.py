@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import data, kpi, registry
+
+
+@pytest.fixture(scope="module")
+def sources():
+    orders = data.load_orders().assign(
+        Month=lambda df: df["Order Date"].dt.to_period("M").dt.start_time,
+        Year=lambda df: df["Order Date"].dt.year,
+    )
+    overview = data.load_overview().assign(**{"Trip series": lambda df: df["Trip"].str[:5]})
+    return {"orders": orders, "overview": overview}
+
+
+@pytest.mark.parametrize("name", list(kpi.KPIS))
+def test_kpi_matches_pandas(sources, name):
+    spec = kpi.KPIS[name]
+    df = sources[spec["source"]]
+    agg = "size" if spec["agg"] == "count" else spec["agg"]
+    result = kpi.table(name)
+    if not spec["by"]:
+        expected = len(df[spec["measure"]].dropna()) if agg == "size" else getattr(df[spec["measure"]], agg)()
+        assert result["Value"].iloc[0] == pytest.approx(expected)
+        return
+    expected = df.groupby(spec["by"])[spec["measure"]].agg(agg).reset_index(name="Value")
+    result = result.sort_values(spec["by"], ignore_index=True)
+    for column in spec["by"]:
+        np.testing.assert_array_equal(
+            pd.Series(result[column]).astype(expected[column].dtype), expected[column]
+        )
+    np.testing.assert_allclose(result["Value"], expected["Value"])
+
+
+def test_total_sales_is_train_csv_total():
+    assert kpi.value("Total sales") == pytest.approx(2_261_536.78, abs=0.01)
+
+
+def test_merged_blocks_match_single_block(sources, monkeypatch):
+    # Many small blocks exercise the merge of per-block partials
+    registry.REGISTRY.clear()
+    monkeypatch.setattr(kpi, "BLOCK_ROWS", 1_000)
+    try:
+        assert len(kpi.blocks("orders")) > 1
+        by_month = kpi.table("Sales by month")
+        mean_by_year = kpi.table("Mean order line by year")
+    finally:
+        registry.REGISTRY.clear()
+    orders = sources["orders"]
+    np.testing.assert_allclose(by_month["Value"], orders.groupby("Month")["Sales"].sum().to_numpy())
+    np.testing.assert_allclose(mean_by_year["Value"], orders.groupby("Year")["Sales"].mean().to_numpy())
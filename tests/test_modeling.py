@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import generate
+from core import data, modeling, registry
+
+
+def test_default_soc_features_leave_out_soc_channels():
+    channels = generate.channel_names(len(generate.CHANNELS))
+    target = "SoC [%]"
+    features = modeling.default_soc_features(channels, target)
+    assert {"displayed SoC [%]", "min. SoC [%]", "max. SoC [%]"} <= set(channels)
+    assert not [c for c in features if "soc" in c.lower()]
+    assert set(features) == {c for c in channels if "soc" not in c.lower()}
+
+
+def brute_force_ridge(X, y, alpha):
+    """Ridge on features standardized with their population std, intercept unpenalized."""
+    mean, std = X.mean(axis=0), X.std(axis=0)
+    std[std == 0] = 1.0
+    Z = (X - mean) / std
+    coef = np.linalg.solve(Z.T @ Z + alpha * np.eye(X.shape[1]), Z.T @ (y - y.mean()))
+    coef /= std
+    return coef, y.mean() - mean @ coef
+
+
+def test_ridge_batches_match_a_direct_solve():
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(1000, 4)) * [1, 10, 1000, 0]
+    y = X[:, :3] @ [2.0, -0.3, 0.001] + 5 + rng.normal(0, 0.1, 1000)
+    X[rng.choice(1000, 30, replace=False), 1] = np.nan
+    model = modeling.RidgeRegression(alpha=0.5)
+    for start in range(0, 1000, 128):
+        model.partial_fit(X[start:start + 128], y[start:start + 128])
+    model.solve()
+    keep = ~np.isnan(X).any(axis=1)
+    coef, intercept = brute_force_ridge(X[keep], y[keep], 0.5)
+    assert model.n == keep.sum()
+    np.testing.assert_allclose(model.coef_, coef, rtol=1e-8, atol=1e-12)
+    assert model.intercept_ == pytest.approx(intercept)
+
+
+def test_trained_model_loads_back_from_disk():
+    trips = [entry["trip"] for entry in data.list_trips()]
+    target = "Battery Voltage [V]"
+    channels = [c for c in data.read_trip(trips[0]).column_names if c not in (data.TIME_COLUMN, data.TRIP_COLUMN)]
+    params = {"trips": trips, "target": target, "features": modeling.default_soc_features(channels, target),
+              "alpha": 1.0, "preprocess": None}
+    key = modeling.model_key("soc", params)
+    assert modeling.cached_model(key) is None
+    trained = modeling._train("soc", params, key)
+    registry.REGISTRY.clear()
+    loaded = modeling.cached_model(key)
+    assert loaded is not trained
+    assert loaded.features == params["features"]
+    assert loaded.metrics == trained.metrics
+    pd.testing.assert_series_equal(loaded.coefficients(), trained.coefficients())
+    pd.testing.assert_frame_equal(modeling.predict_trip(loaded, trips[0]), modeling.predict_trip(trained, trips[0]))
@@ -0,0 +1,88 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import data, preprocessing, stats
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(4)
+    n = 20_000
+    df = pd.DataFrame({
+        "normal": rng.normal(10, 3, n),
+        "skewed": rng.lognormal(0, 1, n),
+        "constant": np.full(n, 7.0),
+    })
+    df.loc[rng.choice(n, 400, replace=False), "normal"] = np.nan
+    df.loc[rng.choice(n, 50, replace=False), "skewed"] = np.nan
+    return df
+
+
+def brute_force_transform(df, pipeline):
+    """The pipeline's steps one pandas call at a time, from its fitted parameters."""
+    settings = pipeline.settings
+    values = df[pipeline.columns].copy()
+    params = pipeline.parameters()
+    if settings["impute"] != "none":
+        values = values.fillna(params["Fill"])
+    values = values.clip(params["Lower"], params["Upper"], axis=1)
+    return (values - params["Offset"]) / params["Scale"]
+
+
+@pytest.mark.parametrize(
+    "impute,clip,scale", list(itertools.product(preprocessing.IMPUTERS, [0, 0.05], preprocessing.SCALERS))
+)
+def test_transform_matches_pandas(frame, impute, clip, scale):
+    settings = {"impute": impute, "clip": clip, "scale": scale}
+    columns = list(frame.columns)
+    pipeline = preprocessing.Pipeline.fit(stats.Summary.of(frame), columns, settings)
+    params = pipeline.parameters()
+    n = len(frame)
+
+    if impute == "mean":
+        np.testing.assert_allclose(params["Fill"], frame.mean(), rtol=1e-12)
+    elif impute == "median":
+        assert params.loc["constant", "Fill"] == 7.0
+        for column in columns[:2]:
+            rank = (frame[column] <= params.loc[column, "Fill"]).sum() / frame[column].count()
+            assert rank == pytest.approx(0.5, abs=0.02)
+    if clip:
+        for column in columns[:2]:
+            assert (frame[column] < params.loc[column, "Lower"]).sum() / n == pytest.approx(clip, abs=0.02)
+            assert (frame[column] > params.loc[column, "Upper"]).sum() / n == pytest.approx(clip, abs=0.02)
+    if scale == "zscore":
+        np.testing.assert_allclose(params["Offset"], frame.mean(), rtol=1e-12)
+        np.testing.assert_allclose(params["Scale"][:2], frame.std()[:2], rtol=1e-9)
+    assert params.loc["constant", "Scale"] == 1.0
+
+    out = pipeline.transform_frame(frame)
+    pd.testing.assert_frame_equal(out[columns], brute_force_transform(frame, pipeline), rtol=1e-12)
+
+
+def test_transform_frame_keeps_float32_and_other_columns(frame):
+    df = frame.astype(np.float32).assign(label="x")
+    pipeline = preprocessing.Pipeline.fit(stats.Summary.of(frame), list(frame.columns))
+    out = pipeline.transform_frame(df)
+    assert (out[pipeline.columns].dtypes == np.float32).all()
+    assert (out["label"] == "x").all()
+    expected = brute_force_transform(df[pipeline.columns].astype(np.float64), pipeline)
+    np.testing.assert_allclose(out[pipeline.columns], expected, rtol=1e-5, atol=1e-5)
+
+
+def test_json_round_trip(frame):
+    pipeline = preprocessing.Pipeline.fit(stats.Summary.of(frame), list(frame.columns), {"impute": "none", "clip": 0, "scale": "minmax"})
+    loaded = preprocessing.Pipeline.from_json(pipeline.to_json())
+    assert loaded.key == pipeline.key
+    pd.testing.assert_frame_equal(loaded.parameters(), pipeline.parameters())
+
+
+def test_preprocessed_trips_match_the_raw_trips():
+    pipeline = preprocessing.trip_pipeline()
+    for trip, df in preprocessing.iter_trips():
+        raw = data.to_pandas(data.read_trip(trip))
+        expected = brute_force_transform(raw, pipeline)
+        np.testing.assert_allclose(df[pipeline.columns], expected, rtol=1e-5, atol=1e-6)
+        np.testing.assert_array_equal(df[data.TIME_COLUMN], raw[data.TIME_COLUMN])
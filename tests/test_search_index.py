@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from core import data, search_index
+
+
+@pytest.fixture(scope="module")
+def orders():
+    return data.load_orders()
+
+
+@pytest.fixture(scope="module")
+def index():
+    return search_index.load()
+
+
+def brute_force_text(orders, query):
+    """Rows where every query term prefixes (short terms) or is inside (longer terms) a token."""
+    tokens = [
+        set().union(*(search_index.tokenize(row[f]) for f in search_index.TEXT_FIELDS))
+        for row in orders[search_index.TEXT_FIELDS].to_dict("records")
+    ]
+    rows = []
+    for i, row_tokens in enumerate(tokens):
+        if all(
+            any(t.startswith(term) if len(term) < search_index.NGRAM else term in t for t in row_tokens)
+            for term in search_index.tokenize(query)
+        ):
+            rows.append(i)
+    return np.array(rows, dtype=np.int64)
+
+
+@pytest.mark.parametrize("query", ["chair", "los angeles", "ca", "tab", "xerox 19", "nothingmatches"])
+def test_text_search_matches_brute_force(orders, index, query):
+    rows, _ = index.search(query, {})
+    np.testing.assert_array_equal(rows, brute_force_text(orders, query))
+
+
+def test_facets_match_pandas(orders, index):
+    selected = {"Region": ["West"], "Segment": ["Consumer", "Corporate"]}
+    rows, counts = index.search("chair", selected)
+    text = np.zeros(len(orders), dtype=bool)
+    text[brute_force_text(orders, "chair")] = True
+    region, segment = orders["Region"] == "West", orders["Segment"].isin(selected["Segment"])
+    np.testing.assert_array_equal(rows, np.flatnonzero(text & region & segment))
+    # A facet's counts ignore its own selection
+    nonzero = {field: {k: v for k, v in c.items() if v} for field, c in counts.items()}
+    assert nonzero["Region"] == orders[text & segment]["Region"].value_counts().to_dict()
+    assert nonzero["Category"] == orders[text & region & segment]["Category"].value_counts().to_dict()
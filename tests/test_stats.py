@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import data, stats
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(1)
+    n = 50_000
+    df = pd.DataFrame({
+        "normal": rng.normal(10, 3, n),
+        "skewed": rng.lognormal(0, 1, n),
+        "levels": rng.integers(0, 1000, n).astype(np.float64),
+    })
+    df.loc[rng.choice(n, 500, replace=False), "normal"] = np.nan
+    df["related"] = 2 * df["skewed"] + rng.normal(0, 0.5, n)
+    return df
+
+
+def merged_summary(df, parts=7):
+    summary = stats.Summary()
+    for chunk in np.array_split(np.arange(len(df)), parts):
+        summary.merge(stats.Summary.of(df.iloc[chunk]))
+    return summary
+
+
+def test_moments_match_numpy(frame):
+    summary = merged_summary(frame)
+    described = summary.describe(list(frame.columns))
+    for column in frame.columns:
+        values = frame[column].dropna().to_numpy()
+        assert described.loc[column, "Mean"] == pytest.approx(values.mean(), rel=1e-12)
+        assert described.loc[column, "Std Dev"] == pytest.approx(values.std(ddof=1), rel=1e-9)
+        assert described.loc[column, "Min"] == values.min()
+        assert described.loc[column, "Max"] == values.max()
+
+
+def test_median_within_rank_error(frame):
+    summary = merged_summary(frame)
+    for column in frame.columns:
+        values = np.sort(frame[column].dropna().to_numpy())
+        median = summary.describe([column]).loc[column, "Median"]
+        rank = np.searchsorted(values, median) / len(values)
+        assert abs(rank - 0.5) < 0.01
+
+
+def test_distinct_count_estimate(frame):
+    summary = merged_summary(frame)
+    assert summary.nunique("levels") == pytest.approx(frame["levels"].nunique(), rel=0.05)
+
+
+def test_correlation_matches_pandas(frame):
+    summary = merged_summary(frame)
+    columns = list(frame.columns)
+    expected = frame[columns].corr()
+    np.testing.assert_allclose(summary.corr(columns).loc[columns, columns], expected, atol=1e-9)
+
+
+def test_trip_summary_matches_loaded_trips():
+    trips = [t["trip"] for t in data.list_trips()]
+    df = data.load_trips(trips)
+    summary = stats.trips_summary(trips)
+    columns = summary.numeric_columns()
+    described = summary.describe(columns)
+    assert summary.rows == len(df)
+    for column in columns:
+        values = df[column].dropna().to_numpy(dtype=np.float64)
+        assert described.loc[column, "Mean"] == pytest.approx(values.mean(), rel=1e-9)
+        np.testing.assert_allclose(summary.ranges([column])[0], [values.min(), values.max()])
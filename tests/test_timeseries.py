@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from core import data, timeseries
+
+TOTAL_SALES = 2_261_536.78
+
+
+@pytest.fixture(scope="module")
+def orders():
+    return data.load_orders()
+
+
+@pytest.mark.parametrize("level", ["Day", "Week", "Month", "Quarter", "Year"])
+def test_full_range_total_matches_raw_rows(orders, level):
+    first, last = timeseries.order_range()
+    series = timeseries.order_series(level, first, last)
+    assert series["Total"].sum() == pytest.approx(orders["Sales"].sum())
+    assert series["Total"].sum() == pytest.approx(TOTAL_SALES, abs=0.01)
+
+
+@pytest.mark.parametrize("level,freq", [("Week", "W"), ("Month", "M"), ("Quarter", "Q")])
+def test_window_matches_pandas_resample(orders, level, freq):
+    # Starts mid-period: the period containing the start is kept whole
+    start, end = pd.Timestamp("2016-02-17"), pd.Timestamp("2017-08-09")
+    series = timeseries.order_series(level, start, end, by="Region")
+    periods = orders["Order Date"].dt.to_period(freq)
+    keep = (periods >= start.to_period(freq)) & (periods <= end.to_period(freq))
+    expected = (
+        orders[keep].groupby([periods[keep].dt.start_time, "Region"])["Sales"].sum().unstack(fill_value=0)
+    )
+    expected.index.name, expected.columns.name = "Period", None
+    pd.testing.assert_frame_equal(series, expected, check_names=False, check_freq=False)
+
+
+def test_filters_and_line_counts(orders):
+    first, last = timeseries.order_range()
+    series = timeseries.order_series("Month", first, last, measure="Order lines", filters={"Segment": ["Consumer"]})
+    assert series["Total"].sum() == (orders["Segment"] == "Consumer").sum()
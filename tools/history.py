@@ -0,0 +1,73 @@
+import datetime
+
+import streamlit as st
+import pandas as pd
+from streamlit.errors import StreamlitAPIException
+
+from core import history
+
+PAGE_SIZE = 50
+
+st.title("History")
+st.caption("Page visits and selections, newest first. Replaying an entry restores its selections.")
+
+col1, col2 = st.columns(2)
+with col1:
+    page_filter = st.selectbox("Page", ["All pages"] + history.pages(), key="history_page")
+with col2:
+    mine = st.toggle("This session only", key="history_mine")
+
+# Keyset pagination: a stack of "older than id" cursors, reset when the filters change
+filters = (page_filter, mine)
+if st.session_state.get("history_filters") != filters:
+    st.session_state.history_filters = filters
+    st.session_state.history_cursors = [None]
+cursors = st.session_state.history_cursors
+
+rows = history.entries(
+    before=cursors[-1],
+    limit=PAGE_SIZE,
+    page=None if page_filter == "All pages" else page_filter,
+    session=st.session_state.get("history_session") if mine else None,
+)
+# Rows still queued for the writer lead the first page and have no id
+committed = [e for e in rows if e["id"] is not None]
+
+table = pd.DataFrame({
+    "Time": [datetime.datetime.fromtimestamp(e["ts"]).strftime("%d/%m/%Y %H:%M:%S") for e in rows],
+    "Page": [e["page"] for e in rows],
+    "Selections": [", ".join(f"{k}={v}" for k, v in e["state"].items()) for e in rows],
+    "Results": [len(e["results"]) for e in rows],
+    "Still cached": [history.cached_results(e) for e in rows],
+})
+event = st.dataframe(
+    table, hide_index=True, use_container_width=True, on_select="rerun", selection_mode="single-row",
+    key="history_table",
+)
+
+newer_col, position_col, older_col = st.columns([1, 4, 1])
+with newer_col:
+    if st.button("Newer", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+with position_col:
+    st.caption(f"Page {len(cursors)}")
+with older_col:
+    if st.button("Older", disabled=len(committed) < PAGE_SIZE):
+        cursors.append(committed[-1]["id"])
+        st.rerun()
+
+if event.selection.rows:
+    entry = rows[event.selection.rows[0]]
+    st.subheader(f"{entry['page']} at {table['Time'][event.selection.rows[0]]}")
+    st.json(entry["state"])
+    page = history.PAGES.get(entry["page"])
+    if st.button("Replay", type="primary", disabled=page is None):
+        for key, value in history.replay_state(entry):
+            try:
+                st.session_state[key] = value
+            except StreamlitAPIException:
+                # Widgets that cannot be set through session state (buttons, uploaders) or
+                # whose options changed since the entry was recorded
+                continue
+        st.switch_page(page)
@@ -0,0 +1,40 @@
+import streamlit as st
+from st_keyup import st_keyup
+
+from core import data, search_index
+
+st.title("Search")
+st.caption("Order history from train/train.csv")
+
+# Prebuilt, memory-mapped index; built once per version of train.csv
+index = search_index.load()
+
+query = st_keyup(
+    "Search customers, products, cities, states and categories",
+    debounce=150, key="search_query", placeholder="e.g. chair los angeles",
+)
+
+# Facet selections from the previous run drive this run's counts
+selected = {f: st.session_state.get(f"facet_{f}", []) for f in search_index.FACET_FIELDS}
+rows, counts = index.search(query or "", selected)
+
+facet_columns = st.columns(len(search_index.FACET_FIELDS))
+for col, field in zip(facet_columns, search_index.FACET_FIELDS):
+    with col:
+        st.multiselect(
+            field,
+            options=list(counts[field]),
+            format_func=lambda v, f=field: f"{v} ({counts[f][v]:,})",
+            key=f"facet_{field}",
+        )
+
+st.write(f"### {len(rows):,} matching orders")
+
+# Only the visible page of rows is taken from the order table
+page_size = 50
+pages = max((len(rows) - 1) // page_size + 1, 1)
+page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key="search_page")
+start = (page - 1) * page_size
+orders = data.load_orders()
+st.dataframe(orders.iloc[rows[start:start + page_size]], hide_index=True, use_container_width=True)
+st.caption(f"Page {page} of {pages}")